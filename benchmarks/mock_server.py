@@ -0,0 +1,174 @@
+"""
+A local mock HTTP server emulating the parts of DISCOSweb and Space-Track used by satcatalogquery:
+paged and filtered /api/objects of DISCOSweb with rate limiting, and login, modeldef, and TLE queries of Space-Track.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler,ThreadingHTTPServer
+from urllib.parse import urlparse,parse_qs,unquote
+
+# Fields announced by the modeldef of the Space-Track request classes
+_MODELDEF = [
+    {'Field':'NORAD_CAT_ID','Type':'int(10) unsigned','Null':'NO','Key':'','Default':None,'Extra':''},
+    {'Field':'ORDINAL','Type':'tinyint(3) unsigned','Null':'NO','Key':'','Default':None,'Extra':''},
+    {'Field':'EPOCH','Type':'datetime','Null':'YES','Key':'','Default':None,'Extra':''},
+    {'Field':'OBJECT_TYPE','Type':'varchar(12)','Null':'YES','Key':'','Default':None,'Extra':''},
+    {'Field':'DECAY_DATE','Type':'datetime','Null':'YES','Key':'','Default':None,'Extra':''},
+    ]
+
+def _satnos_of_filter(expr):
+    """
+    Extract the NORAD IDs selected by a DISCOSweb filter expression; None means no restriction.
+    Only eq(satno,...) and in(satno,(...)) are interpreted, other conditions are ignored.
+    """
+    if not expr: return None
+    m = re.search(r"in\(satno,\(([^)]*)\)\)",expr)
+    if m: return {int(s.strip("' ")) for s in m.group(1).split(',') if s.strip("' ")}
+    m = re.search(r"eq\(satno,'?(\d+)'?\)",expr)
+    if m: return {int(m.group(1))}
+    return None
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self,format,*args):
+        pass
+
+    def _send(self,status,body,content_type='application/json',headers=None):
+        if not isinstance(body,bytes): body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type',content_type)
+        self.send_header('Content-Length',str(len(body)))
+        for key,value in (headers or {}).items():
+            self.send_header(key,value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats['bytes'] += len(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length',0))
+        self.rfile.read(length)
+        self.server.stats['requests'] += 1
+        if self.path.rstrip('/').endswith('ajaxauth/login'):
+            self._send(200,'""',headers={'Set-Cookie':'chocolatechip=mock; Path=/'})
+        else:
+            self._send(404,'{}')
+
+    def do_GET(self):
+        self.server.stats['requests'] += 1
+        url = urlparse(self.path)
+        if url.path.startswith('/api/objects'):
+            self._discos_objects(parse_qs(url.query))
+        elif '/modeldef/class/' in url.path:
+            self._send(200,json.dumps({'controller':'basicspacedata','data':_MODELDEF}))
+        elif '/query/class/' in url.path:
+            self._spacetrack_query(url.path)
+        elif url.path.rstrip('/').endswith('ajaxauth/logout'):
+            self._send(200,'""')
+        else:
+            self._send(404,'{}')
+
+    def _discos_objects(self,query):
+        server = self.server
+
+        # Sliding-window rate limit
+        with server.lock:
+            now = time.monotonic()
+            while server.discos_requests and now - server.discos_requests[0] > server.rate_window:
+                server.discos_requests.popleft()
+            if len(server.discos_requests) >= server.rate_limit:
+                retry_after = server.rate_window - (now - server.discos_requests[0])
+                server.stats['throttled'] += 1
+                body = {'errors':[{'status':'429','title':'Too Many Requests','detail':'Rate limit exceeded'}]}
+                self._send(429,json.dumps(body),headers={'Retry-After':'{:.0f}'.format(max(retry_after,1))})
+                return
+            server.discos_requests.append(now)
+
+        if self.headers.get('Authorization','') != 'Bearer ' + server.token:
+            self._send(401,json.dumps({'errors':[{'status':'401','title':'Unauthorized'}]}))
+            return
+
+        satnos = _satnos_of_filter(query.get('filter',[''])[0])
+        objects = server.discos_objects if satnos is None else [obj for obj in server.discos_objects if obj['attributes']['satno'] in satnos]
+
+        page_number = int(query.get('page[number]',['1'])[0])
+        page_size = min(int(query.get('page[size]',['10'])[0]),100)
+        total_pages = max((len(objects) + page_size - 1)//page_size,1)
+        data = objects[(page_number-1)*page_size:page_number*page_size]
+
+        body = {'data':data,'meta':{'pagination':{'totalPages':total_pages,'currentPage':page_number,'pageSize':page_size}}}
+        self._send(200,json.dumps(body))
+
+    def _spacetrack_query(self,path):
+        server = self.server
+        # Predicates come in pairs of /key/value after the request class
+        parts = path.split('/query/class/',1)[1].split('/')
+        predicates = {parts[i].lower():unquote(parts[i+1]) for i in range(1,len(parts)-1,2)}
+
+        if 'norad_cat_id' in predicates:
+            noradids = [int(s) for s in predicates['norad_cat_id'].split(',') if s]
+        else:
+            noradids = list(server.tles.keys())
+
+        lines = []
+        for noradid in noradids:
+            lines.extend(server.tles.get(noradid,[]))
+        self._send(200,'\n'.join(lines) + ('\n' if lines else ''),content_type='text/plain')
+
+class MockServer(object):
+    """
+    class of MockServer, a threaded local HTTP server emulating DISCOSweb and Space-Track.
+
+    Usage:
+        with MockServer(discos_objects,tles) as server:
+            query.DISCOS_URL = server.url
+            data_download.SPACETRACK_URL = server.url + '/'
+
+    Inputs:
+        discos_objects -> [list of dict] DISCOSweb resources served by /api/objects, in order of satno
+        tles -> [dict] Two lines of each object keyed by NORAD ID, served by the Space-Track query endpoints
+        token -> [str,optional,default='mock-token'] Bearer token accepted by /api/objects
+        rate_limit -> [int,optional,default=10000] Maximum number of requests to /api/objects within rate_window
+        rate_window -> [float,optional,default=60] Width of the sliding window of the rate limit in seconds
+    """
+
+    def __init__(self,discos_objects,tles,token='mock-token',rate_limit=10000,rate_window=60):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1',0),_Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.discos_objects = discos_objects
+        self.httpd.tles = tles
+        self.httpd.token = token
+        self.httpd.rate_limit = rate_limit
+        self.httpd.rate_window = rate_window
+        self.httpd.discos_requests = deque()
+        self.httpd.lock = threading.Lock()
+        self.httpd.stats = {'requests':0,'bytes':0,'throttled':0}
+        self._thread = None
+
+    @property
+    def url(self):
+        host,port = self.httpd.server_address[:2]
+        return 'http://{:s}:{:d}'.format(host,port)
+
+    @property
+    def stats(self):
+        return dict(self.httpd.stats)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever,daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,*exc):
+        self.stop()
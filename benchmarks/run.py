@@ -0,0 +1,257 @@
+"""
+Benchmark suite of satcatalogquery.
+
+Synthetic data sources are generated in a temporary home directory, DISCOSweb and Space-Track are emulated by a local mock server,
+and the hot paths of the package are timed. Results are written as JSON, and can be compared against a baseline to catch regressions.
+
+Usage:
+    python benchmarks/run.py --scales 10k,60k --repeat 3 --output benchmarks/results.json
+    python benchmarks/run.py --scales 60k --compare benchmarks/baseline.json --threshold 1.25
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median
+
+import synthetic
+from mock_server import MockServer
+
+SCENARIOS = ['import','celestrak_query','celestrak_query_warm','discos_query','objects_query','parseQSMagFile','download_tle','hist1d','hist2d','pie']
+
+# Scenarios timed cold, with the in-memory source cache cleared before each run, so that every run parses the source files
+COLD_SCENARIOS = ['celestrak_query','objects_query','parseQSMagFile']
+
+# Scenarios timed warm, after a run that fills the in-memory source cache
+WARM_SCENARIOS = ['celestrak_query_warm']
+
+# Modules that must not be loaded by importing satcatalogquery, since they are only needed by plotting, downloads, the asyncio API, and worker processes
+HEAVY_MODULES = ['matplotlib','spacetrack','wget','requests','httpx','yaml','asyncio','multiprocessing','concurrent.futures.process']
+
+def _prepare_home(home,n,seed):
+    """
+    Write synthetic data sources and credentials to a temporary home directory in the layout expected by satcatalogquery.
+    """
+    satcat_dir = os.path.join(home,'src','satcat-data')
+    discos_dir = os.path.join(home,'src','discos-data')
+    spacetrack_dir = os.path.join(home,'src','spacetrack-data')
+    for direc in [satcat_dir,discos_dir,spacetrack_dir]:
+        os.makedirs(direc,exist_ok=True)
+
+    df = synthetic.satcat(n,seed)
+    df.to_csv(os.path.join(satcat_dir,'satcat.csv'),index=False)
+    synthetic.write_qsmag(n,os.path.join(satcat_dir,'qs.mag'),seed)
+    with open(os.path.join(discos_dir,'discos-token'),'w') as f:
+        f.write('mock-token')
+    with open(os.path.join(spacetrack_dir,'spacetrack-login'),'w') as f:
+        f.write('mock-user\nmock-password\n')
+    return df
+
+def _time(func,repeat,setup=None,baseline=None):
+    """
+    Time a function several times.
+
+    Inputs:
+        func -> [function] Function to time
+        repeat -> [int] Number of runs
+        setup -> [function,optional,default=None] Function called before each run, outside the timing
+        baseline -> [function,optional,default=None] Function timed before each run, whose time is subtracted, such as the startup of an interpreter
+
+    Outputs:
+        times -> [list of float] Wall time of each run in seconds
+        result -> Return value of the last run
+    """
+    times,result = [],None
+    for _ in range(repeat):
+        if setup is not None: setup()
+        t0 = time.perf_counter()
+        if baseline is not None: baseline()
+        t1 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t1 - (t1 - t0))
+    return times,result
+
+def _python(code):
+    """
+    Run code in a fresh interpreter from the root of the repository, and return its output.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,cwd=root)
+    if out.returncode != 0: raise Exception('python -c {:s} failed: {:s}'.format(code,out.stderr.strip()))
+    return out.stdout
+
+def heavy_imports():
+    """
+    Import satcatalogquery in a fresh interpreter, so that the modules cached by the current process do not hide the import cost.
+
+    Outputs:
+        heavy -> [list of str] Modules of HEAVY_MODULES loaded by the import
+    """
+    modules = json.loads(_python('import sys,json; import satcatalogquery; print(json.dumps(sorted(sys.modules)))').strip().splitlines()[-1])
+    return [name for name in HEAVY_MODULES if name in modules]
+
+def _import_package():
+    """
+    Import satcatalogquery in a fresh interpreter, and raise an exception if it loads any of HEAVY_MODULES.
+    """
+    heavy = heavy_imports()
+    if heavy: raise Exception('import satcatalogquery loads {:s}'.format(', '.join(heavy)))
+    return heavy
+
+def run_scale(scale,n,scenarios,repeat,seed=0,tle_ids=2000):
+    """
+    Run the benchmark scenarios at one scale.
+
+    Outputs:
+        results -> [list of dict] One record per scenario
+    """
+    home = tempfile.mkdtemp(prefix='satcatalogquery-bench-')
+    os.environ['HOME'] = home # Path.home() resolves the data directories of satcatalogquery from HOME
+
+    t0 = time.perf_counter()
+    df_satcat = _prepare_home(home,n,seed)
+    discos_objects = synthetic.discos_objects(df_satcat,seed) if {'discos_query','objects_query'} & set(scenarios) else []
+    tles = synthetic.tle_lines(df_satcat,seed) if 'download_tle' in scenarios else {}
+    print('[{:s}] generated synthetic data in {:.1f} s'.format(scale,time.perf_counter() - t0))
+
+    from satcatalogquery import query,data_download
+    from satcatalogquery import SatCatalog,instrument
+
+    # Record the pauses for rate limiting instead of sleeping
+    instrument.sleep_func = lambda seconds: None
+
+    records = []
+    with MockServer(discos_objects,tles) as server:
+        query.DISCOS_URL = server.url
+        data_download.SPACETRACK_URL = server.url + '/'
+
+        satcatalog = None
+        noradids = [int(i) for i in df_satcat['NORAD_CAT_ID'][:tle_ids]]
+        dir_fig = os.path.join(home,'figs/')
+        dir_tle = os.path.join(home,'TLE/')
+
+        funcs = {
+            'import':_import_package,
+            'celestrak_query':lambda: query._celestrak_query(DECAYED=False,MEAN_ALT=[300,2000]),
+            'celestrak_query_warm':lambda: query._celestrak_query(DECAYED=False,MEAN_ALT=[300,2000]),
+            'discos_query':lambda: query._discos_query(DECAYED=False),
+            'objects_query':lambda: query._objects_query(DECAYED=False,MEAN_ALT=[300,2000],RCSAvg=[0.1,10]),
+            'parseQSMagFile':lambda: query.parseQSMagFile(),
+            'download_tle':lambda: data_download.download_tle(noradids,mode='clear',dir_TLE=dir_tle),
+            'hist1d':lambda: satcatalog.hist1d(['MEAN_ALT','LAUNCH_DATE'],dir_fig=dir_fig),
+            'hist2d':lambda: satcatalog.hist2d('MEAN_ALT','INCLINATION',dir_fig=dir_fig),
+            'pie':lambda: satcatalog.pie('OWNER',prominent='US',cutoff=100,dir_fig=dir_fig),
+            }
+
+        for scenario in scenarios:
+            if scenario in ['hist1d','hist2d','pie'] and satcatalog is None:
+                satcatalog = SatCatalog.celestrak_query()
+            setup = query.clear_source_cache if scenario in COLD_SCENARIOS else None
+            # The import is timed net of the startup of a bare interpreter
+            baseline = (lambda: _python('pass')) if scenario == 'import' else None
+            if scenario in WARM_SCENARIOS: funcs[scenario]()
+            stats0 = server.stats
+            with instrument.collect() as stats:
+                try:
+                    times,result = _time(funcs[scenario],repeat,setup,baseline)
+                    status,rows = 'ok',(len(result) if hasattr(result,'__len__') and not isinstance(result,str) else None)
+                except Exception as e:
+                    times,status,rows = [],'error: {:s}: {:s}'.format(type(e).__name__,str(e)),None
+            stats1 = server.stats
+            record = {
+                'scale':scale,'n':n,'scenario':scenario,'status':status,'repeat':repeat,'rows':rows,
+                'times':times,'min':min(times) if times else None,'median':median(times) if times else None,
+                'sleep_requested':sum(stats.sleeps.values())/max(repeat,1),
+                'stages':{name:span['total']/max(repeat,1) for name,span in stats.spans.items()},
+                'http_requests':(stats1['requests'] - stats0['requests'])/max(repeat,1),
+                'http_bytes':(stats1['bytes'] - stats0['bytes'])/max(repeat,1),
+                }
+            records.append(record)
+            if times:
+                print('[{:s}] {:<20s} median {:8.3f} s  min {:8.3f} s  requests {:6.0f}  sleep {:6.0f} s'.format(scale,scenario,record['median'],record['min'],record['http_requests'],record['sleep_requested']))
+            else:
+                print('[{:s}] {:<20s} {:s}'.format(scale,scenario,status))
+
+    return records
+
+def _environment():
+    """
+    Describe the environment of a benchmark run.
+    """
+    import numpy,pandas
+    try:
+        commit = subprocess.run(['git','rev-parse','HEAD'],capture_output=True,text=True,cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {'python':platform.python_version(),'platform':platform.platform(),'numpy':numpy.__version__,'pandas':pandas.__version__,
+            'commit':commit,'cpu_count':os.cpu_count(),'timestamp':time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def compare(results,baseline,threshold):
+    """
+    Compare results against a baseline.
+
+    Outputs:
+        regressions -> [list of str] Scenarios whose median time exceeds threshold times the baseline
+    """
+    base = {(r['scale'],r['scenario']):r for r in baseline['results'] if r['median'] is not None}
+    regressions = []
+    for r in results:
+        b = base.get((r['scale'],r['scenario']))
+        if b is None or r['median'] is None: continue
+        ratio = r['median']/b['median'] if b['median'] > 0 else float('inf')
+        if ratio > threshold:
+            regressions.append('{:s}/{:s}: {:.3f} s vs {:.3f} s ({:.2f}x)'.format(r['scale'],r['scenario'],r['median'],b['median'],ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark suite of satcatalogquery')
+    parser.add_argument('--scales',default='10k,60k',help='comma-separated scales among {:s}'.format(','.join(synthetic.SCALES)))
+    parser.add_argument('--scenarios',default=','.join(SCENARIOS),help='comma-separated scenarios among {:s}'.format(','.join(SCENARIOS)))
+    parser.add_argument('--repeat',type=int,default=3,help='number of timed runs of each scenario')
+    parser.add_argument('--seed',type=int,default=0,help='seed of the synthetic data')
+    parser.add_argument('--tle-ids',type=int,default=2000,help='number of NORAD IDs requested in the download_tle scenario')
+    parser.add_argument('--output',default=None,help='path of the JSON results')
+    parser.add_argument('--compare',default=None,help='path of baseline JSON results to compare against')
+    parser.add_argument('--threshold',type=float,default=1.25,help='ratio of median times above which a scenario is reported as a regression')
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown: parser.error('unknown scenarios: {:s}'.format(', '.join(sorted(unknown))))
+
+    # Keep the user's home directory untouched by the runs
+    home = os.environ.get('HOME')
+    results = []
+    try:
+        for scale in args.scales.split(','):
+            if scale not in synthetic.SCALES: parser.error('unknown scale: {:s}'.format(scale))
+            results.extend(run_scale(scale,synthetic.SCALES[scale],scenarios,args.repeat,args.seed,args.tle_ids))
+    finally:
+        if home is not None: os.environ['HOME'] = home
+
+    report = {'environment':_environment(),'results':results}
+    if args.output:
+        with open(args.output,'w') as f:
+            json.dump(report,f,indent=2)
+        print('Results are written to {:s}'.format(args.output))
+
+    # A heavy module loaded by the import fails the run, whatever the timings
+    failures = [r for r in results if r['scenario'] == 'import' and r['status'] != 'ok']
+    for r in failures:
+        print('FAILED {:s}/import: {:s}'.format(r['scale'],r['status']))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results,baseline,args.threshold)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions: return 1
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Generators of synthetic data sources in the formats consumed by satcatalogquery:
+the CelesTrak satcat.csv, the McCants qs.mag, DISCOSweb JSON:API objects, and Space-Track TLE.
+All generators are deterministic for a given seed.
+"""
+import numpy as np
+import pandas as pd
+
+# Named scales of the benchmark suite
+SCALES = {'10k':10000,'60k':60000,'1M':1000000}
+
+OBJECT_TYPES = ['PAY','R/B','DEB','UNK']
+OWNERS = ['US','PRC','CIS','FR','JPN','ESA','IND','UK','ISS','GLOB']
+LAUNCH_SITES = ['AFETR','AFWTR','TYMSC','PKMTR','JSC','XICLF','TAISC','FRGUI','SRILR','KYMSC']
+OBJECT_CLASSES = ['Payload','Payload Debris','Payload Fragmentation Debris','Payload Mission Related Object','Rocket Body',
+                  'Rocket Debris','Rocket Fragmentation Debris','Rocket Mission Related Object','Other Mission Related Object','Other Debris','Unknown']
+SHAPES = ['Cyl','Sphere','Cone','Box','Pan','Box + 2 Pan','Cyl + 2 Pan','Dcone','Ell','Poly']
+
+mu = 398600.4418 # GM, [km^3/s^2]
+Re = 6378.137 # Equatorial radius, [km]
+
+def satcat(n,seed=0):
+    """
+    Generate a synthetic satcat data frame with the columns of https://celestrak.org/pub/satcat.csv.
+
+    Inputs:
+        n -> [int] Number of objects
+        seed -> [int,optional,default=0] Seed of the random generator
+
+    Outputs:
+        df -> [pandas dataframe] Synthetic catalog
+    """
+    rng = np.random.default_rng(seed)
+    noradids = np.arange(1,n+1)
+
+    launch_days = rng.integers(0,24500,n)
+    launch_date = pd.Timestamp('1957-10-04') + pd.to_timedelta(launch_days,unit='D')
+    years = launch_date.year.to_numpy()
+    launch_numbers = rng.integers(1,250,n)
+    pieces = np.array(list('ABCDEFGHJKLMNPQRSTUVWXYZ'))[rng.integers(0,24,n)]
+    cospar = pd.Series(years).astype(str) + '-' + pd.Series(launch_numbers).astype(str).str.zfill(3) + pieces
+
+    # Mix of LEO, MEO, GEO, and HEO orbits
+    regime = rng.choice(4,size=n,p=[0.8,0.05,0.1,0.05])
+    perigee = np.select([regime == 0,regime == 1,regime == 2],[rng.uniform(150,2000,n),rng.uniform(2000,30000,n),rng.normal(35786,50,n)],rng.uniform(200,1000,n))
+    apogee = perigee + np.select([regime == 0,regime == 1,regime == 2],[rng.exponential(30,n),rng.exponential(500,n),rng.exponential(20,n)],rng.uniform(20000,40000,n))
+    perigee,apogee = perigee.round(0),apogee.round(0)
+    sma = (perigee + apogee)/2 + Re
+    period = (2*np.pi*np.sqrt(sma**3/mu)/60).round(2)
+    inclination = np.where(regime == 2,rng.uniform(0,15,n),rng.uniform(0,110,n)).round(2)
+
+    decayed = (regime == 0) & (rng.random(n) < 0.5)
+    decay_date = launch_date + pd.to_timedelta(rng.integers(1,5000,n),unit='D')
+    names = np.where(rng.random(n) < 0.15,['STARLINK-{:d}'.format(i) for i in noradids],np.where(rng.random(n) < 0.5,['COSMOS {:d} DEB'.format(i) for i in noradids],['OBJECT {:d}'.format(i) for i in noradids]))
+
+    df = pd.DataFrame({
+        'OBJECT_NAME':names,
+        'OBJECT_ID':cospar,
+        'NORAD_CAT_ID':noradids,
+        'OBJECT_TYPE':np.array(OBJECT_TYPES)[rng.integers(0,len(OBJECT_TYPES),n)],
+        'OPS_STATUS_CODE':np.where(decayed,'D',np.array(['+','-','P','B','S','X','?',''])[rng.integers(0,8,n)]),
+        'OWNER':np.array(OWNERS)[rng.integers(0,len(OWNERS),n)],
+        'LAUNCH_DATE':launch_date.strftime('%Y-%m-%d'),
+        'LAUNCH_SITE':np.array(LAUNCH_SITES)[rng.integers(0,len(LAUNCH_SITES),n)],
+        'DECAY_DATE':np.where(decayed,decay_date.strftime('%Y-%m-%d'),''),
+        'PERIOD':period,
+        'INCLINATION':inclination,
+        'APOGEE':apogee,
+        'PERIGEE':perigee,
+        'RCS':np.where(rng.random(n) < 0.6,rng.lognormal(0,1.5,n).round(4),np.nan),
+        'DATA_STATUS_CODE':np.where(rng.random(n) < 0.05,np.array(['NCE','NIE','NEA'])[rng.integers(0,3,n)],''),
+        'ORBIT_CENTER':np.where(rng.random(n) < 0.995,'EA','SU'),
+        'ORBIT_TYPE':np.where(decayed,'IMP','ORB'),
+        })
+    return df
+
+def write_satcat(n,filename,seed=0):
+    """
+    Write a synthetic satcat.csv file.
+    """
+    df = satcat(n,seed)
+    df.to_csv(filename,index=False)
+    return filename
+
+def write_qsmag(n,filename,seed=0,fraction=0.3):
+    """
+    Write a synthetic qs.mag file, which lists standard magnitudes in fixed-width fields of 5, 28, and 5 characters.
+
+    Inputs:
+        n -> [int] Number of objects in the accompanying catalog
+        filename -> [str] Path of the qs.mag file
+        seed -> [int,optional,default=0] Seed of the random generator
+        fraction -> [float,optional,default=0.3] Fraction of objects with a standard magnitude
+    """
+    rng = np.random.default_rng(seed+1)
+    noradids = np.sort(rng.choice(np.arange(1,min(n,99999)+1),size=int(min(n,99999)*fraction),replace=False))
+    mags = rng.uniform(-1,12,len(noradids))
+    with open(filename,'w') as f:
+        f.write('Synthetic qs.mag\n')
+        for noradid,mag in zip(noradids,mags):
+            f.write('{:5d}{:<28s}{:5.1f}\n'.format(noradid,' OBJECT {:d}'.format(noradid)[:28],mag))
+        f.write('end\n')
+    return filename
+
+def discos_objects(df_satcat,seed=0):
+    """
+    Generate DISCOSweb JSON:API resources of type 'object' for a synthetic catalog.
+
+    Inputs:
+        df_satcat -> [pandas dataframe] Synthetic catalog returned by satcat
+        seed -> [int,optional,default=0] Seed of the random generator
+
+    Outputs:
+        objects -> [list of dict] Resources with keys 'type', 'id', and 'attributes', in order of satno
+    """
+    rng = np.random.default_rng(seed+2)
+    n = len(df_satcat)
+    mass = rng.lognormal(3,2,n).round(2)
+    length,height,depth = rng.lognormal(0,1,(3,n)).round(2)
+    xsect_min = rng.lognormal(-1,1,n).round(4)
+    xsect_max = (xsect_min*rng.uniform(1,5,n)).round(4)
+    xsect_avg = ((xsect_min + xsect_max)/2).round(4)
+    classes = np.array(OBJECT_CLASSES)[rng.integers(0,len(OBJECT_CLASSES),n)]
+    shapes = np.array(SHAPES)[rng.integers(0,len(SHAPES),n)]
+    missing = rng.random(n) < 0.2
+
+    objects = []
+    for i,(name,cospar,satno) in enumerate(zip(df_satcat['OBJECT_NAME'],df_satcat['OBJECT_ID'],df_satcat['NORAD_CAT_ID'])):
+        attributes = {'height':None if missing[i] else float(height[i]),'xSectMax':float(xsect_max[i]),'name':name,'satno':int(satno),
+                      'objectClass':classes[i],'mass':None if missing[i] else float(mass[i]),'xSectMin':float(xsect_min[i]),
+                      'depth':None if missing[i] else float(depth[i]),'xSectAvg':float(xsect_avg[i]),'length':None if missing[i] else float(length[i]),
+                      'shape':None if missing[i] else shapes[i],'cosparId':cospar}
+        objects.append({'type':'object','id':str(i+1),'attributes':attributes})
+    return objects
+
+def _tle_checksum(line):
+    """
+    Compute the modulo-10 checksum of a TLE line.
+    """
+    return sum(int(c) if c.isdigit() else (1 if c == '-' else 0) for c in line[:68]) % 10
+
+def tle_lines(df_satcat,seed=0):
+    """
+    Generate two-line element sets for the objects still in orbit of a synthetic catalog.
+
+    Inputs:
+        df_satcat -> [pandas dataframe] Synthetic catalog returned by satcat
+        seed -> [int,optional,default=0] Seed of the random generator
+
+    Outputs:
+        tles -> [dict] Two lines of each object keyed by NORAD ID
+    """
+    rng = np.random.default_rng(seed+3)
+    on_orbit = df_satcat[df_satcat['OPS_STATUS_CODE'] != 'D']
+    n = len(on_orbit)
+    raan,argp,mean_anomaly = rng.uniform(0,360,(3,n))
+    epoch_day = rng.uniform(1,366,n)
+
+    tles = {}
+    for i,(satno,cospar,inc,apogee,perigee,period) in enumerate(zip(on_orbit['NORAD_CAT_ID'],on_orbit['OBJECT_ID'],on_orbit['INCLINATION'],on_orbit['APOGEE'],on_orbit['PERIGEE'],on_orbit['PERIOD'])):
+        ecc = (apogee - perigee)/(apogee + perigee + 2*Re)
+        mean_motion = 1440/period
+        designator = cospar[2:4] + cospar[5:]
+        line1 = '1 {:05d}U {:<8s} 24{:012.8f}  .00000000  00000-0  00000-0 0  999'.format(satno % 100000,designator,epoch_day[i])
+        line2 = '2 {:05d} {:8.4f} {:8.4f} {:07d} {:8.4f} {:8.4f} {:11.8f}    1'.format(satno % 100000,inc,raan[i],int(round(ecc*1e7)),argp[i],mean_anomaly[i],mean_motion)
+        tles[int(satno)] = [line1 + str(_tle_checksum(line1)),line2 + str(_tle_checksum(line2))]
+    return tles
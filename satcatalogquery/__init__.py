@@ -1,3 +1,13 @@
 from . import data_prepare
 from .classes import SatCatalog
-from .data_download import download_tle
\ No newline at end of file
+from .data_download import download_tle
+from .plane_index import PlaneIndex
+from .catalog_scan import CatalogScan
+from .instrumentation import instrument,StatsSink,ConsoleSink,LoggingSink,CallbackSink
+
+def __getattr__(name):
+    # The asyncio API is imported on first use, to keep the package import light
+    if name == 'download_tle_async':
+        from .query_async import download_tle_async
+        return download_tle_async
+    raise AttributeError("module 'satcatalogquery' has no attribute '{:s}'".format(name))
@@ -0,0 +1,125 @@
+import pandas as pd
+
+from .instrumentation import instrument
+
+# Key of the schema metadata recording the mode of the catalog, such as 'celestrak_catalog'
+MODE_KEY = b'satcatalogquery.mode'
+
+# Formats of Arrow IPC
+IPC_FORMATS = ['file','stream']
+
+def _pyarrow():
+    """
+    Import pyarrow on first use, since it is an optional dependency.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        raise Exception("pyarrow is required for Arrow export and import; install it with 'pip install satcatalogquery[columnar]'.")
+    return pa
+
+def _nullable_types(pa):
+    """
+    Map the integer types of Arrow to the nullable integer dtypes of pandas, so that integer columns with nulls are not converted to float64.
+    """
+    return {pa.int8():pd.Int8Dtype(),pa.int16():pd.Int16Dtype(),pa.int32():pd.Int32Dtype(),pa.int64():pd.Int64Dtype(),
+            pa.uint8():pd.UInt8Dtype(),pa.uint16():pd.UInt16Dtype(),pa.uint32():pd.UInt32Dtype(),pa.uint64():pd.UInt64Dtype()}.get
+
+def to_arrow(df,mode=None):
+    """
+    Convert a catalog data frame into an Arrow table.
+    Text columns stored with pyarrow, and numeric columns without nulls, are shared with the data frame without copying.
+    Categoricals are converted to dictionary arrays, nullable integers to integer arrays with a validity bitmap, and datetime64 dates to timestamps.
+
+    Usage:
+        table = to_arrow(df,'celestrak_catalog')
+
+    Inputs:
+        df -> [pandas dataframe] Catalog data frame
+        mode -> [str,optional,default=None] Mode of the catalog, recorded in the schema metadata
+
+    Outputs:
+        table -> [pyarrow Table] Arrow table, whose schema metadata also records the pandas dtypes
+    """
+    pa = _pyarrow()
+    with instrument.span('arrow_export'):
+        table = pa.Table.from_pandas(df,preserve_index=False)
+        if mode is not None:
+            metadata = dict(table.schema.metadata or {})
+            metadata[MODE_KEY] = mode.encode()
+            table = table.replace_schema_metadata(metadata)
+    return table
+
+def from_arrow(table):
+    """
+    Convert an Arrow table into a catalog data frame.
+    Tables written by to_arrow recover their pandas dtypes from the schema metadata; for tables from other producers, integer columns are read as nullable integers.
+    Text columns, and numeric columns without nulls, are shared with the table without copying.
+
+    Usage:
+        df,mode = from_arrow(table)
+
+    Inputs:
+        table -> [pyarrow Table or RecordBatch] Arrow table
+
+    Outputs:
+        df -> [pandas dataframe] Catalog data frame
+        mode -> [str] Mode of the catalog recorded in the schema metadata, or None
+    """
+    pa = _pyarrow()
+    metadata = table.schema.metadata or {}
+    types_mapper = None if b'pandas' in metadata else _nullable_types(pa)
+    with instrument.span('arrow_import'):
+        # split_blocks keeps one block per column, so that columns are not consolidated into copied 2D blocks
+        df = table.to_pandas(split_blocks=True,types_mapper=types_mapper)
+    mode = metadata.get(MODE_KEY)
+    return df,(mode.decode() if mode is not None else None)
+
+def write_ipc(table,sink,format='file'):
+    """
+    Write an Arrow table in the Arrow IPC format.
+
+    Usage:
+        write_ipc(table,'catalog.arrow')
+        write_ipc(table,sys.stdout.buffer,format='stream')
+
+    Inputs:
+        table -> [pyarrow Table] Arrow table
+        sink -> [str or file-like object] Path or writable binary stream
+        format -> [str,optional,default='file'] 'file' for the random-access file format, which can be memory-mapped by readers, or 'stream' for the streaming format, such as for pipes and sockets
+
+    Outputs:
+        sink -> [str or file-like object] The given sink
+    """
+    pa = _pyarrow()
+    if format not in IPC_FORMATS: raise Exception("The IPC format should be in ['file','stream'].")
+    new_writer = pa.ipc.new_file if format == 'file' else pa.ipc.new_stream
+    with instrument.span('arrow_write'):
+        with new_writer(sink,table.schema) as writer:
+            writer.write_table(table)
+    return sink
+
+def read_ipc(source):
+    """
+    Read an Arrow table in either of the Arrow IPC formats.
+    A file path is memory-mapped, so that the columns of the table refer to the mapped file without copying.
+
+    Usage:
+        table = read_ipc('catalog.arrow')
+
+    Inputs:
+        source -> [str, bytes, or file-like object] Path, buffer, or readable binary stream
+
+    Outputs:
+        table -> [pyarrow Table] Arrow table
+    """
+    pa = _pyarrow()
+    if type(source) is str: source = pa.memory_map(source,'r')
+    with instrument.span('arrow_read'):
+        try:
+            table = pa.ipc.open_file(source).read_all()
+        except pa.ArrowInvalid: # not the file format, so read it as a stream
+            if hasattr(source,'seek'): source.seek(0)
+            table = pa.ipc.open_stream(source).read_all()
+    return table
@@ -0,0 +1,104 @@
+from os import cpu_count,makedirs,path
+
+# Catalog shared by all plot specs rendered in a worker process
+_worker_catalog = None
+
+def _init_worker(df):
+    """
+    Initialize a worker process with a non-interactive backend and the catalog to render.
+    The catalog is sent once per worker instead of once per plot spec.
+    """
+    global _worker_catalog
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from .classes import SatCatalog
+    _worker_catalog = SatCatalog.__new__(SatCatalog)
+    _worker_catalog.df = df # already compacted by the parent catalog
+
+def _render_spec(satcatalog,spec,dir_fig=None):
+    """
+    Render one plot spec with a catalog.
+
+    Inputs:
+        satcatalog -> instance of class SatCatalog
+        spec -> [dict] Plot spec with key 'kind' in ['hist1d','hist2d','pie'], and the remaining keys passed to the corresponding method of SatCatalog,
+        for example, {'kind':'hist2d','x':'MEAN_ALT','y':'INCLINATION','num_bins':100}
+        dir_fig -> [str,optional,default=None] Path to save the figure if the spec does not set 'dir_fig'
+
+    Outputs:
+        file_fig -> [str] Path of the figure
+    """
+    spec = dict(spec)
+    kind = spec.pop('kind',None)
+    if kind not in ['hist1d','hist2d','pie']:
+        raise Exception("The kind of a plot spec should be in ['hist1d','hist2d','pie'].")
+    if dir_fig is not None: spec.setdefault('dir_fig',dir_fig)
+    return getattr(satcatalog,kind)(**spec)
+
+def _file_fig(spec,dir_fig=None):
+    """
+    Path of the figure a plot spec is saved to, named as by the corresponding method of SatCatalog.
+    """
+    kind = spec.get('kind')
+    if kind not in ['hist1d','hist2d','pie']:
+        raise Exception("The kind of a plot spec should be in ['hist1d','hist2d','pie'].")
+    dir_fig = spec.get('dir_fig',dir_fig or 'satcatalogs/')
+    if kind == 'hist2d':
+        name = '{:s}-{:s}'.format(spec['x'],spec['y'])
+    elif kind == 'hist1d':
+        xs = spec['xs']
+        name = '_'.join(xs) if type(xs) is list else xs
+    else:
+        name = spec['x']
+    return dir_fig + name + '.png'
+
+def _render_in_worker(spec,dir_fig):
+    """
+    Render one plot spec with the catalog of the worker process.
+    """
+    return _render_spec(_worker_catalog,spec,dir_fig)
+
+def render_batch(satcatalog,specs,processes=None,dir_fig=None):
+    """
+    Render a batch of plot specs of a catalog in a process pool.
+
+    Usage:
+        files_fig = render_batch(satcatalog,[{'kind':'hist1d','xs':'RCSAvg'},{'kind':'pie','x':'OWNER','cutoff':100}])
+
+    Inputs:
+        satcatalog -> instance of class SatCatalog
+        specs -> [list of dict] Plot specs, each of which has the key 'kind' in ['hist1d','hist2d','pie'], and the remaining keys passed to the corresponding method of SatCatalog; specs saved to the same file raise an exception
+        processes -> [int,optional,default=None] Number of worker processes; if None, it is the smaller of the number of CPU cores and the number of specs; if 1, the specs are rendered in the current process
+        dir_fig -> [str,optional,default=None] Path to save the figures if a spec does not set 'dir_fig'
+
+    Outputs:
+        files_fig -> [list of str] Paths of the figures in the order of specs
+    """
+    specs = list(specs)
+    if not specs: return []
+
+    # Specs saved to the same file would overwrite each other, and race to do so in the workers
+    files_fig = {}
+    for k,spec in enumerate(specs):
+        file_fig = path.abspath(_file_fig(spec,dir_fig))
+        if file_fig in files_fig:
+            raise Exception('The plot specs {:d} and {:d} are both saved to {:s}; set a different dir_fig for one of them.'.format(files_fig[file_fig],k,file_fig))
+        files_fig[file_fig] = k
+
+    if processes is None: processes = min(cpu_count() or 1,len(specs))
+
+    # Create the output directories up front, so that workers do not race to create them
+    for spec in specs:
+        makedirs(spec.get('dir_fig',dir_fig or 'satcatalogs/'),exist_ok=True)
+
+    if processes == 1:
+        return [_render_spec(satcatalog,spec,dir_fig) for spec in specs]
+
+    from concurrent.futures import ProcessPoolExecutor # Imported here to keep the package import light
+
+    with ProcessPoolExecutor(max_workers=processes,initializer=_init_worker,initargs=(satcatalog.df,)) as executor:
+        files_fig = list(executor.map(_render_in_worker,specs,[dir_fig]*len(specs)))
+
+    return files_fig
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+def _noradid_array(df):
+    """
+    Extract NORAD IDs of a catalog data frame as an int64 array, rows without NORAD ID are marked as -1.
+    """
+    return pd.to_numeric(df['NORAD_ID'],errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+
+def _column_change(a,b,tol=0):
+    """
+    Compare two aligned columns element by element.
+
+    Inputs:
+        a -> [pandas series] Values in the old catalog
+        b -> [pandas series] Values in the new catalog
+        tol -> [float,optional,default=0] Absolute tolerance for numeric columns
+
+    Outputs:
+        changed -> [array of bool] True where the value changed; two missing values are considered equal
+    """
+    a_na,b_na = a.isna().to_numpy(),b.isna().to_numpy()
+    both_valid = ~(a_na | b_na)
+
+    if pd.api.types.is_numeric_dtype(a.dtype) and pd.api.types.is_numeric_dtype(b.dtype) and not pd.api.types.is_bool_dtype(a.dtype):
+        x = a.to_numpy(dtype=np.float64,na_value=np.nan)
+        y = b.to_numpy(dtype=np.float64,na_value=np.nan)
+        differ = np.zeros(len(x),dtype=bool)
+        differ[both_valid] = np.abs(x[both_valid] - y[both_valid]) > tol
+    elif pd.api.types.is_datetime64_any_dtype(a.dtype) and pd.api.types.is_datetime64_any_dtype(b.dtype):
+        x = a.to_numpy(dtype='datetime64[s]')
+        y = b.to_numpy(dtype='datetime64[s]')
+        differ = x != y
+    else:
+        x = a.to_numpy(dtype=object)
+        y = b.to_numpy(dtype=object)
+        differ = np.zeros(len(x),dtype=bool)
+        differ[both_valid] = x[both_valid] != y[both_valid]
+
+    return (differ & both_valid) | (a_na != b_na)
+
+def _catalog_diff(df_old,df_new,columns=None,tol=None):
+    """
+    Compare two snapshots of a space objects catalog by a sorted merge-join on NORAD_ID.
+
+    Usage:
+        diff = _catalog_diff(df_old,df_new,tol={'APOGEE':1,'PERIGEE':1})
+
+    Inputs:
+        df_old -> [pandas dataframe] Earlier snapshot of the catalog
+        df_new -> [pandas dataframe] Later snapshot of the catalog
+        columns -> [list of str,optional,default=None] Columns to compare; if None, all columns common to both snapshots are compared
+        tol -> [float or dict,optional,default=None] Absolute tolerance for numeric columns; a float applies to all numeric columns, and a dict such as {'APOGEE':1.0,'RCS':0.1} applies to the listed columns only.
+        If None, numeric values must match exactly.
+
+    Outputs:
+        diff -> [dict] Dictionary with the following keys
+            'added' -> [pandas dataframe] Objects present only in df_new
+            'removed' -> [pandas dataframe] Objects present only in df_old
+            'changed' -> [pandas dataframe] Objects present in both snapshots with at least one changed column, taken from df_new
+            'masks' -> [pandas dataframe] Boolean change masks indexed by NORAD_ID, aligned with 'changed', with one column per compared column
+    """
+    ids_old,ids_new = _noradid_array(df_old),_noradid_array(df_new)
+    if len(np.unique(ids_old[ids_old >= 0])) < np.count_nonzero(ids_old >= 0) or len(np.unique(ids_new[ids_new >= 0])) < np.count_nonzero(ids_new >= 0):
+        raise Exception('NORAD_ID must be unique in both catalogs to compare them.')
+
+    # Sort both snapshots by NORAD_ID, then merge-join the sorted keys
+    order_old = np.argsort(ids_old,kind='stable')
+    order_new = np.argsort(ids_new,kind='stable')
+    sorted_old,sorted_new = ids_old[order_old],ids_new[order_new]
+    order_old,sorted_old = order_old[sorted_old >= 0],sorted_old[sorted_old >= 0]
+    order_new,sorted_new = order_new[sorted_new >= 0],sorted_new[sorted_new >= 0]
+
+    pos = np.searchsorted(sorted_old,sorted_new)
+    pos_clip = np.minimum(pos,len(sorted_old)-1) if len(sorted_old) else pos
+    in_old = (pos < len(sorted_old)) & (sorted_old[pos_clip] == sorted_new) if len(sorted_old) else np.zeros(len(sorted_new),dtype=bool)
+    common_new = order_new[in_old]
+    common_old = order_old[pos[in_old]]
+
+    in_new = np.zeros(len(sorted_old),dtype=bool)
+    in_new[pos[in_old]] = True
+
+    added = df_new.iloc[order_new[~in_old]].reset_index(drop=True)
+    removed = df_old.iloc[order_old[~in_new]].reset_index(drop=True)
+
+    # Compare column by column, so that only one pair of aligned columns is materialized at a time
+    if columns is None:
+        columns = [column for column in df_new.columns if column in df_old.columns and column != 'NORAD_ID']
+
+    masks = {}
+    for column in columns:
+        if type(tol) is dict:
+            column_tol = tol.get(column,0)
+        elif tol is None:
+            column_tol = 0
+        else:
+            column_tol = tol
+        a = df_old[column].iloc[common_old].reset_index(drop=True)
+        b = df_new[column].iloc[common_new].reset_index(drop=True)
+        masks[column] = _column_change(a,b,column_tol)
+
+    noradids = sorted_new[in_old]
+    masks = pd.DataFrame(masks,index=pd.Index(noradids,name='NORAD_ID'))
+    changed_flag = masks.any(axis=1).to_numpy()
+
+    changed = df_new.iloc[common_new[changed_flag]].reset_index(drop=True)
+    masks = masks[changed_flag]
+
+    return {'added':added,'removed':removed,'changed':changed,'masks':masks}
@@ -0,0 +1,446 @@
+import io
+import csv
+import glob
+import pickle
+import inspect
+import tempfile
+import numpy as np
+import pandas as pd
+from os import path,cpu_count
+from collections import deque
+
+from .query import _prepare_satcat,_celestrak_select,_sort_key
+from .orbit_derive import DERIVED_COLUMNS,derive_orbit_columns
+from .data_compact import NUMERIC_COLUMNS
+from .catalog_stats import _numeric_values,_to_edges
+from .instrumentation import instrument
+
+# Number of rows of the catalog read per batch
+BATCH_ROWS = 100000
+
+# Number of rows per block of the sorted runs spilled to disk; the merge holds one block of each run in memory
+MERGE_ROWS = 8192
+
+# Kinds of aggregations of CatalogScan.aggregate
+AGGREGATE_KINDS = ['count','frequency','hist1d','hist2d','describe']
+
+# Options of _celestrak_select accepted as constraints of a scan
+SCAN_CONSTRAINTS = [name for name in inspect.signature(_celestrak_select).parameters if name not in ['data','sort','names','launches']]
+
+def _source_files(sources):
+    """
+    Expand the paths and glob patterns of the sources into the list of files.
+    """
+    if type(sources) is str: sources = [sources]
+    files = []
+    for source in sources:
+        matched = sorted(glob.glob(source))
+        if not matched: raise Exception('No catalog file matches {:s}.'.format(source))
+        files += matched
+    return files
+
+def _source_format(filename):
+    """
+    Format of a source file by its extension: 'csv', 'parquet', or 'ipc' for the Arrow IPC file format.
+    """
+    extension = path.splitext(filename)[1].lower()
+    if extension == '.csv': return 'csv'
+    if extension in ['.parquet','.pq']: return 'parquet'
+    return 'ipc'
+
+def _csv_pieces(filename,batch_rows):
+    """
+    Split a CSV file into byte ranges of about batch_rows lines each, cut at line ends, so that the pieces can be parsed independently.
+    The row size is estimated from the first lines; records are assumed not to span lines, as in the satcat.
+    """
+    size = path.getsize(filename)
+    with open(filename,'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        start = f.tell()
+        sample = [len(line) for _,line in zip(range(1000),f)]
+        step = max(int(np.mean(sample)*batch_rows),1) if sample else size
+
+        pieces = []
+        while start < size:
+            f.seek(min(start + step,size))
+            f.readline() # move on to the end of the line
+            end = min(f.tell(),size)
+            pieces.append(('csv',filename,header,start,end))
+            start = end
+    return pieces
+
+def _ipc_pieces(filename,batch_rows):
+    """
+    Split the record batches of an Arrow IPC file into slices of batch_rows rows.
+    """
+    from .arrow_interop import _pyarrow
+    pa = _pyarrow()
+    reader = pa.ipc.open_file(pa.memory_map(filename,'r'))
+    pieces = []
+    for i in range(reader.num_record_batches):
+        num_rows = reader.get_batch(i).num_rows
+        pieces += [('ipc',filename,i,offset,batch_rows) for offset in range(0,num_rows,batch_rows)]
+    return pieces
+
+def _parquet_pieces(filename):
+    """
+    Split a Parquet file into its row groups.
+    """
+    from .arrow_interop import _pyarrow
+    _pyarrow()
+    import pyarrow.parquet as pq
+    return [('parquet',filename,i) for i in range(pq.ParquetFile(filename).num_row_groups)]
+
+def _plan(files,batch_rows):
+    pieces = []
+    for filename in files:
+        form = _source_format(filename)
+        if form == 'csv':
+            pieces += _csv_pieces(filename,batch_rows)
+        elif form == 'parquet':
+            pieces += _parquet_pieces(filename)
+        else:
+            pieces += _ipc_pieces(filename,batch_rows)
+    return pieces
+
+def _read_piece(piece):
+    """
+    Read a piece of a source file into a data frame in the form of the satcat loaded by _load_satcat.
+    """
+    form,filename = piece[:2]
+    if form == 'csv':
+        header,start,end = piece[2:]
+        with open(filename,'rb') as f:
+            f.seek(start)
+            raw = f.read(end - start)
+        # Fix the dtypes of the text columns, which a piece with no values in them would read as float
+        dtype = {name:'str' for name in header if name not in NUMERIC_COLUMNS + ['NORAD_CAT_ID','NORAD_ID']}
+        data = pd.read_csv(io.BytesIO(raw),header=None,names=header,dtype=dtype)
+    else:
+        from .arrow_interop import _pyarrow,from_arrow
+        pa = _pyarrow()
+        if form == 'parquet':
+            import pyarrow.parquet as pq
+            table = pq.ParquetFile(filename).read_row_group(piece[2])
+        else:
+            i,offset,length = piece[2:]
+            table = pa.ipc.open_file(pa.memory_map(filename,'r')).get_batch(i).slice(offset,length)
+        data,mode = from_arrow(table)
+
+    if 'NORAD_CAT_ID' in data.columns or 'OBJECT_ID' in data.columns: return _prepare_satcat(data)
+    if not set(DERIVED_COLUMNS + ['MEAN_ALT','ECC']).issubset(data.columns): data = derive_orbit_columns(data)
+    return data
+
+def _select_piece(piece,constraints):
+    data = _read_piece(piece)
+    return _celestrak_select(data,**constraints).reset_index(drop=True),len(data)
+
+def _key_values(series):
+    """
+    Values of a sort column comparable across blocks, whose categoricals may have different categories.
+    """
+    if isinstance(series.dtype,pd.CategoricalDtype): series = series.astype(series.cat.categories.dtype)
+    return series
+
+def _write_run(df,run_file):
+    with open(run_file,'wb') as f:
+        for k in range(0,len(df),MERGE_ROWS):
+            pickle.dump(df.iloc[k:k + MERGE_ROWS],f,protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_run(run_file):
+    with open(run_file,'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def _scan_task(task,piece,constraints,args):
+    """
+    Process one piece of the sources in the current process or in a worker process.
+
+    Inputs:
+        task -> [str] 'select' to return the selected rows; 'run' to sort them into a run file, with the rows missing the sort key in another; 'aggregate' to return the partial aggregates
+        piece -> [tuple] Piece of a source file planned by _plan
+        constraints -> [dict] Constraints of _celestrak_select
+        args -> Sort and run files for 'run', or the aggregation specs for 'aggregate'
+    """
+    df,num_rows = _select_piece(piece,constraints)
+    if task == 'select': return df,num_rows
+
+    if task == 'run':
+        sort,run_file,null_file = args
+        column,ascending = _sort_key(sort)
+        missing = df[column].isna().to_numpy()
+        _write_run(df[~missing].sort_values(by=[column],ascending=ascending,kind='stable'),run_file)
+        _write_run(df[missing],null_file)
+        return len(df),num_rows
+
+    return [_partial(df,spec) for spec in args],num_rows
+
+def _partial(df,spec):
+    """
+    Partial aggregate of a batch, which is merged across batches by _merge.
+    """
+    kind = spec['kind']
+    if kind == 'count': return len(df)
+    if kind == 'frequency': return df[spec['x']].value_counts(dropna=True)
+    if kind == 'hist1d':
+        values,is_date = _numeric_values(df[spec['x']])
+        return np.histogram(values[np.isfinite(values)],spec['edges'])[0]
+    if kind == 'hist2d':
+        x_values,_ = _numeric_values(df[spec['x']])
+        y_values,_ = _numeric_values(df[spec['y']])
+        valid = np.isfinite(x_values) & np.isfinite(y_values)
+        return np.histogram2d(x_values[valid],y_values[valid],bins=[spec['xedges'],spec['yedges']])[0].astype(np.int64)
+
+    # 'describe' and the range of the columns to bin: count, mean, sum of squared deviations, min, and max
+    values,is_date = _numeric_values(df[spec['x']])
+    values = values[np.isfinite(values)]
+    if not len(values): return (0,0.0,0.0,np.inf,-np.inf,is_date)
+    mean = values.mean()
+    return (len(values),mean,((values - mean)**2).sum(),values.min(),values.max(),is_date)
+
+def _merge(kind,a,b):
+    if kind in ['count','hist1d','hist2d']: return a + b
+    if kind == 'frequency': return a.add(b,fill_value=0)
+    # Combine the moments of two parts by the parallel algorithm of Chan et al.
+    n_a,mean_a,m2_a,min_a,max_a,is_date = a
+    n_b,mean_b,m2_b,min_b,max_b,_ = b
+    n = n_a + n_b
+    if n == 0: return a
+    delta = mean_b - mean_a
+    return (n,mean_a + delta*n_b/n,m2_a + m2_b + delta**2*n_a*n_b/n,min(min_a,min_b),max(max_a,max_b),is_date)
+
+def _is_date_range(limits):
+    return limits is not None and isinstance(limits[0],(str,pd.Timestamp,np.datetime64))
+
+def _bin_edges(bounds,num_bins,limits):
+    """
+    Bin edges of a column over the given range, or over the range found by the scan, in seconds since 1970-01-01 for dates.
+    """
+    if limits is not None:
+        lo,hi = limits
+        if _is_date_range(limits): lo,hi = [pd.Timestamp(limit).timestamp() for limit in (lo,hi)]
+        return np.histogram_bin_edges([],num_bins,(float(lo),float(hi)))
+    n,mean,m2,lo,hi,is_date = bounds
+    if not n: lo,hi = 0.0,1.0
+    return np.histogram_bin_edges(np.array([lo,hi]),num_bins)
+
+def _empty(task):
+    """
+    Aggregate of no rows.
+    """
+    kind = task['kind']
+    if kind == 'count': return 0
+    if kind == 'frequency': return pd.Series(dtype=np.int64)
+    if kind == 'hist1d': return np.zeros(len(task['edges']) - 1,dtype=np.int64)
+    if kind == 'hist2d': return np.zeros((len(task['xedges']) - 1,len(task['yedges']) - 1),dtype=np.int64)
+    return (0,0.0,0.0,np.inf,-np.inf,False)
+
+def _bounded_map(executor,func,items,window):
+    """
+    Map func over items in order, with at most window items in progress, so that results waiting to be consumed do not pile up.
+    """
+    items = iter(items)
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func,*item))
+        if len(pending) >= window: break
+    while pending:
+        result = pending.popleft().result()
+        for item in items:
+            pending.append(executor.submit(func,*item))
+            break
+        yield result
+
+class CatalogScan(object):
+    """
+    class of CatalogScan, an out-of-core scan of satcat files too large to be loaded at once, such as archived snapshots and synthetic populations in the same schema.
+
+    The sources are split into pieces of about batch_rows rows, which are read and filtered one at a time, or in a process pool.
+    The selected rows are yielded batch by batch, or sorted with an external merge sort through runs spilled to a temporary directory, and aggregations are accumulated from partial aggregates of the batches,
+    so the memory is bounded by the batch size rather than by the size of the sources.
+
+    Usage:
+        scan = CatalogScan(['archive/satcat-*.csv','debris-10M.arrow'],DECAYED=False,MEAN_ALT=[400,900])
+
+    Inputs:
+        sources -> [str or list of str] Paths or glob patterns of the sources: satcat CSV files, Arrow IPC files such as written by SatCatalog.to_ipc, or Parquet files, split by row groups
+        batch_rows -> [int,optional,default=100000] Number of rows per batch
+        processes -> [int,optional,default=1] Number of worker processes; if None, the number of CPU cores; if 1, the batches are processed in the current process
+        constraints -> Same options as celestrak_query except as_of and sort, such as DECAYED=False and where='ECC < 0.01'
+
+    Methods:
+        select -> Yield the selected objects in batches, in order of sort.
+        aggregate -> Aggregate the selected objects.
+    """
+
+    def __init__(self,sources,batch_rows=BATCH_ROWS,processes=1,**constraints):
+        unknown = set(constraints) - set(SCAN_CONSTRAINTS)
+        if unknown: raise Exception('Unknown constraints {:s}; available options are those of celestrak_query except as_of and sort.'.format(str(sorted(unknown))))
+        self.files = _source_files(sources)
+        self.batch_rows = batch_rows
+        self.processes = processes or cpu_count() or 1
+        self.constraints = constraints
+        self.pieces = _plan(self.files,batch_rows)
+
+    def __repr__(self):
+
+        return 'instance of class CatalogScan'
+
+    def _map(self,task,args_of):
+        """
+        Run a task over the pieces in order, yielding the results with progress and row counts.
+        """
+        items = [(task,piece,self.constraints,args_of(k)) for k,piece in enumerate(self.pieces)]
+        if self.processes == 1 or len(items) < 2:
+            results = (_scan_task(*item) for item in items)
+            yield from self._counted(results,len(items))
+            return
+        from concurrent.futures import ProcessPoolExecutor # Imported here to keep the package import light
+
+        with ProcessPoolExecutor(max_workers=min(self.processes,len(items))) as executor:
+            yield from self._counted(_bounded_map(executor,_scan_task,items,2*self.processes),len(items))
+
+    def _counted(self,results,total):
+        for j,(result,num_rows) in enumerate(results,1):
+            instrument.progress('scan_batch',j,total)
+            instrument.count('rows',num_rows,source='scan')
+            yield result
+
+    def select(self,sort=None):
+        """
+        Yield the selected objects in batches, in order of sort.
+
+        Usage:
+            for df in scan.select(sort='-MEAN_ALT'):
+                ...
+            df = pd.concat(scan.select(sort=False))
+
+        Inputs:
+            sort -> [str or bool,optional,default=None] Same as the sort of celestrak_query, and objects missing the sort attribute come last;
+            if False, the batches are yielded in order of the sources without sorting, which spills nothing to disk.
+
+        Outputs:
+            batches -> [generator of pandas dataframe] Selected objects in batches with the columns of celestrak_query
+        """
+        if sort is False:
+            with instrument.span('scan_select'):
+                for df in self._map('select',lambda k: None):
+                    if len(df): yield df
+            return
+
+        column,ascending = _sort_key(sort)
+        with tempfile.TemporaryDirectory(prefix='satcatalogquery-scan-') as tmpdir:
+            runs = [(path.join(tmpdir,'{:d}.run'.format(k)),path.join(tmpdir,'{:d}.null'.format(k))) for k in range(len(self.pieces))]
+            with instrument.span('scan_sort_runs'):
+                counts = list(self._map('run',lambda k: (sort,) + runs[k]))
+            with instrument.span('scan_merge'):
+                yield from _merge_runs([run for (run,null),count in zip(runs,counts) if count],column,ascending)
+                for run,null in runs:
+                    for block in _read_run(null):
+                        if len(block): yield block
+
+    def aggregate(self,specs):
+        """
+        Aggregate the selected objects from partial aggregates of the batches.
+
+        Usage:
+            count,freq,(counts,edges) = scan.aggregate([{'kind':'count'},{'kind':'frequency','x':'OWNER'},{'kind':'hist1d','x':'MEAN_ALT','range':[0,2000]}])
+
+        Inputs:
+            specs -> [list of dict] Aggregations, each of which has the key 'kind' in ['count','frequency','hist1d','hist2d','describe'] and the keys
+                count -> no other keys
+                frequency -> 'x', the column name
+                hist1d -> 'x', and optional 'num_bins'(default 50) and 'range', such as [0,2000]; if range is not given, it is found by an extra scan
+                hist2d -> 'x' and 'y', and optional 'num_bins'(default 50) and 'range', such as [[0,2000],[0,180]]
+                describe -> 'x', the column name
+
+        Outputs:
+            results -> [list] Results in the order of specs; an int for count, a pandas series of counts in descending order for frequency,
+            (counts,edges) for hist1d, (counts,xedges,yedges) for hist2d, and a pandas series with 'count', 'mean', 'std', 'min', and 'max' for describe
+        """
+        specs = [dict(spec) for spec in specs]
+        for spec in specs:
+            if spec.get('kind') not in AGGREGATE_KINDS: raise Exception("The kind of an aggregation should be in ['count','frequency','hist1d','hist2d','describe'].")
+
+        # Find the ranges of the columns to bin that are not given by an extra scan
+        bounds = {}
+        for spec in specs:
+            limits = spec.get('range')
+            if spec['kind'] == 'hist1d' and limits is None: bounds[spec['x']] = None
+            if spec['kind'] == 'hist2d':
+                limits = limits or [None,None]
+                if limits[0] is None: bounds[spec['x']] = None
+                if limits[1] is None: bounds[spec['y']] = None
+        if bounds: bounds = dict(zip(bounds,self._aggregate([{'kind':'describe','x':x} for x in bounds])))
+
+        tasks,dates = [],[]
+        for spec in specs:
+            task = {'kind':spec['kind']}
+            num_bins = spec.get('num_bins',50)
+            if spec['kind'] in ['frequency','hist1d','describe']: task['x'] = spec['x']
+            if spec['kind'] == 'hist1d':
+                limits = spec.get('range')
+                task['edges'] = _bin_edges(bounds.get(spec['x']),num_bins,limits)
+                dates.append([_is_date_range(limits) if limits is not None else bounds[spec['x']][-1]])
+            elif spec['kind'] == 'hist2d':
+                limits = spec.get('range') or [None,None]
+                task.update(x=spec['x'],y=spec['y'],xedges=_bin_edges(bounds.get(spec['x']),num_bins,limits[0]),yedges=_bin_edges(bounds.get(spec['y']),num_bins,limits[1]))
+                dates.append([_is_date_range(limits[0]) if limits[0] is not None else bounds[spec['x']][-1],
+                              _is_date_range(limits[1]) if limits[1] is not None else bounds[spec['y']][-1]])
+            else:
+                dates.append(None)
+            tasks.append(task)
+
+        results = []
+        for task,is_date,result in zip(tasks,dates,self._aggregate(tasks)):
+            kind = task['kind']
+            if kind == 'frequency':
+                result = result.astype(np.int64).rename_axis(task['x']).rename('fre')
+                result = result[result > 0].sort_values(ascending=False,kind='stable')
+            elif kind == 'hist1d':
+                result = (result,_to_edges(task['edges'],is_date[0]))
+            elif kind == 'hist2d':
+                result = (result,_to_edges(task['xedges'],is_date[0]),_to_edges(task['yedges'],is_date[1]))
+            elif kind == 'describe':
+                n,mean,m2,lo,hi,is_date = result
+                summary = {'count':n,'mean':mean,'std':np.sqrt(m2/(n - 1)) if n > 1 else np.nan,'min':lo,'max':hi} if n else {'count':0,'mean':np.nan,'std':np.nan,'min':np.nan,'max':np.nan}
+                if is_date and n:
+                    summary.update(mean=pd.to_datetime(mean,unit='s'),std=pd.to_timedelta(summary['std'],unit='s'),min=pd.to_datetime(lo,unit='s'),max=pd.to_datetime(hi,unit='s'))
+                result = pd.Series(summary,name=task['x'],dtype=object if is_date else float)
+            results.append(result)
+        return results
+
+    def _aggregate(self,tasks):
+        merged = None
+        with instrument.span('scan_aggregate'):
+            for partials in self._map('aggregate',lambda k: tasks):
+                merged = partials if merged is None else [_merge(task['kind'],a,b) for task,a,b in zip(tasks,merged,partials)]
+        if merged is None: merged = [_empty(task) for task in tasks]
+        return merged
+
+def _merge_runs(run_files,column,ascending):
+    """
+    Merge sorted runs block by block. All rows up to the smallest of the last keys of the blocks in memory are in their final order,
+    so they are emitted, and the run whose block is used up reads its next block.
+    """
+    runs = [_read_run(run_file) for run_file in run_files]
+    blocks = [next(run,None) for run in runs]
+    while True:
+        active = [k for k,block in enumerate(blocks) if block is not None]
+        if not active: return
+        lasts = [_key_values(blocks[k][column]).iloc[-1] for k in active]
+        bound = min(lasts) if ascending else max(lasts)
+
+        parts = []
+        for k in active:
+            keys = _key_values(blocks[k][column])
+            taken = int(((keys <= bound) if ascending else (keys >= bound)).sum()) # a prefix, as the block is sorted
+            parts.append(blocks[k].iloc[:taken])
+            blocks[k] = blocks[k].iloc[taken:] if taken < len(blocks[k]) else next(runs[k],None)
+
+        merged = pd.concat(parts,ignore_index=True)
+        merged[column] = _key_values(merged[column])
+        yield merged.sort_values(by=[column],ascending=ascending,kind='stable').reset_index(drop=True)
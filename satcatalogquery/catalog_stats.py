@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+def _numeric_values(series):
+    """
+    Convert a column to a float64 array for binning; dates are converted to seconds since 1970-01-01.
+
+    Outputs:
+        values -> [array of float] Values of the column, missing values are NaN
+        is_date -> [bool] Whether the column holds dates
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        is_date = True
+    elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        series = pd.to_datetime(series,errors='coerce')
+        is_date = True
+    else:
+        is_date = False
+
+    if is_date:
+        values = series.to_numpy(dtype='datetime64[s]').astype(np.int64).astype(np.float64)
+        values[series.isna().to_numpy()] = np.nan
+    else:
+        values = pd.to_numeric(series,errors='coerce').to_numpy(dtype=np.float64,na_value=np.nan)
+    return values,is_date
+
+def _to_edges(edges,is_date):
+    """
+    Convert bin edges back to datetime64 for date columns.
+    """
+    if is_date: return edges.astype(np.int64).astype('datetime64[s]')
+    return edges
+
+class CatalogStats(object):
+    """
+    class of CatalogStats, a numeric aggregation layer of a space objects catalog independent of the plotting.
+    Bin edges and aggregates are cached per column, so repeated statistics cost only a dictionary lookup.
+
+    Methods:
+        bin_edges -> Compute the bin edges of a column.
+        hist1d -> Count objects in bins of a column.
+        hist2d -> Count objects in bins of two columns.
+        frequency -> Count objects in groups of a column.
+        clear -> Clear the cached aggregates.
+    """
+
+    def __init__(self,df):
+        self.df = df
+        self._cache = {}
+
+    def __repr__(self):
+
+        return 'instance of class CatalogStats'
+
+    def clear(self):
+        """
+        Clear the cached aggregates.
+
+        Usage:
+            catalogstats.clear()
+        """
+        self._cache.clear()
+
+    def _values(self,x):
+        """
+        Get the cached float64 values of a column.
+        """
+        key = ('values',x)
+        if key not in self._cache:
+            self._cache[key] = _numeric_values(self.df[x])
+        return self._cache[key]
+
+    def bin_edges(self,x,num_bins=50):
+        """
+        Compute the bin edges of a column.
+
+        Usage:
+            edges = catalogstats.bin_edges('MEAN_ALT')
+
+        Inputs:
+            x -> [str] Column name
+            num_bins -> [int,optional,default=50] The number of bins
+
+        Outputs:
+            edges -> [array of float or datetime64] Bin edges with length of num_bins+1
+        """
+        key = ('edges',x,num_bins)
+        if key not in self._cache:
+            values,is_date = self._values(x)
+            valid = values[np.isfinite(values)]
+            self._cache[key] = np.histogram_bin_edges(valid,num_bins)
+        values,is_date = self._values(x)
+        return _to_edges(self._cache[key],is_date)
+
+    def hist1d(self,x,num_bins=50):
+        """
+        Count objects in bins of a column.
+
+        Usage:
+            counts,edges = catalogstats.hist1d('RCSAvg')
+
+        Inputs:
+            x -> [str] Column name
+            num_bins -> [int,optional,default=50] The number of bins
+
+        Outputs:
+            counts -> [array of int] Number of objects in each bin; missing values are ignored
+            edges -> [array of float or datetime64] Bin edges with length of num_bins+1
+        """
+        key = ('hist1d',x,num_bins)
+        if key not in self._cache:
+            values,is_date = self._values(x)
+            self.bin_edges(x,num_bins)
+            edges = self._cache[('edges',x,num_bins)]
+            counts,_ = np.histogram(values[np.isfinite(values)],edges)
+            self._cache[key] = counts
+        values,is_date = self._values(x)
+        return self._cache[key],_to_edges(self._cache[('edges',x,num_bins)],is_date)
+
+    def hist2d(self,x,y,num_bins=50):
+        """
+        Count objects in bins of two columns.
+
+        Usage:
+            counts,xedges,yedges = catalogstats.hist2d('MEAN_ALT','INCLINATION')
+
+        Inputs:
+            x -> [str] Column name for the first dimension
+            y -> [str] Column name for the second dimension
+            num_bins -> [int,optional,default=50] The number of bins for the two dimensions
+
+        Outputs:
+            counts -> [2d array of int] Number of objects in each bin with shape of (num_bins,num_bins), where the first axis corresponds to x; objects with any missing value are ignored
+            xedges -> [array of float or datetime64] Bin edges for x
+            yedges -> [array of float or datetime64] Bin edges for y
+        """
+        key = ('hist2d',x,y,num_bins)
+        x_values,x_is_date = self._values(x)
+        y_values,y_is_date = self._values(y)
+        if key not in self._cache:
+            valid = np.isfinite(x_values) & np.isfinite(y_values)
+            x_valid,y_valid = x_values[valid],y_values[valid]
+            xedges = np.histogram_bin_edges(x_valid,num_bins)
+            yedges = np.histogram_bin_edges(y_valid,num_bins)
+            counts,_,_ = np.histogram2d(x_valid,y_valid,bins=[xedges,yedges])
+            self._cache[key] = (counts.astype(np.int64),xedges,yedges)
+        counts,xedges,yedges = self._cache[key]
+        return counts,_to_edges(xedges,x_is_date),_to_edges(yedges,y_is_date)
+
+    def frequency(self,x):
+        """
+        Count objects in groups of a column by a vectorized group-by on the categorical codes.
+
+        Usage:
+            freq = catalogstats.frequency('OWNER')
+
+        Inputs:
+            x -> [str] Column name
+
+        Outputs:
+            freq -> [pandas series] Number of objects in each group indexed by the group labels in descending order of counts; missing values are ignored
+        """
+        key = ('frequency',x)
+        if key not in self._cache:
+            series = self.df[x]
+            if isinstance(series.dtype,pd.CategoricalDtype):
+                codes,labels = series.cat.codes.to_numpy(),series.cat.categories
+            else:
+                codes,labels = pd.factorize(series)
+            counts = np.bincount(codes[codes >= 0],minlength=len(labels))
+            freq = pd.Series(counts,index=pd.Index(labels,name=x),name='fre')
+            self._cache[key] = freq[freq > 0].sort_values(ascending=False,kind='stable')
+        return self._cache[key]
@@ -1,15 +1,44 @@
 from os import makedirs,path
 from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib import colors
-import matplotlib.dates as mdates
 import numpy as np
 import pandas as pd
 import random
-from collections import Counter
 
 from .query import _discos_query,_celestrak_query,_objects_query
 from .data_download import download_tle
+from .data_compact import compact_df,memory_report
+from .catalog_diff import _catalog_diff
+from .overlap_pairs import _overlap_pairs
+from .plane_index import PlaneIndex,PLANE_CELL
+from .catalog_scan import CatalogScan,BATCH_ROWS
+from .catalog_stats import CatalogStats
+from .batch_render import render_batch
+from .result_cache import result_cache
+from . import arrow_interop
+
+def _cached_catalog(query_name,params,func,mode):
+    """
+    Run a query through the result cache, and wrap the result in a SatCatalog holding its own copy of the compacted data frame.
+    """
+    df = result_cache.get(query_name,params)
+    if df is None:
+        df = compact_df(func(**params))
+        result_cache.put(query_name,params,df)
+    return SatCatalog(df.copy(),mode,compact=False)
+
+async def _cached_catalog_async(query_name,params,mode):
+    """
+    Awaitable counterpart of _cached_catalog, which awaits the query of query_async named query_name + '_async' and compacts its result in a worker thread.
+    """
+    import asyncio # Imported here, with query_async, to keep the package import light
+    from . import query_async
+
+    df = result_cache.get(query_name,params)
+    if df is None:
+        func = getattr(query_async,'_' + query_name + '_async')
+        df = await asyncio.to_thread(compact_df,await func(**params))
+        result_cache.put(query_name,params,df)
+    return SatCatalog(df.copy(),mode,compact=False)
 
 class SatCatalog(object):
     """
@@ -19,23 +48,34 @@ class SatCatalog(object):
         discos_query -> Given the geometric constraints of a spatial object, query the qualified spatial objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database.
         celestrak_query -> Given the orbital constraints of a space object, query the qualified space objects from the [CELESTRAK](https://celestrak.com) database.
         objects_query -> Given the geometric and orbital constraints of a space object, query the qualified space objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database and the [CELESTRAK](https://celestrak.com) database.
+        discos_query_async, celestrak_query_async, objects_query_async -> Awaitable counterparts of the queries, which do not block the event loop.
         to_csv -> Save the query results to a csv file.
         from_csv -> Load the csv file that records query results.
+        to_arrow -> Convert the catalog into an Arrow table.
+        from_arrow -> Create a catalog from an Arrow table.
+        to_ipc -> Write the catalog in the Arrow IPC format.
+        from_ipc -> Load a catalog written in the Arrow IPC format.
         hist2d -> Draw a 2D histogram. 
         hist1d -> Draw a histogram. 
         pie -> Draw a pie chart.
+        render_batch -> Render a batch of histograms and pie charts in a process pool.
         get_tle -> Get the TLE data from [SPACETRACK](https://www.space-track.org) automatically.
+        get_tle_async -> Awaitable counterpart of get_tle, which does not block the event loop.
+        memory_report -> Report the memory usage of the catalog column by column.
+        diff -> Compare the catalog with another snapshot and find added, removed, and changed objects.
+        overlap_pairs -> Find all pairs of objects whose perigee-apogee altitude shells overlap.
     """
 
-    def __init__(self,df,mode=None):
-        self.df = df
+    def __init__(self,df,mode=None,compact=True):
+        # Use categoricals, downcast numerics, nullable integer NORAD_ID, and datetime64 dates to reduce the memory footprint
+        self.df = compact_df(df) if compact else df
         if mode is not None: self._mode = mode
 
     def __repr__(self):
     
         return 'instance of class SatCatalog'    
 
-    def discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None):
+    def discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None,*,LAUNCH_YEAR=None,include=None):
         """
         Given the geometric constraints of a spatial object, query the qualified spatial objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database.
 
@@ -43,7 +83,7 @@ class SatCatalog(object):
             satcatalog = SatCatalog.discos_query(DECAYED=False,RCSAvg=[5,15])
 
         Inputs:
-            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
             NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
             OBJECT_CLASS -> [str, list of str, optional, default = None] Classification of objects; available options are 'Payload', 'Payload Debris', 'Payload Fragmentation Debris', 
             'Payload Mission Related Object', 'Rocket Body', 'Rocket Debris', 'Rocket Fragmentation Debris', 'Rocket Mission Related Object', 'Other Mission Related Object','Other Debris', Unknown', or any combination of them, 
@@ -60,17 +100,18 @@ class SatCatalog(object):
             RCSMin -> [list of float, optional, default = None] Minimum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
             RCSMax -> [list of float, optional, default = None] Maximum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
             RCSAvg -> [list of float, optional, default = None] Average Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
+            LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+            include -> [str or list of str, optional, default = None] Related resources fetched in the same paged requests and joined as columns; available options are 'launch'(LAUNCH_EPOCH, LAUNCH_FLIGHT_NO, LAUNCH_FAILURE), 'reentry'(REENTRY_EPOCH), and 'operators'(OPERATOR, OPERATOR_COUNTRY); if None, this option is ignored.
             sort -> [str, optional, default = None] Sort according to attributes of spatial objects, such as mass; available options include 'COSPARID', NORADID', 'ObjectClass', 'DecayDate', 'Mass', 'Shape', 'Length', 'Height', 'Depth', 'RCSMin', 'RSCMax', and 'RCSAvg'.
             If the attribute is prefixed with a '-', such as '-Mass', it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
         Outputs:
             satcatalog -> instance of class SatCatalog containing the selected spatial objects
         """
-        df = _discos_query(COSPAR_ID,NORAD_ID,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,sort)
-        mode = 'discos_catalog'
-        return SatCatalog(df,mode)  
+        params = dict(locals())
+        return _cached_catalog('discos_query',params,_discos_query,'discos_catalog')
 
-    def celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None):
+    def celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,as_of=None):
         """
         Given the orbital constraints of a space object, query the qualified space objects from the [CELESTRAK](https://celestrak.com) database.
 
@@ -78,7 +119,7 @@ class SatCatalog(object):
             satcatalog = SatCatalog.celestrak_query(DECAYED=False,MEAN_ALT=[400,900])
 
         Inputs:
-            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
             NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
             PAYLOAD -> [bool, optional, default = None] Whether an object is payload or not. If True, the object is a payload; if False, not a payload; if None, this option is ignored.
             DECAYED -> [bool, optional, default = None] Whether an object is  decayed(re-entry) or not; If False, the object is still in orbit by now; if True, then decayed; if None, this option is ignored.
@@ -91,17 +132,27 @@ class SatCatalog(object):
             ECC -> [list of float, optional, default = None] Range of Eccentricity; it must be in form of [ecc1,ecc2], such as [0.01,0.2]; if None, then option is ignored.   
             OWNER -> [str or list of str, optional, default = None] Ownership of a space object; and country codes/names can be found at http://www.fao.org/countryprofiles/iso3list/en/; if None, this option is ignored.
             TLE_STATUS -> [bool, optional, default = None] Whether a TLE is valid. If False, it means No Current Elements, No Initial Elements, or No Elements Available; if None, this option is ignored.
-            sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as MEAN_ALT; available options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC',and 'OWNER'.
+            SMA -> [list of float, optional, default = None] Range of semi-major axis[km]; it must be in form of [sma1,sma2], such as [6800.0,7300.0]; if None, this option is ignored.
+            MEAN_MOTION -> [list of float, optional, default = None] Range of mean motion[rev/day]; it must be in form of [n1,n2], such as [14.0,16.0]; if None, this option is ignored.
+            RAAN_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the right ascension of the ascending node[deg/day]; it must be in form of [rate1,rate2], such as [0.9,1.1]; if None, this option is ignored.
+            ARGP_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the argument of perigee[deg/day]; it must be in form of [rate1,rate2], such as [-0.1,0.1]; if None, this option is ignored.
+            SSO -> [bool, optional, default = None] Whether an orbit is sun-synchronous. If True, the J2 drift rate of RAAN matches the mean motion of the Sun; if False, not sun-synchronous; if None, this option is ignored.
+            ORBIT_REGIME -> [str or list of str, optional, default = None] Orbit regime among 'LEO', 'MEO', 'GEO', and 'HEO'(highly eccentric or beyond GEO), such as ['MEO','GEO']; if None, this option is ignored.
+            OBJECT_NAME -> [str or list of str, optional, default = None] Names of objects, matched case-insensitively; an exact name such as 'COSMOS 2251 DEB', or a glob pattern such as 'STARLINK-*' for a prefix and '*DEB*' for a substring; if None, this option is ignored.
+            LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years given by COSPAR_ID; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+            where -> [str, optional, default = None] Boolean expression over the columns, such as "300 < MEAN_ALT < 2000 and (ECC < 0.01 or OWNER in ('US','PRC'))", combined with the other options by 'and'; 
+            it supports 'and', 'or', 'not', comparisons, 'in', 'is None', and arithmetic, and is parsed once and evaluated in a single chunked pass; if None, this option is ignored.
+            as_of -> [str, optional, default = None] Date such as '2024-03-01'; if given, the query runs against the catalog as it was on that date, rebuilt from the stored snapshots; if None, the latest catalog is used.
+            sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as MEAN_ALT; available options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', and 'OWNER'.
             If the attribute is prefixed with a '-', such as '-DecayDate', it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
         Outputs:
             satcatalog -> instance of class SatCatalog containing the selected spatial objects
-        """    
-        df = _celestrak_query(COSPAR_ID,NORAD_ID,PAYLOAD,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,OWNER,TLE_STATUS,sort)
-        mode = 'celestrak_catalog'
-        return SatCatalog(df,mode)
+        """
+        params = dict(locals())
+        return _cached_catalog('celestrak_query',params,_celestrak_query,'celestrak_catalog')
 
-    def objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None):
+    def objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,include=None):
         """
         Given the geometric and orbital constraints of a space object, query the qualified space objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database and the [CELESTRAK](https://celestrak.com) database.
 
@@ -109,7 +160,7 @@ class SatCatalog(object):
             satcatalog = SatCatalog.objects_query(PAYLOAD=False,DECAYED=False,MEAN_ALT=[400,900],RCSAvg=[5,15])
 
         Inputs:
-            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+            COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
             NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
             OBJECT_CLASS -> [str, list of str, optional, default = None] Classification of objects; available options are 'Payload', 'Payload Debris', 'Payload Fragmentation Debris', 
             'Payload Mission Related Object', 'Rocket Body', 'Rocket Debris', 'Rocket Fragmentation Debris', 'Rocket Mission Related Object', 'Other Mission Related Object','Other Debris', Unknown', or any combination of them, 
@@ -133,17 +184,97 @@ class SatCatalog(object):
             RCSMax -> [list of float, optional, default = None] Maximum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
             RCSAvg -> [list of float, optional, default = None] Average Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
             OWNER -> [str or list of str, optional, default = None] Ownership of a space object; and country codes/names can be found at http://www.fao.org/countryprofiles/iso3list/en/; if None, this option is ignored.
+            SMA -> [list of float, optional, default = None] Range of semi-major axis[km]; it must be in form of [sma1,sma2], such as [6800.0,7300.0]; if None, this option is ignored.
+            MEAN_MOTION -> [list of float, optional, default = None] Range of mean motion[rev/day]; it must be in form of [n1,n2], such as [14.0,16.0]; if None, this option is ignored.
+            RAAN_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the right ascension of the ascending node[deg/day]; it must be in form of [rate1,rate2], such as [0.9,1.1]; if None, this option is ignored.
+            ARGP_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the argument of perigee[deg/day]; it must be in form of [rate1,rate2], such as [-0.1,0.1]; if None, this option is ignored.
+            SSO -> [bool, optional, default = None] Whether an orbit is sun-synchronous. If True, the J2 drift rate of RAAN matches the mean motion of the Sun; if False, not sun-synchronous; if None, this option is ignored.
+            ORBIT_REGIME -> [str or list of str, optional, default = None] Orbit regime among 'LEO', 'MEO', 'GEO', and 'HEO'(highly eccentric or beyond GEO), such as ['MEO','GEO']; if None, this option is ignored.
+            OBJECT_NAME -> [str or list of str, optional, default = None] Names of objects in the CELESTRAK database, matched case-insensitively; an exact name such as 'COSMOS 2251 DEB', or a glob pattern such as 'STARLINK-*' for a prefix and '*DEB*' for a substring; if None, this option is ignored.
+            LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years given by COSPAR_ID; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+            where -> [str, optional, default = None] Boolean expression over the columns of the result, such as "MASS > 1000 or RCSAvg > 10", combined with the other options by 'and'; 
+            an expression over CELESTRAK columns only is evaluated before DISCOS is queried; if None, this option is ignored.
+            include -> [str or list of str, optional, default = None] Related resources from the DISCOS database joined as columns; available options are 'launch'(LAUNCH_EPOCH, LAUNCH_FLIGHT_NO, LAUNCH_FAILURE), 'reentry'(REENTRY_EPOCH), and 'operators'(OPERATOR, OPERATOR_COUNTRY); if None, this option is ignored.
             sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as by mass; available options include 'COSPAR_ID', NORAD_ID', 'OBJECT_CLASS', 'MASS', 'DECAY_DATE', 'SHAPE', 
-            'LENGTH', 'HEIGHT', 'DEPTH', 'RCSMin', 'RSCMax', 'RCSAvg', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', and 'OWNER'.
+            'LENGTH', 'HEIGHT', 'DEPTH', 'RCSMin', 'RSCMax', 'RCSAvg', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', and 'OWNER'.
             If the attribute is prefixed with a '-', such as "-RCSAvg", it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
         Outputs:
             satcatalog -> instance of class SatCatalog containing the selected spatial objects
-        """    
+        """
+        params = dict(locals())
+        return _cached_catalog('objects_query',params,_objects_query,'objects_catalog')
+
+    async def discos_query_async(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None,*,LAUNCH_YEAR=None,include=None):
+        """
+        Awaitable counterpart of discos_query, which fetches the pages of DISCOS with non-blocking HTTP and awaits the pauses for rate limiting, so that it does not block the event loop.
+        Cancelling the awaiting task cancels the pending requests and pauses.
+
+        Usage:
+            satcatalog = await SatCatalog.discos_query_async(DECAYED=False,RCSAvg=[5,15])
+
+        Inputs:
+            Same as discos_query
+
+        Outputs:
+            satcatalog -> instance of class SatCatalog containing the selected spatial objects
+        """
+        params = dict(locals())
+        return await _cached_catalog_async('discos_query',params,'discos_catalog')
+
+    async def celestrak_query_async(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,as_of=None):
+        """
+        Awaitable counterpart of celestrak_query, which downloads and parses the satcat in a worker thread, so that it does not block the event loop.
+
+        Usage:
+            satcatalog = await SatCatalog.celestrak_query_async(DECAYED=False,MEAN_ALT=[400,900])
+
+        Inputs:
+            Same as celestrak_query
+
+        Outputs:
+            satcatalog -> instance of class SatCatalog containing the selected spatial objects
+        """
+        params = dict(locals())
+        return await _cached_catalog_async('celestrak_query',params,'celestrak_catalog')
+
+    async def objects_query_async(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,include=None):
+        """
+        Awaitable counterpart of objects_query, which loads the local sources in worker threads and fetches the pages of DISCOS with non-blocking HTTP, so that it does not block the event loop.
+        Cancelling the awaiting task cancels the pending requests and pauses.
+
+        Usage:
+            satcatalog = await SatCatalog.objects_query_async(DECAYED=False,MEAN_ALT=[400,900],RCSAvg=[5,15])
+
+        Inputs:
+            Same as objects_query
+
+        Outputs:
+            satcatalog -> instance of class SatCatalog containing the selected spatial objects
+        """
+        params = dict(locals())
+        return await _cached_catalog_async('objects_query',params,'objects_catalog')
+
+    def scan(sources,batch_rows=BATCH_ROWS,processes=1,**constraints):
+        """
+        Scan satcat files too large to be loaded at once in batches of bounded memory, such as archived snapshots and synthetic populations in the same schema.
+
+        Usage:
+            scan = SatCatalog.scan(['archive/satcat-*.csv','debris-10M.arrow'],processes=8,DECAYED=False,MEAN_ALT=[400,900])
+            for df in scan.select(sort='-MEAN_ALT'):
+                ...
+            count,(counts,edges) = scan.aggregate([{'kind':'count'},{'kind':'hist1d','x':'MEAN_ALT','range':[0,2000]}])
+
+        Inputs:
+            sources -> [str or list of str] Paths or glob patterns of satcat CSV files, Arrow IPC files such as written by to_ipc, or Parquet files
+            batch_rows -> [int,optional,default=100000] Number of rows per batch
+            processes -> [int,optional,default=1] Number of worker processes; if None, the number of CPU cores; if 1, the batches are processed in the current process
+            constraints -> Same options as celestrak_query except as_of and sort
 
-        df = _objects_query(COSPAR_ID,NORAD_ID,PAYLOAD,OBJECT_CLASS,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,TLE_STATUS,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,OWNER,sort)
-        mode = 'objects_catalog'
-        return SatCatalog(df,mode) 
+        Outputs:
+            scan -> [instance of class CatalogScan] Scan of the sources with the methods select and aggregate
+        """
+        return CatalogScan(sources,batch_rows,processes,**constraints)
 
     def to_csv(self,dir_catalog=None):
         """
@@ -186,6 +317,86 @@ class SatCatalog(object):
         df = pd.read_csv(csv_file) 
         return SatCatalog(df)      
 
+    def to_arrow(self):
+        """
+        Convert the catalog into an Arrow table, such as for DuckDB, Spark, or a Rust service.
+        Text columns and numeric columns without nulls are shared with the data frame without copying, and the dtypes, including categoricals, nullable integers, and datetime64 dates, are preserved.
+
+        Usage:
+            table = satcatalog.to_arrow()
+
+        Outputs:
+            table -> [pyarrow Table] Arrow table
+        """
+        return arrow_interop.to_arrow(self.df,getattr(self,'_mode',None))
+
+    def from_arrow(table,compact=False):
+        """
+        Create a catalog from an Arrow table.
+
+        Usage:
+            satcatalog = SatCatalog.from_arrow(table)
+
+        Inputs:
+            table -> [pyarrow Table or RecordBatch] Arrow table, such as one returned by to_arrow
+            compact -> [bool,optional,default=False] If True, compact the dtypes of the data frame, which copies the columns; useful for tables from other producers
+
+        Outputs:
+            satcatalog -> instance of class SatCatalog
+        """
+        df,mode = arrow_interop.from_arrow(table)
+        return SatCatalog(df,mode,compact=compact)
+
+    def to_ipc(self,sink,format='file'):
+        """
+        Write the catalog in the Arrow IPC format.
+
+        Usage:
+            satcatalog.to_ipc('catalog.arrow')
+            satcatalog.to_ipc(sys.stdout.buffer,format='stream')
+
+        Inputs:
+            sink -> [str or file-like object] Path or writable binary stream
+            format -> [str,optional,default='file'] 'file' for the random-access file format, which readers can memory-map, or 'stream' for the streaming format
+
+        Outputs:
+            sink -> [str or file-like object] The given sink
+        """
+        return arrow_interop.write_ipc(self.to_arrow(),sink,format)
+
+    def from_ipc(source):
+        """
+        Load a catalog written in the Arrow IPC format. A file is memory-mapped, so that the columns refer to the file without copying where possible.
+
+        Usage:
+            satcatalog = SatCatalog.from_ipc('catalog.arrow')
+
+        Inputs:
+            source -> [str, bytes, or file-like object] Path, buffer, or readable binary stream
+
+        Outputs:
+            satcatalog -> instance of class SatCatalog
+        """
+        return SatCatalog.from_arrow(arrow_interop.read_ipc(source))
+
+    @property
+    def stats(self):
+        """
+        Numeric aggregation layer of the catalog, which returns binned counts and grouped frequencies as arrays without plotting.
+        Aggregates are cached until the data frame is replaced.
+
+        Usage:
+            counts,edges = satcatalog.stats.hist1d('RCSAvg')
+            counts,xedges,yedges = satcatalog.stats.hist2d('MEAN_ALT','INCLINATION')
+            freq = satcatalog.stats.frequency('OWNER')
+
+        Outputs:
+            catalogstats -> instance of class CatalogStats
+        """
+        if getattr(self,'_stats',None) is None or self._stats.df is not self.df:
+            self._stats = CatalogStats(self.df)
+        return self._stats
+
     def hist2d(self,x,y,num_bins=50,dir_fig=None):
         """
         Draw a 2D histogram. 
@@ -202,24 +413,40 @@ class SatCatalog(object):
         Outputs:
         file_fig -> [str] Path of the histogram
         """
-        df = self.df
-
         if  dir_fig is None: dir_fig = 'satcatalogs/' 
         if not path.exists(dir_fig): makedirs(dir_fig)  
 
-        fig, ax = plt.subplots(tight_layout=True,dpi=300)
-
         # the histogram of the data
-        df_x,df_y = df[x],df[y]
+        counts,xedges,yedges = self.stats.hist2d(x,y,num_bins)
+        density = counts/counts.sum()/np.outer(np.diff(xedges.astype(np.float64)),np.diff(yedges.astype(np.float64)))
+
+        from matplotlib.figure import Figure
+        from matplotlib import colors
 
-        hist = ax.hist2d(df_x, df_y,bins=num_bins,density=True,norm=colors.LogNorm(),cmap='Oranges')
+        # Figures are created without pyplot, so they are not retained by its global state and are released once saved
+        fig = Figure(tight_layout=True,dpi=300)
+        ax = fig.subplots()
+
+        ax.pcolormesh(xedges,yedges,np.ma.masked_equal(density,0).T,norm=colors.LogNorm(),cmap='Oranges')
         ax.set_xlabel('{:s}'.format(x))
         ax.set_ylabel('{:s}'.format(y))
         file_fig = dir_fig + '{:s}-{:s}.png'.format(x,y)
-        plt.savefig(file_fig,bbox_inches = 'tight')
+        fig.savefig(file_fig,bbox_inches = 'tight')
 
         return file_fig  
 
+    def _hist1d_ax(self,ax,x,num_bins):
+        """
+        Draw the histogram of a column on a given axis.
+        """
+        counts,edges = self.stats.hist1d(x,num_bins)
+        ax.stairs(counts,edges,fill=True)
+        if x in ['LAUNCH_DATE','DECAY_DATE']: 
+            import matplotlib.dates as mdates
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m')) 
+            ax.tick_params(axis='x', rotation=30)
+        ax.set_xlabel('{:s}'.format(x))
+
     def hist1d(self,xs,num_bins = 50,dir_fig=None):
         """
         Draw a histogram. 
@@ -235,8 +462,7 @@ class SatCatalog(object):
         Outputs:
             file_fig -> [str] Path of the histogram
         """
-
-        df = self.df
+        from matplotlib.figure import Figure
 
         if dir_fig is None: dir_fig = 'satcatalogs/' 
         if not path.exists(dir_fig): makedirs(dir_fig)  
@@ -244,37 +470,25 @@ class SatCatalog(object):
         if type(xs) is list and len(xs) > 1:
             n_xs = len(xs)
 
-            fig, ax = plt.subplots(1, n_xs,dpi=300)
+            fig = Figure(dpi=300)
+            ax = fig.subplots(1, n_xs)
             fig.tight_layout(pad=2)
 
             for i in range(n_xs):
-                df_x = df[xs[i]]
-                if xs[i] in ['LAUNCH_DATE','DECAY_DATE']: 
-                    df_x = df_x.astype("datetime64")
-                    ax[i].xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m')) 
-                    ax[i].tick_params(axis='x', rotation=30)
-                n, bins, patches = ax[i].hist(df_x, num_bins)
-                ax[i].set_xlabel('{:s}'.format(xs[i]))
+                self._hist1d_ax(ax[i],xs[i],num_bins)
             file_fig = dir_fig+'{:s}.png'.format('_'.join(xs))   
         else:
                 
-            fig, ax = plt.subplots(1, 1,dpi=300)
+            fig = Figure(dpi=300)
+            ax = fig.subplots(1, 1)
             fig.tight_layout(pad=2)
 
             if type(xs) is list: xs = xs[0]
 
-            df_x = df[xs]
-
-            if xs in ['LAUNCH_DATE','DECAY_DATE']: 
-                df_x = df_x.astype("datetime64")   
-                ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-                ax.tick_params(axis='x', rotation=30)
-
-            n, bins, patches = ax.hist(df_x, num_bins)
-            ax.set_xlabel('{:s}'.format(xs))
+            self._hist1d_ax(ax,xs,num_bins)
             file_fig = dir_fig+'{:s}.png'.format(xs)  
                 
-        plt.savefig(file_fig,bbox_inches = 'tight')
+        fig.savefig(file_fig,bbox_inches = 'tight')
 
         return file_fig
 
@@ -294,40 +508,56 @@ class SatCatalog(object):
             file_fig -> [str] path of histogram
         """
 
+        from matplotlib.figure import Figure
+
         if dir_fig is None: dir_fig = 'satcatalogs/' 
         if not path.exists(dir_fig): makedirs(dir_fig) 
 
         if x not in ['OWNER','LAUNCH_SITE','OBJECT_CLASS','SHAPE']: 
             raise Exception("Statistical variables should in ['OWNER','LAUNCH_SITE','OBJECT_CLASS','SHAPE'] for pie chart.")
 
-        df_x = self.df[x]
-                
-        x_fre = pd.DataFrame(Counter(df_x).items(),columns=[x,'fre'])
-        condition = x_fre['fre'] > cutoff
+        x_fre = self.stats.frequency(x)
+        condition = x_fre > cutoff
         most_fre = x_fre[condition]
 
-        other_sum = sum(x_fre[~condition]['fre'])
-        new_row = {x:['Other'], 'fre':[other_sum]}
-        other_fre = pd.DataFrame(new_row)
-        x_fre = pd.concat([most_fre,other_fre],ignore_index=True)
-
-        labels,counts = x_fre[x],x_fre['fre']
-        explode = np.zeros_like(labels)
+        labels = [str(label) for label in most_fre.index] + ['Other']
+        counts = np.append(most_fre.to_numpy(),x_fre[~condition].sum())
+        explode = np.zeros(len(labels))
 
         if prominent is None: prominent = random.choice(labels)
-        prominent_index = labels.index[labels == prominent].tolist()[0]
+        prominent_index = labels.index(prominent)
         explode[prominent_index] = 0.15
 
-        fig, ax = plt.subplots(dpi=300)
+        fig = Figure(dpi=300)
+        ax = fig.subplots()
         fig.tight_layout(pad=2)
 
         ax.pie(counts, labels=labels, explode=explode,autopct='%.1f%%',startangle=26)
         ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
         file_fig = dir_fig+'{:s}.png'.format(x)  
-        plt.savefig(file_fig,bbox_inches = 'tight')
+        fig.savefig(file_fig,bbox_inches = 'tight')
         return file_fig
 
-    def get_tle(self,mode='keep',dir_TLE='TLE/'):
+    def render_batch(self,specs,processes=None,dir_fig=None):
+        """
+        Render a batch of histograms and pie charts in a process pool.
+        Each worker uses the non-interactive backend Agg, receives the catalog once, and releases every figure once it is saved.
+
+        Usage:
+            specs = [{'kind':'hist1d','xs':['StdMag','LAUNCH_DATE']},{'kind':'hist2d','x':'MEAN_ALT','y':'INCLINATION'},{'kind':'pie','x':'LAUNCH_SITE','cutoff':100}]
+            files_fig = satcatalog.render_batch(specs)
+
+        Inputs:
+            specs -> [list of dict] Plot specs, each of which has the key 'kind' in ['hist1d','hist2d','pie'], and the remaining keys passed to the corresponding method; specs saved to the same file raise an exception
+            processes -> [int,optional,default=None] Number of worker processes; if None, it is the smaller of the number of CPU cores and the number of specs; if 1, the specs are rendered in the current process
+            dir_fig -> [str,optional,default=None] Path to save the figures if a spec does not set 'dir_fig'
+
+        Outputs:
+            files_fig -> [list of str] Paths of the figures in the order of specs
+        """
+        return render_batch(self,specs,processes,dir_fig)
+
+    def get_tle(self,mode='keep',dir_TLE='TLE/',bulk=None):
         """
         Get the TLE data from [SPACETRACK](https://www.space-track.org) automatically.
 
@@ -337,11 +567,105 @@ class SatCatalog(object):
         Inputs:
             mode -> [str,optional,default='keep'] Either 'keep' the files stored in the TLE directory or 'clear' the TLE directory 
             dir_TLE -> [str,optional,default='TLE/'] Path to save TLE
+            bulk -> [bool,optional,default=None] If True, the whole current catalog is downloaded once a day and filtered locally; if False, the TLE are requested in parts of 500 IDs; 
+            if None, the bulk download is used for more than TLE_BULK_THRESHOLD IDs.
 
         Outputs: 
             tle——file  -> [str] Path of the TLE file
         """
-        noradids = list(self.df['NORAD_ID'])
-        file_tle = download_tle(noradids,mode=mode,dir_TLE=dir_TLE)
+        noradids = [int(noradid) for noradid in self.df['NORAD_ID'].dropna()]
+        file_tle = download_tle(noradids,mode=mode,dir_TLE=dir_TLE,bulk=bulk)
         return file_tle
-            
\ No newline at end of file
+
+    async def get_tle_async(self,mode='keep',dir_TLE='TLE/',bulk=None):
+        """
+        Awaitable counterpart of get_tle, which awaits the requests and the pauses for rate limiting, so that it does not block the event loop.
+
+        Usage:
+            tle_file = await satcatalog.get_tle_async()
+
+        Inputs:
+            Same as get_tle
+
+        Outputs:
+            tle_file -> [str] Path of the TLE file
+        """
+        from .query_async import download_tle_async
+
+        noradids = [int(noradid) for noradid in self.df['NORAD_ID'].dropna()]
+        return await download_tle_async(noradids,mode=mode,dir_TLE=dir_TLE,bulk=bulk)
+            
+
+    def memory_report(self):
+        """
+        Report the memory usage of the catalog column by column.
+
+        Usage:
+            report = satcatalog.memory_report()
+
+        Outputs:
+            report -> [pandas dataframe] Data frame indexed by column names with the dtype, the number of bytes, and the percentage of the total; the last row 'TOTAL' sums up all columns including the index
+        """
+        return memory_report(self.df)
+
+    def diff(self,other,columns=None,tol=None):
+        """
+        Compare the catalog with another snapshot and find added, removed, and changed objects.
+        The catalog itself is taken as the earlier snapshot, and objects are matched by NORAD_ID.
+
+        Usage:
+            diff = satcatalog_old.diff(satcatalog_new,tol={'APOGEE':1,'PERIGEE':1,'RCS':0.01})
+            diff['added'] # new launches
+            diff['removed'] # objects no longer in the catalog
+            diff['changed'] # objects with changed attributes
+            diff['masks'] # per-column change masks of the changed objects
+
+        Inputs:
+            other -> [instance of class SatCatalog] Later snapshot of the catalog
+            columns -> [list of str,optional,default=None] Columns to compare; if None, all columns common to both snapshots are compared
+            tol -> [float or dict,optional,default=None] Absolute tolerance for numeric columns; a float applies to all numeric columns, and a dict such as {'APOGEE':1.0,'RCS':0.1} applies to the listed columns only.
+            If None, numeric values must match exactly.
+
+        Outputs:
+            diff -> [dict] Dictionary with keys 'added', 'removed', 'changed', and 'masks', each of which is a pandas dataframe
+        """
+        return _catalog_diff(self.df,other.df,columns,tol)
+
+    def overlap_pairs(self,pad=0,inc_tol=None,chunk_size=1000000):
+        """
+        Find all pairs of objects whose perigee-apogee altitude shells overlap, which pre-screens candidates for conjunction analysis.
+
+        Usage:
+            for pairs in satcatalog.overlap_pairs(pad=10,inc_tol=5):
+                ...
+            pairs = pd.concat(satcatalog.overlap_pairs(pad=10))
+
+        Inputs:
+            pad -> [float,optional,default=0] Margin in [km] by which the shells are allowed to miss each other
+            inc_tol -> [float,optional,default=None] Maximum difference of inclination in [deg] of a pair, by which the objects are bucketed before the sweep; if None, this option is ignored
+            chunk_size -> [int,optional,default=1000000] Maximum number of candidate pairs examined per chunk, which bounds the memory
+
+        Outputs:
+            pairs -> [generator of pandas dataframe] Chunks with the columns 'NORAD_ID_1', 'NORAD_ID_2', 'OVERLAP_MIN', 'OVERLAP_MAX', and 'GAP', where 'OVERLAP_MIN' and 'OVERLAP_MAX' give the shared altitude range[km], and 'GAP' the distance[km] by which shells admitted by pad miss each other
+        """
+        return _overlap_pairs(self.df,pad,inc_tol,chunk_size)
+
+    def plane_index(self,tle_file=None,epoch='latest',cell=PLANE_CELL):
+        """
+        Build a grid index over the inclination, RAAN, and mean motion of the TLE of the catalog, for finding objects that share an orbital plane.
+
+        Usage:
+            index = satcatalog.plane_index()
+            near = index.coplanar(44713,inc_tol=0.1,raan_tol=0.5)
+            planes = index.clusters(inc_tol=0.1,raan_tol=0.5,n_tol=0.05)
+
+        Inputs:
+            tle_file -> [str,optional,default=None] Path of the TLE/3LE file; if None, the TLE are downloaded by get_tle
+            epoch -> [str or datetime,optional,default='latest'] Epoch to propagate the RAAN to; 'latest' for the latest epoch of the file, or None to keep the RAAN of the element sets
+            cell -> [tuple of float,optional,default=(0.5,1.0,0.1)] Cell sizes of inclination[deg], RAAN[deg], and mean motion[rev/day]
+
+        Outputs:
+            index -> [instance of class PlaneIndex] Index of the orbital planes
+        """
+        if tle_file is None: tle_file = self.get_tle()
+        return PlaneIndex.from_tle(tle_file,epoch,cell)
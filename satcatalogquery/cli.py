@@ -0,0 +1,154 @@
+import argparse
+import json
+import sys
+import time
+from os import path,makedirs
+from concurrent.futures import ThreadPoolExecutor
+
+from . import query
+from .data_compact import compact_df
+from .instrumentation import instrument
+
+# Queries available to a spec
+QUERIES = {
+    'celestrak_query':query._celestrak_query,
+    'discos_query':query._discos_query,
+    'objects_query':query._objects_query,
+    }
+
+# File extensions of the output formats
+FORMATS = {'csv':'.csv','parquet':'.parquet','feather':'.feather'}
+
+def load_specs(spec_file):
+    """
+    Load query specs from a file of JSON lines or YAML.
+
+    Each spec is a mapping with the keys
+        name -> [str,optional] Name of the spec, which is also the name of the output file; defaults to 'spec<line number>'
+        query -> [str] One of 'celestrak_query', 'discos_query', and 'objects_query'
+        params -> [dict,optional] Keyword arguments of the query, for example, {"DECAYED": false, "MEAN_ALT": [400, 900]}
+
+    Usage:
+        specs = load_specs('specs.jsonl')
+
+    Inputs:
+        spec_file -> [str] Path of the spec file; files ending in .yaml or .yml are read as YAML documents or a YAML list, others as JSON lines
+
+    Outputs:
+        specs -> [list of dict] Query specs
+    """
+    if spec_file.endswith(('.yaml','.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise Exception('PyYAML is required to read YAML spec files.')
+        with open(spec_file) as f:
+            specs = []
+            for doc in yaml.safe_load_all(f):
+                if doc is None: continue
+                specs.extend(doc if isinstance(doc,list) else [doc])
+    else:
+        with open(spec_file) as f:
+            specs = [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    names = set()
+    for i,spec in enumerate(specs):
+        if spec.get('query') not in QUERIES:
+            raise Exception("The query of spec {:d} should be in ['celestrak_query','discos_query','objects_query'].".format(i+1))
+        spec.setdefault('name','spec{:d}'.format(i+1))
+        spec.setdefault('params',{})
+        if spec['name'] in names: raise Exception('Duplicate spec name {:s}.'.format(spec['name']))
+        names.add(spec['name'])
+    return specs
+
+def write_result(df,filename,fmt='csv'):
+    """
+    Write the result of a spec as CSV, or in a columnar format with compact dtypes.
+
+    Inputs:
+        df -> [pandas dataframe] Result of a query
+        filename -> [str] Path of the output file
+        fmt -> [str,optional,default='csv'] One of 'csv', 'parquet', and 'feather'
+    """
+    if fmt == 'csv':
+        df.to_csv(filename,index=False)
+    elif fmt == 'parquet':
+        compact_df(df).to_parquet(filename,index=False)
+    elif fmt == 'feather':
+        compact_df(df).reset_index(drop=True).to_feather(filename)
+    else:
+        raise Exception("The output format should be in ['csv','parquet','feather'].")
+    return filename
+
+def run_specs(specs,dir_out='satcatalogs/',fmt='csv',workers=None):
+    """
+    Evaluate query specs against data sources loaded once, and write each result.
+
+    Usage:
+        results = run_specs(load_specs('specs.jsonl'),dir_out='results/',fmt='parquet',workers=4)
+
+    Inputs:
+        specs -> [list of dict] Query specs returned by load_specs
+        dir_out -> [str,optional,default='satcatalogs/'] Directory of the output files
+        fmt -> [str,optional,default='csv'] One of 'csv', 'parquet', and 'feather'
+        workers -> [int,optional,default=None] Number of specs evaluated in parallel; if None, it is decided by ThreadPoolExecutor
+
+    Outputs:
+        results -> [list of dict] One record per spec with the keys 'name', 'file', 'rows', 'seconds', 'noradids', and 'error'
+    """
+    if fmt not in FORMATS: raise Exception("The output format should be in ['csv','parquet','feather'].")
+    makedirs(dir_out,exist_ok=True)
+
+    # Load the data sources once, before the specs share them
+    with instrument.span('cli_load'):
+        if any(spec['query'] in ['celestrak_query','objects_query'] for spec in specs): query._load_satcat()
+        if any(spec['query'] == 'objects_query' for spec in specs): query.parseQSMagFile()
+
+    def evaluate(spec):
+        record = {'name':spec['name'],'file':None,'rows':None,'seconds':None,'noradids':[],'error':None}
+        t0 = time.perf_counter()
+        try:
+            with instrument.span('cli_spec',spec=spec['name']):
+                df = QUERIES[spec['query']](**spec['params'])
+                if type(df) is list: raise Exception('DISCOS query failed: {}'.format(df)) # errors passed through by DISCOSweb
+                record['file'] = write_result(df,path.join(dir_out,spec['name'] + FORMATS[fmt]),fmt)
+            record['rows'] = len(df)
+            record['noradids'] = [int(noradid) for noradid in df['NORAD_ID'].dropna()]
+        except Exception as e:
+            record['error'] = '{:s}: {:s}'.format(type(e).__name__,str(e))
+        record['seconds'] = time.perf_counter() - t0
+        return record
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(evaluate,specs))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='satcatalogquery',description='Run a batch of catalogue queries against data sources loaded once')
+    parser.add_argument('specs',help='file of query specs as JSON lines, or YAML if it ends in .yaml or .yml')
+    parser.add_argument('-o','--output-dir',default='satcatalogs/',help='directory of the output files')
+    parser.add_argument('-f','--format',default='csv',choices=list(FORMATS),help='format of the output files')
+    parser.add_argument('-j','--workers',type=int,default=None,help='number of specs evaluated in parallel')
+    parser.add_argument('--tle',action='store_true',help='download the TLE of all resulting objects in a single deduplicated Space-Track pull')
+    parser.add_argument('--tle-dir',default='TLE/',help='directory of the TLE file')
+    parser.add_argument('--tle-mode',default='keep',choices=['keep','clear'],help="either 'keep' or 'clear' the files stored in the TLE directory")
+    args = parser.parse_args(argv)
+
+    results = run_specs(load_specs(args.specs),args.output_dir,args.format,args.workers)
+    for record in results:
+        if record['error'] is None:
+            print('{:<24s} {:8d} rows {:8.3f} s  {:s}'.format(record['name'],record['rows'],record['seconds'],record['file']))
+        else:
+            print('{:<24s} failed: {:s}'.format(record['name'],record['error']))
+
+    if args.tle:
+        from .data_download import download_tle
+        noradids = sorted(set(noradid for record in results for noradid in record['noradids']))
+        if noradids:
+            file_tle = download_tle(noradids,mode=args.tle_mode,dir_TLE=args.tle_dir)
+            print('TLE of {:d} objects are written to {:s}'.format(len(noradids),file_tle))
+
+    return 1 if any(record['error'] is not None for record in results) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Columns holding a small set of repeated codes or names
+CATEGORICAL_COLUMNS = ['OBJECT_TYPE','OPS_STATUS_CODE','OWNER','LAUNCH_SITE','DATA_STATUS_CODE','ORBIT_CENTER','ORBIT_TYPE','OBJECT_CLASS','SHAPE','ORBIT_REGIME']
+# Columns holding calendar dates in form of 'YYYY-MM-DD'
+DATE_COLUMNS = ['LAUNCH_DATE','DECAY_DATE']
+# Columns holding physical quantities
+NUMERIC_COLUMNS = ['PERIOD','INCLINATION','APOGEE','PERIGEE','MEAN_ALT','ECC','SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT','RCS','MASS','HEIGHT','LENGTH','DEPTH','RCSMin','RCSMax','RCSAvg','StdMag']
+# Numeric columns kept in float64, since they carry more than 7 significant digits or are integrated over time, such as the mean motion of 15.50103472 rev/day
+PRECISE_COLUMNS = ['PERIOD','ECC','SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT']
+# Columns holding object IDs, which are never converted to categoricals
+ID_COLUMNS = ['OBJECT_NAME','COSPAR_ID','NORAD_ID']
+
+def _is_text(series):
+    """
+    Check whether a column holds python objects or strings.
+    """
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+def compact_df(df,max_unique_ratio=0.5):
+    """
+    Compact the memory representation of a catalog data frame.
+
+    Usage:
+        df = compact_df(df)
+
+    Inputs:
+        df -> [pandas dataframe] Data frame returned by the query functions
+        max_unique_ratio -> [float,optional,default=0.5] Text columns not listed in CATEGORICAL_COLUMNS are converted to categoricals only if the ratio of unique values to rows is below this value
+
+    Outputs:
+        df -> [pandas dataframe] Data frame with categoricals for low-cardinality strings, downcast numerics, nullable integer NORAD_ID, and datetime64 dates
+
+    Note:
+        Floating-point columns are downcast to float32, which keeps 7 significant digits and exceeds the precision of the physical quantities of the source catalogs,
+        such as altitudes, inclinations, sizes, and magnitudes. The orbital elements in PRECISE_COLUMNS are kept in float64.
+    """
+    df = df.copy()
+    n = len(df)
+
+    for column in df.columns:
+        series = df[column]
+
+        if column == 'NORAD_ID':
+            df[column] = pd.to_numeric(series,errors='coerce').astype('Int32')
+        elif column in DATE_COLUMNS:
+            df[column] = pd.to_datetime(series,errors='coerce')
+        elif column in NUMERIC_COLUMNS:
+            df[column] = pd.to_numeric(series,errors='coerce').astype(np.float64 if column in PRECISE_COLUMNS else np.float32)
+        elif isinstance(series.dtype,pd.CategoricalDtype) or column in ID_COLUMNS:
+            continue
+        elif column in CATEGORICAL_COLUMNS:
+            df[column] = series.astype('category')
+        elif _is_text(series) and n > 0:
+            if series.nunique(dropna=True) < max_unique_ratio*n:
+                df[column] = series.astype('category')
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[column] = pd.to_numeric(series,downcast='integer')
+        elif pd.api.types.is_float_dtype(series.dtype):
+            df[column] = series.astype(np.float32)
+
+    return df
+
+def memory_report(df):
+    """
+    Report the memory usage of a catalog data frame column by column.
+
+    Usage:
+        report = memory_report(df)
+
+    Inputs:
+        df -> [pandas dataframe] Data frame of a space objects catalog
+
+    Outputs:
+        report -> [pandas dataframe] Data frame indexed by column names with the dtype, the number of bytes, and the percentage of the total; the last row 'TOTAL' sums up all columns including the index
+    """
+    nbytes = df.memory_usage(index=True,deep=True)
+    total = nbytes.sum()
+    report = pd.DataFrame({'DTYPE':[str(df.index.dtype)] + [str(df[column].dtype) for column in df.columns],'BYTES':nbytes.values},index=nbytes.index)
+    report['PERCENT'] = 100*report['BYTES']/total if total else 0.0
+    report.loc['TOTAL'] = ['',total,100.0]
+    report['BYTES'] = report['BYTES'].astype(np.int64)
+    return report
@@ -1,14 +1,46 @@
 import numpy as np
-from os import path,makedirs,remove
+import sys
+from os import path,makedirs,remove,replace
 from pathlib import Path
 from datetime import datetime,timedelta
 from zipfile import ZipFile
 from glob import glob
-from spacetrack import SpaceTrackClient
-from colorama import Fore
-from time import sleep
+import logging
 
 from .try_download import wget_download
+from .instrumentation import instrument
+from .satcat_history import record_snapshot
+
+# Base URL of the Space-Track API
+SPACETRACK_URL = 'https://www.space-track.org/'
+
+# Age after which the satcat file and the qs.mag file are downloaded again
+SATCAT_MAX_AGE = timedelta(days=7)
+QSMAG_MAX_AGE = timedelta(days=180)
+
+# Whether missing credentials are asked for on the terminal; a QueryServer sets it to False, so that a missing credential raises an error instead of blocking a worker
+PROMPT_CREDENTIALS = True
+
+# Number of NORAD IDs above which the whole current GP catalog is downloaded once and filtered locally, instead of requested in parts of 500 IDs
+TLE_BULK_THRESHOLD = 3000
+
+def satcat_dir():
+    """
+    Directory of the satcat and qs.mag files, ~/src/satcat-data/
+    """
+    return str(Path.home()) + '/src/satcat-data/'
+
+def satcat_path():
+    """
+    Path of the satcat file read by the queries
+    """
+    return satcat_dir() + 'satcat.csv'
+
+def qsmag_path():
+    """
+    Path of the qs.mag file read by the queries
+    """
+    return satcat_dir() + 'qs.mag'
 
 def download_satcat():
     """
@@ -20,23 +52,33 @@ def download_satcat():
     Outputs: 
         scfile -> [str] Path of the spatial objects catalog file
     """
-    home = str(Path.home())
-    direc = home + '/src/satcat-data/'
-    
-    scfile = direc + 'satcat.csv'
+    direc = satcat_dir()
+    scfile = satcat_path()
     url = 'https://celestrak.com/pub/satcat.csv'
 
     if not path.exists(direc): makedirs(direc)
     if not path.exists(scfile):
         desc = 'Downloading the latest satellite catalog from CelesTrak'
-        wget_out = wget_download(url,scfile,desc)
+        with instrument.span('satcat_download'):
+            wget_out = wget_download(url,scfile,desc)
+        instrument.count('bytes',path.getsize(scfile),source='satcat')
+        with instrument.span('satcat_snapshot'):
+            record_snapshot(scfile)
     else:
         modified_time = datetime.fromtimestamp(path.getmtime(scfile))
-        if datetime.now() > modified_time + timedelta(days=7):
+        if datetime.now() > modified_time + SATCAT_MAX_AGE:
+            # Keep the state being replaced in the history, in case it predates the history
+            with instrument.span('satcat_snapshot'):
+                record_snapshot(scfile)
             remove(scfile)
             desc = 'Updating the satellite catalog from CELESTRAK'
-            wget_out = wget_download(url,scfile,desc) 
+            with instrument.span('satcat_download'):
+                wget_out = wget_download(url,scfile,desc) 
+            instrument.count('bytes',path.getsize(scfile),source='satcat')
+            with instrument.span('satcat_snapshot'):
+                record_snapshot(scfile)
         else:
+            instrument.count('cache_hits',source='satcat')
             print('The satellite catalog in {:s} is already the latest.'.format(direc))    
     return scfile
 
@@ -50,24 +92,27 @@ def download_qsmag():
     Outputs: 
         qsfile -> [str] Path of the qs.mag file
     """
-    home = str(Path.home())
-    direc = home + '/src/satcat-data/'
-    
+    direc = satcat_dir()
     qsfile_zip = direc + 'qsmag.zip'
-    qsfile = direc + 'qs.mag'
+    qsfile = qsmag_path()
     url = 'https://www.mmccants.org/programs/qsmag.zip'
 
     if not path.exists(direc): makedirs(direc)
     if not path.exists(qsfile):
         desc = 'Downloading the latest qs.mag data from the Mike McCants Satellite Tracking Web Pages'
-        wget_out = wget_download(url,qsfile_zip,desc)
+        with instrument.span('qsmag_download'):
+            wget_out = wget_download(url,qsfile_zip,desc)
+        instrument.count('bytes',path.getsize(qsfile_zip),source='qsmag')
     else:
         modified_time = datetime.fromtimestamp(path.getmtime(qsfile))
-        if datetime.now() > modified_time + timedelta(days=180):
+        if datetime.now() > modified_time + QSMAG_MAX_AGE:
             remove(qsfile)
             desc = 'Updating the qs.mag data from the Mike McCants Satellite Tracking Web Pages'
-            wget_out = wget_download(url,qsfile_zip,desc) 
+            with instrument.span('qsmag_download'):
+                wget_out = wget_download(url,qsfile_zip,desc) 
+            instrument.count('bytes',path.getsize(qsfile_zip),source='qsmag')
         else:
+            instrument.count('cache_hits',source='qsmag')
             print('The qs.mag data in {:s} is already the latest.'.format(direc))    
 
     if path.exists(qsfile_zip):
@@ -78,7 +123,48 @@ def download_qsmag():
 
     return qsfile
 
-def download_tle(noradids,mode='keep',dir_TLE='TLE/'):
+def _bulk_tle(st,direc):
+    """
+    Get the latest TLE of the whole catalog from Space-Track, downloaded at most once a day and cached in ~/src/spacetrack-data/.
+
+    Inputs:
+        st -> [instance of class SpaceTrackClient] Logged-in client
+        direc -> [str] Directory of the cached bulk files
+
+    Outputs:
+        bulk_file -> [str] Path of the bulk TLE file of the day
+    """
+    bulk_file = _bulk_file(direc)
+    if path.exists(bulk_file):
+        instrument.count('cache_hits',source='spacetrack')
+        return bulk_file
+
+    lines_tle = st.gp(orderby='norad_cat_id',iter_lines=True,format='tle')
+    instrument.count('requests',source='spacetrack')
+
+    # Write to a temporary file first, so that an interrupted download is never taken for the file of the day
+    nbytes = 0
+    with open(bulk_file + '.part','w') as f:
+        for line in lines_tle:
+            f.write(line+'\n')
+            nbytes += len(line)+1
+    instrument.count('bytes',nbytes,source='spacetrack')
+    _bulk_finish(bulk_file,direc)
+    return bulk_file
+
+def _bulk_file(direc):
+    date_str = datetime.utcnow().strftime("%Y%m%d")
+    return direc + 'gp_latest_{:s}.txt'.format(date_str)
+
+def _bulk_finish(bulk_file,direc):
+    """
+    Move a completely downloaded bulk file into place, and remove the bulk files of previous days.
+    """
+    replace(bulk_file + '.part',bulk_file)
+    for old_file in glob(direc + 'gp_latest_*.txt'):
+        if old_file != bulk_file: remove(old_file)
+
+def download_tle(noradids,mode='keep',dir_TLE='TLE/',bulk=None):
     """
     Download the TLE/3LE data from [SPACETRACK](https://www.space-track.org) automatically
 
@@ -98,10 +184,81 @@ def download_tle(noradids,mode='keep',dir_TLE='TLE/'):
 
         mode -> [str,optional,default='keep'] Either 'keep' the files stored in TLE directory or 'clear' the TLE directory 
         dir_TLE -> [str,optional,default='TLE/'] Path to save TLE
+        bulk -> [bool,optional,default=None] If True, the whole current catalog is downloaded once a day and filtered locally; if False, the TLE are requested in parts of 500 IDs; 
+        if None, the bulk download is used for more than TLE_BULK_THRESHOLD IDs.
 
     Outputs: 
         tle_file  -> [str] Path of TLE/3LE file.
     """
+    from spacetrack import SpaceTrackClient # Imported here to keep the package import light
+
+    noradids = _noradid_list(noradids)
+    
+    # Set the maximum of requested URL's length with a single access 
+    # The setup prevents exceeding the capacity limit of the server
+    n = 500
+    noradids_parts = [noradids[i:i + n] for i in range(0, len(noradids), n)]  
+    part_num = len(noradids_parts)    
+    
+    # username and password for Space-Track
+    direc,loginfile,username,password = _spacetrack_login()
+    filename_tle = _tle_file(dir_TLE,mode)
+    valid_ids,j = [],1
+
+    if bulk is None: bulk = len(noradids) > TLE_BULK_THRESHOLD
+
+    with SpaceTrackClient(username, password, base_url=SPACETRACK_URL) as st:
+        try:
+            st.authenticate()
+        except Exception as e:
+            _login_failed(e,loginfile)
+
+        # Write to a temporary file first, so that a failed or interrupted download never leaves a truncated TLE file in place
+        with open(filename_tle + '.part','w') as file_tle:
+            if bulk:
+                with instrument.span('tle_download'):
+                    bulk_file = _bulk_tle(st,direc)
+                valid_ids = _filter_bulk(bulk_file,noradids,file_tle)
+                noradids_parts = []
+
+            with instrument.span('tle_download'):
+                for part in noradids_parts:
+                    instrument.progress('tle_part',j,part_num)
+
+                    lines_tle = st.gp(norad_cat_id=part,iter_lines=True,format='tle')  
+                    instrument.count('requests',source='spacetrack')
+
+                    nbytes = 0
+                    for line in lines_tle:
+                        words = line.split()
+                        if words[0] == '2': valid_ids.append(words[1].lstrip('0'))
+                        file_tle.write(line+'\n')
+                        nbytes += len(line)+1
+                    instrument.count('bytes',nbytes,source='spacetrack')
+                    instrument.sleep(j+5,'rate_limit',source='spacetrack') 
+                    j += 1   
+    replace(filename_tle + '.part',filename_tle)
+
+    _record_missed(noradids,valid_ids,dir_TLE)
+    return filename_tle
+
+def _login_failed(error,loginfile):
+    """
+    Handle an error raised by the login to Space-Track. If the username or password is rejected, the login file is removed so that they are asked for again;
+    any other error, such as a network timeout, is raised unchanged.
+    """
+    from spacetrack import AuthenticationError
+
+    response = getattr(error,'response',None)
+    if isinstance(error,AuthenticationError) or getattr(response,'status_code',None) == 401:
+        remove(loginfile)
+        raise ConnectionError("401 Unauthorized: username or password entered incorrectly!") from error
+    raise error
+
+def _noradid_list(noradids):
+    """
+    Normalise NORAD IDs given as an int, a str, a list, or a file of IDs into a list of str.
+    """
     # Check whether a list is empty or not
     if not noradids: raise Exception('noradids is empty.')
 
@@ -113,22 +270,45 @@ def download_tle(noradids,mode='keep',dir_TLE='TLE/'):
             noradids = list(set(np.loadtxt(noradids,dtype=str)))
         else:
             noradids = [noradids]    
-    
-    # Set the maximum of requested URL's length with a single access 
-    # The setup prevents exceeding the capacity limit of the server
-    n = 500
-    noradids_parts = [noradids[i:i + n] for i in range(0, len(noradids), n)]  
-    part_num = len(noradids_parts)    
-    
-    # username and password for Space-Track
+    return noradids
+
+def _prompt(message,credfile,prompt=True):
+    """
+    Ask for a missing credential on the terminal, or raise an error if the process is not interactive.
+
+    Inputs:
+        message -> [str] Prompt
+        credfile -> [str] Path of the file where the credential is expected
+        prompt -> [bool,optional,default=True] If False, raise an error even in an interactive process, such as for the asyncio API
+
+    Outputs:
+        answer -> [str] Input of the user
+    """
+    if not prompt or not PROMPT_CREDENTIALS or sys.stdin is None or not sys.stdin.isatty():
+        raise Exception('{:s} is missing, and cannot be asked for on the terminal here; create it first.'.format(credfile))
+    return input(message)
+
+def _spacetrack_login(prompt=True):
+    """
+    Read the username and password for Space-Track from ~/src/spacetrack-data/spacetrack-login, and ask for them if the file does not exist.
+
+    Inputs:
+        prompt -> [bool,optional,default=True] If False, raise an error instead of asking for a missing login
+
+    Outputs:
+        direc -> [str] Directory of the Space-Track data
+        loginfile -> [str] Path of the login file
+        username -> [str] Username for Space-Track
+        password -> [str] Password for Space-Track
+    """
     home = str(Path.home())
     direc = home + '/src/spacetrack-data/'
     loginfile = direc + 'spacetrack-login'
 
     if not path.exists(direc): makedirs(direc)
     if not path.exists(loginfile):
-        username = input('Please input the username for Space-Track(which can be created at https://www.space-track.org/auth/login): ')
-        password = input('Please input the password for Space-Track: ')
+        username = _prompt('Please input the username for Space-Track(which can be created at https://www.space-track.org/auth/login): ',loginfile,prompt)
+        password = _prompt('Please input the password for Space-Track: ',loginfile,prompt)
         outfile = open(loginfile,'w')
         for element in [username,password]:
             outfile.write('{:s}\n'.format(element))
@@ -138,7 +318,12 @@ def download_tle(noradids,mode='keep',dir_TLE='TLE/'):
         username = infile.readline().strip()
         password = infile.readline().strip()
         infile.close()
-    
+    return direc,loginfile,username,password
+
+def _tle_file(dir_TLE,mode):
+    """
+    Prepare the TLE directory, clearing it in mode 'clear', and return the path of the TLE file of the day.
+    """
     # save TLE data to files  
     fileList_TLE = glob(dir_TLE+'*')
     if path.exists(dir_TLE):
@@ -148,36 +333,35 @@ def download_tle(noradids,mode='keep',dir_TLE='TLE/'):
     else:
         makedirs(dir_TLE) 
 
-    valid_ids,j = [],1
     date_str = datetime.utcnow().strftime("%Y%m%d")
-    filename_tle = dir_TLE + 'tle_{:s}.txt'.format(date_str)
-    file_tle = open(filename_tle,'w')  
-
-    st = SpaceTrackClient(username, password)
-    for part in noradids_parts:
-        desc = 'Downloading TLE data: Part {:s}{:2d}{:s} of {:2d}'.format(Fore.BLUE,j,Fore.RESET,part_num)
-        print(desc,end='\r')
+    return dir_TLE + 'tle_{:s}.txt'.format(date_str)
 
-        try:
-            lines_tle = st.tle_latest(norad_cat_id=part,ordinal=1,iter_lines=True,format='tle')  
-        except:       
-            remove(loginfile)
-            raise ConnectionError("401 Unauthorized: username or password entered incorrectly!")      
-
-        for line in lines_tle:
-            words = line.split()
-            if words[0] == '2': valid_ids.append(words[1].lstrip('0'))
-            file_tle.write(line+'\n')
-        sleep(j+5) 
-        j += 1   
-    file_tle.close()
-    print()
+def _filter_bulk(bulk_file,noradids,file_tle):
+    """
+    Copy the two lines of the requested objects from a bulk TLE file, and return the NORAD IDs found.
+    """
+    valid_ids = []
+    wanted = set(noradid.lstrip('0') for noradid in noradids)
+    with instrument.span('tle_filter'),open(bulk_file) as f:
+        line1 = None
+        for line in f:
+            if line.startswith('1 '):
+                line1 = line
+            elif line.startswith('2 ') and line1 is not None:
+                noradid = line.split()[1].lstrip('0')
+                if noradid in wanted:
+                    valid_ids.append(noradid)
+                    file_tle.write(line1+line)
+                line1 = None
+    return valid_ids
 
+def _record_missed(noradids,valid_ids,dir_TLE):
+    """
+    Store the NORAD IDs without available TLE in the TLE directory.
+    """
     missed_ids = list(set(noradids)-set(valid_ids))
     if missed_ids: 
+        date_str = datetime.utcnow().strftime("%Y%m%d")
         missed_ids_filename = dir_TLE + 'missed_ids_{:s}.txt'.format(date_str)
-        desc = '{:s}Note: space targets with unavailable TLE are stored in {:s}.{:s} '.format(Fore.RED,missed_ids_filename,Fore.RESET)
-        print(desc) 
+        logging.getLogger('satcatalogquery').warning('Note: space targets with unavailable TLE are stored in %s.',missed_ids_filename)
         np.savetxt(missed_ids_filename,missed_ids,fmt='%s')
-
-    return filename_tle     
\ No newline at end of file
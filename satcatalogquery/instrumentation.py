@@ -0,0 +1,257 @@
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+class StatsSink(object):
+    """
+    class of StatsSink, an in-memory sink aggregating the instrumentation events.
+
+    Attributes:
+        spans -> [dict] Statistics of each stage keyed by stage name, with keys 'count', 'total', and 'max' in seconds
+        counters -> [dict] Accumulated value of each counter keyed by counter name, such as 'requests', 'bytes', and 'cache_hits'
+        sleeps -> [dict] Accumulated sleep time in seconds keyed by reason, such as 'rate_limit' and 'backoff'
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __repr__(self):
+
+        return 'instance of class StatsSink'
+
+    def clear(self):
+        """
+        Clear the aggregated statistics.
+        """
+        self.spans,self.counters,self.sleeps = {},{},{}
+
+    def __call__(self,event):
+        with self._lock:
+            kind,name = event['kind'],event['name']
+            if kind == 'span':
+                span = self.spans.setdefault(name,{'count':0,'total':0.0,'max':0.0})
+                span['count'] += 1
+                span['total'] += event['duration']
+                span['max'] = max(span['max'],event['duration'])
+            elif kind == 'counter':
+                self.counters[name] = self.counters.get(name,0) + event['value']
+            elif kind == 'sleep':
+                self.sleeps[name] = self.sleeps.get(name,0.0) + event['duration']
+
+    def summary(self):
+        """
+        Summarize the aggregated statistics as text.
+
+        Usage:
+            print(stats.summary())
+
+        Outputs:
+            text -> [str] One line per stage, counter, and sleep reason
+        """
+        lines = []
+        for name,span in sorted(self.spans.items(),key=lambda item: -item[1]['total']):
+            lines.append('{:<24s} {:10.3f} s  calls {:6d}  max {:10.3f} s'.format(name,span['total'],span['count'],span['max']))
+        for name,value in sorted(self.counters.items()):
+            lines.append('{:<24s} {:>12}'.format(name,value))
+        for name,duration in sorted(self.sleeps.items()):
+            lines.append('{:<24s} {:10.3f} s'.format('sleep:' + name,duration))
+        return '\n'.join(lines)
+
+class LoggingSink(object):
+    """
+    class of LoggingSink, a sink writing the instrumentation events to a logger.
+
+    Inputs:
+        logger -> [logging.Logger,optional,default=None] Logger to write to; if None, the logger 'satcatalogquery' is used
+        level -> [int,optional,default=logging.INFO] Logging level of the events
+    """
+
+    def __init__(self,logger=None,level=logging.INFO):
+        self.logger = logger or logging.getLogger('satcatalogquery')
+        self.level = level
+
+    def __repr__(self):
+
+        return 'instance of class LoggingSink'
+
+    def __call__(self,event):
+        if not self.logger.isEnabledFor(self.level): return
+        kind,name = event['kind'],event['name']
+        if kind == 'span':
+            self.logger.log(self.level,'%s finished in %.3f s',name,event['duration'])
+        elif kind == 'progress':
+            self.logger.log(self.level,'%s: %d of %d',name,event['current'],event['total'])
+        elif kind == 'sleep':
+            self.logger.log(self.level,'%s: sleeping %.1f s',name,event['duration'])
+        elif kind == 'counter' and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('%s += %s',name,event['value'])
+
+class ConsoleSink(object):
+    """
+    class of ConsoleSink, a sink showing the progress of multi-step stages, such as the pages of a DISCOS query and the parts of a TLE download, on one updating line of the console.
+
+    Inputs:
+        stream -> [file-like object,optional,default=None] Stream to write to; if None, sys.stderr is used
+    """
+
+    def __init__(self,stream=None):
+        self.stream = stream
+
+    def __repr__(self):
+
+        return 'instance of class ConsoleSink'
+
+    def __call__(self,event):
+        if event['kind'] != 'progress': return
+        stream = self.stream or sys.stderr
+        if stream is None: return
+        current,total = event['current'],event['total']
+        stream.write('\r{:s}: {:d} of {:d}'.format(event['name'],current,total) + ('\n' if current >= total else ''))
+        stream.flush()
+
+class CallbackSink(object):
+    """
+    class of CallbackSink, a sink passing every instrumentation event to a callback.
+
+    Inputs:
+        callback -> [callable] Function called with each event, which is a dict with at least the keys 'kind', 'name', and 'time'
+    """
+
+    def __init__(self,callback):
+        self.callback = callback
+
+    def __repr__(self):
+
+        return 'instance of class CallbackSink'
+
+    def __call__(self,event):
+        self.callback(event)
+
+class Instrument(object):
+    """
+    class of Instrument, which emits timing and counter events of queries and downloads to pluggable sinks.
+
+    Each event is a dict with the keys 'kind', 'name', and 'time', where 'kind' is one of
+        'span' -> a stage finished, with the key 'duration' in seconds
+        'counter' -> a counter is incremented, with the key 'value'
+        'sleep' -> a pause for rate limiting or backoff, with the key 'duration' in seconds
+        'progress' -> a step of a multi-step stage, with the keys 'current' and 'total'
+    Extra keyword arguments of the emitting call are added to the event.
+
+    Inputs:
+        sinks -> [list of callable,optional,default=None] Sinks receiving the events, such as StatsSink, ConsoleSink, LoggingSink, and CallbackSink
+        sleep_func -> [callable,optional,default=time.sleep] Function performing the pauses
+        async_sleep_func -> [coroutine function,optional,default=None] Function performing the pauses of the asyncio API; if None, asyncio.sleep is used
+
+    Methods:
+        add_sink -> Add a sink.
+        remove_sink -> Remove a sink.
+        collect -> Collect statistics in a StatsSink within a with-block.
+        span -> Time a stage within a with-block.
+        count -> Increment a counter.
+        sleep -> Sleep and record the pause.
+        sleep_async -> Sleep without blocking the event loop and record the pause.
+        progress -> Report the progress of a stage.
+    """
+
+    def __init__(self,sinks=None,sleep_func=time.sleep,async_sleep_func=None):
+        self.sinks = list(sinks) if sinks is not None else []
+        self.sleep_func = sleep_func
+        self.async_sleep_func = async_sleep_func
+
+    def __repr__(self):
+
+        return 'instance of class Instrument'
+
+    def add_sink(self,sink):
+        """
+        Add a sink, which is any callable taking an event dict.
+
+        Usage:
+            instrument.add_sink(StatsSink())
+            instrument.add_sink(CallbackSink(print))
+        """
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self,sink):
+        """
+        Remove a sink.
+        """
+        if sink in self.sinks: self.sinks.remove(sink)
+
+    def emit(self,kind,name,**fields):
+        """
+        Emit an event to all sinks.
+        """
+        if not self.sinks: return
+        event = {'kind':kind,'name':name,'time':time.time()}
+        event.update(fields)
+        for sink in list(self.sinks):
+            sink(event)
+
+    @contextmanager
+    def collect(self):
+        """
+        Collect statistics in a StatsSink within a with-block.
+
+        Usage:
+            with instrument.collect() as stats:
+                satcatalog = SatCatalog.objects_query(DECAYED=False,RCSAvg=[5,15])
+            print(stats.summary())
+        """
+        sink = self.add_sink(StatsSink())
+        try:
+            yield sink
+        finally:
+            self.remove_sink(sink)
+
+    @contextmanager
+    def span(self,name,**fields):
+        """
+        Time a stage within a with-block.
+
+        Usage:
+            with instrument.span('satcat_parse'):
+                ...
+        """
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.emit('span',name,duration=time.perf_counter()-t0,**fields)
+
+    def count(self,name,value=1,**fields):
+        """
+        Increment a counter, such as 'requests', 'bytes', or 'cache_hits'.
+        """
+        self.emit('counter',name,value=value,**fields)
+
+    def sleep(self,seconds,name='rate_limit',**fields):
+        """
+        Sleep and record the pause, such as for 'rate_limit' or 'backoff'.
+        """
+        self.emit('sleep',name,duration=seconds,**fields)
+        self.sleep_func(seconds)
+
+    async def sleep_async(self,seconds,name='rate_limit',**fields):
+        """
+        Sleep without blocking the event loop and record the pause; the pause is cancelled with the awaiting task.
+        """
+        self.emit('sleep',name,duration=seconds,**fields)
+        sleep_func = self.async_sleep_func
+        if sleep_func is None:
+            from asyncio import sleep as sleep_func # Imported here to keep the package import light
+        await sleep_func(seconds)
+
+    def progress(self,name,current,total,**fields):
+        """
+        Report the progress of a multi-step stage, such as pages of a DISCOS query.
+        """
+        self.emit('progress',name,current=current,total=total,**fields)
+
+# Instrument shared by all queries and downloads of the package, showing progress on the console and logging the events to the logger 'satcatalogquery'
+instrument = Instrument([ConsoleSink(),LoggingSink()])
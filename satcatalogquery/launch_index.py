@@ -0,0 +1,178 @@
+import re
+import numpy as np
+import pandas as pd
+from fnmatch import translate
+
+# International designator, such as '1999-025A' or '2022-001BZ'
+COSPAR_PATTERN = r'^(\d{4})-(\d{3})([A-Z]*)$'
+
+class LaunchIndex(object):
+    """
+    class of LaunchIndex, an index of COSPAR IDs parsed into launch year, launch number, and piece, sorted by launch.
+
+    All pieces of a launch, and all launches of a range of years, are contiguous in the sorted order, and are located by binary search.
+
+    Inputs:
+        keys -> [array of int] Launch keys year*1000 + launch number in sorted order; -1 for unparsable COSPAR IDs
+        rows -> [array of int] Row positions in the catalog of the sorted keys
+        cospar -> [array of str] COSPAR IDs in order of the rows of the catalog
+
+    Methods:
+        build -> Build the index of the COSPAR IDs of a catalog.
+        launch -> Row positions of all pieces of a launch.
+        years -> Row positions of the objects launched within a range of years.
+        match -> Row positions of the COSPAR IDs matching a pattern.
+    """
+
+    def __init__(self,keys,rows,cospar):
+        self.keys = keys
+        self.rows = rows
+        self.cospar = cospar
+
+    def __repr__(self):
+
+        return 'instance of class LaunchIndex'
+
+    @staticmethod
+    def build(cospar):
+        """
+        Build the index of the COSPAR IDs of a catalog.
+
+        Usage:
+            index = LaunchIndex.build(df['COSPAR_ID'])
+
+        Inputs:
+            cospar -> [pandas series] COSPAR IDs in order of the rows of the catalog
+        """
+        parts = cospar.fillna('').astype(str).str.extract(COSPAR_PATTERN)
+        year = pd.to_numeric(parts[0],errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        num = pd.to_numeric(parts[1],errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+        keys = np.where(year >= 0,year*1000 + num,-1)
+        rows = np.argsort(keys,kind='stable')
+        return LaunchIndex(keys[rows],rows,cospar.fillna('').astype(str).to_numpy(dtype=object))
+
+    def _between(self,key_lo,key_hi):
+        lo = np.searchsorted(self.keys,key_lo,side='left')
+        hi = np.searchsorted(self.keys,key_hi,side='right')
+        return self.rows[lo:hi]
+
+    def launch(self,year,num):
+        """
+        Row positions of all pieces of a launch, such as year 1999 and launch number 25.
+        """
+        key = year*1000 + num
+        return self._between(key,key)
+
+    def years(self,year_lo,year_hi):
+        """
+        Row positions of the objects launched from year_lo to year_hi, both inclusive.
+        """
+        return self._between(year_lo*1000,year_hi*1000 + 999)
+
+    def match(self,pattern):
+        """
+        Row positions of the COSPAR IDs matching a pattern.
+
+        Usage:
+            rows = index.match('1999-025A') # exact ID
+            rows = index.match('1999-025*') # all pieces of a launch
+            rows = index.match('2022-*') # all launches of a year
+            rows = index.match('1999-025[A-C]') # glob within a launch
+
+        Inputs:
+            pattern -> [str] Exact COSPAR ID, or a glob pattern with the wildcards '*', '?', and '[...]'
+
+        Outputs:
+            rows -> [array of int] Row positions in the catalog
+        """
+        pattern = pattern.upper()
+
+        # Narrow down to the pieces of a launch, or to the launches of a year
+        m = re.match(r'(\d{4})-(\d{3})',pattern)
+        if m is not None:
+            candidates = self.launch(int(m.group(1)),int(m.group(2)))
+            if pattern[m.end():] == '*': return candidates
+        else:
+            m = re.match(r'(\d{4})',pattern)
+            if m is not None:
+                candidates = self.years(int(m.group(1)),int(m.group(1)))
+                if pattern[m.end():] in ['*','-*']: return candidates
+            else:
+                candidates = self.rows
+
+        regex = re.compile(translate(pattern))
+        found = np.fromiter((regex.match(cospar) is not None for cospar in self.cospar[candidates]),dtype=bool,count=len(candidates))
+        return candidates[found]
+
+def launch_flag(index,COSPAR_ID=None,LAUNCH_YEAR=None,n=0):
+    """
+    Flag the rows of a catalog matching COSPAR ID patterns and a range of launch years.
+
+    Inputs:
+        index -> [instance of class LaunchIndex] Index of the catalog
+        COSPAR_ID -> [str or list of str,optional,default=None] Exact COSPAR IDs or glob patterns, such as '1999-025*'; if None, this option is ignored
+        LAUNCH_YEAR -> [list of int,optional,default=None] Range of launch years in form of [year1,year2], both inclusive; if None, this option is ignored
+        n -> [int] Number of rows of the catalog
+
+    Outputs:
+        flag -> [array of bool] True for the matched rows
+    """
+    flag = np.ones(n,dtype=bool)
+    if COSPAR_ID is not None:
+        if type(COSPAR_ID) is str: COSPAR_ID = [COSPAR_ID]
+        matched = np.zeros(n,dtype=bool)
+        for pattern in COSPAR_ID:
+            matched[index.match(pattern)] = True
+        flag &= matched
+    if LAUNCH_YEAR is not None:
+        matched = np.zeros(n,dtype=bool)
+        matched[index.years(int(LAUNCH_YEAR[0]),int(LAUNCH_YEAR[1]))] = True
+        flag &= matched
+    return flag
+
+def discos_launch_filter(COSPAR_ID=None,LAUNCH_YEAR=None):
+    """
+    Translate COSPAR ID patterns and a range of launch years into a filter expression of the DISCOS API.
+
+    Exact IDs are sent as eq/in, patterns with a literal prefix followed by a single trailing '*', such as '1999-025*', as startswith, and a range of launch years as a ge/lt range on cosparId.
+    Other glob patterns are narrowed by startswith on their literal prefix only, and have to be refined locally on the returned records.
+
+    Usage:
+        expr,exact = discos_launch_filter('1999-025*',[2020,2023])
+
+    Inputs:
+        COSPAR_ID -> [str or list of str,optional,default=None] Exact COSPAR IDs or glob patterns; if None, this option is ignored
+        LAUNCH_YEAR -> [list of int,optional,default=None] Range of launch years in form of [year1,year2], both inclusive; if None, this option is ignored
+
+    Outputs:
+        expr -> [str] Filter expression, or None if nothing can be sent to the API
+        exact -> [bool] Whether the expression selects exactly the matched COSPAR IDs
+    """
+    terms,exact = [],True
+    if COSPAR_ID is not None:
+        if type(COSPAR_ID) is str: COSPAR_ID = [COSPAR_ID]
+        ids,prefixes = [],[]
+        for pattern in COSPAR_ID:
+            pattern = pattern.upper()
+            literal = re.split(r'[*?\[]',pattern,maxsplit=1)[0]
+            if literal == pattern:
+                ids.append(pattern)
+            else:
+                if pattern != literal + '*': exact = False
+                prefixes.append(literal)
+
+        if '' in prefixes: # a pattern starting with a wildcard cannot be narrowed
+            exact = False
+        else:
+            group = ["startswith(cosparId,'{:s}')".format(prefix) for prefix in prefixes]
+            if len(ids) == 1:
+                group.append("eq(cosparId,'{:s}')".format(ids[0]))
+            elif ids:
+                group.append('in(cosparId,{:s})'.format(str(tuple(ids))).replace(' ', ''))
+            terms.append('|'.join(group))
+
+    if LAUNCH_YEAR is not None:
+        terms.append("ge(cosparId,'{:d}-')&lt(cosparId,'{:d}-')".format(int(LAUNCH_YEAR[0]),int(LAUNCH_YEAR[1])+1))
+
+    expr = '&'.join('(' + term + ')' for term in terms) if terms else None
+    return expr,exact
@@ -0,0 +1,133 @@
+import re
+import numpy as np
+import pandas as pd
+from os import path
+from fnmatch import translate
+
+# Characters starting a wildcard of a glob pattern
+WILDCARDS = '*?['
+
+class NameIndex(object):
+    """
+    class of NameIndex, a sorted index of upper-cased object names for case-insensitive exact, prefix, glob, and substring matching.
+
+    A prefix is located by binary search over the sorted names, and a glob pattern is matched only within the range of its literal prefix,
+    so that constellation queries such as 'STARLINK-*' do not scan all names.
+
+    Inputs:
+        keys -> [array of str] Upper-cased names in sorted order
+        rows -> [array of int] Row positions in the catalog of the sorted names
+
+    Methods:
+        build -> Build the index of the names of a catalog.
+        load -> Load a persisted index.
+        save -> Persist the index.
+        prefix -> Row positions of the names starting with a prefix.
+        match -> Row positions of the names matching a pattern.
+    """
+
+    def __init__(self,keys,rows):
+        self.keys = keys
+        self.rows = rows
+
+    def __repr__(self):
+
+        return 'instance of class NameIndex'
+
+    @staticmethod
+    def build(names):
+        """
+        Build the index of the names of a catalog.
+
+        Usage:
+            index = NameIndex.build(df['OBJECT_NAME'])
+
+        Inputs:
+            names -> [pandas series] Object names in order of the rows of the catalog; missing names are indexed as ''
+        """
+        keys = names.fillna('').astype(str).str.upper().to_numpy(dtype=str)
+        rows = np.argsort(keys,kind='stable')
+        return NameIndex(keys[rows],rows)
+
+    @staticmethod
+    def load(filename,version):
+        """
+        Load a persisted index if it was built for the given version of the catalog, otherwise return None.
+        """
+        if not path.exists(filename): return None
+        with np.load(filename) as npz:
+            if npz['version'].tolist() != list(version): return None
+            return NameIndex(npz['keys'],npz['rows'])
+
+    def save(self,filename,version):
+        """
+        Persist the index together with the version of the catalog, such as the modification time and the size of the satcat file.
+        """
+        np.savez(filename,keys=self.keys,rows=self.rows,version=np.array(version,dtype=float))
+
+    def _range(self,prefix):
+        lo = np.searchsorted(self.keys,prefix,side='left')
+        hi = np.searchsorted(self.keys,prefix + '\U0010ffff',side='left')
+        return lo,hi
+
+    def prefix(self,prefix):
+        """
+        Row positions of the names starting with a prefix, case-insensitively.
+        """
+        lo,hi = self._range(prefix.upper())
+        return self.rows[lo:hi]
+
+    def match(self,pattern):
+        """
+        Row positions of the names matching a pattern, case-insensitively.
+
+        Usage:
+            rows = index.match('STARLINK-*') # prefix
+            rows = index.match('COSMOS 2251 DEB') # exact name
+            rows = index.match('*DEB*') # substring
+            rows = index.match('COSMOS 22?? DEB') # glob
+
+        Inputs:
+            pattern -> [str] Exact name, or a glob pattern with the wildcards '*', '?', and '[...]'
+
+        Outputs:
+            rows -> [array of int] Row positions in the catalog
+        """
+        pattern = pattern.upper()
+        literal = re.split('[' + re.escape(WILDCARDS) + ']',pattern,maxsplit=1)[0]
+
+        if literal == pattern: # exact name
+            lo = np.searchsorted(self.keys,pattern,side='left')
+            hi = np.searchsorted(self.keys,pattern,side='right')
+            return self.rows[lo:hi]
+        if pattern == literal + '*': # prefix
+            return self.prefix(literal)
+
+        inner = pattern[1:-1]
+        if not literal and pattern.startswith('*') and pattern.endswith('*') and inner and not any(c in inner for c in WILDCARDS): # substring
+            found = pd.Series(self.keys).str.contains(inner,regex=False).to_numpy()
+            return self.rows[found]
+
+        # General glob, checked only within the range of the literal prefix
+        lo,hi = self._range(literal)
+        regex = re.compile(translate(pattern))
+        found = np.fromiter((regex.match(key) is not None for key in self.keys[lo:hi]),dtype=bool,count=hi-lo)
+        return self.rows[lo:hi][found]
+
+def name_flag(index,patterns,n):
+    """
+    Flag the rows of a catalog whose names match any of the patterns.
+
+    Inputs:
+        index -> [instance of class NameIndex] Index of the catalog
+        patterns -> [str or list of str] Exact names or glob patterns
+        n -> [int] Number of rows of the catalog
+
+    Outputs:
+        flag -> [array of bool] True for the matched rows
+    """
+    if type(patterns) is str: patterns = [patterns]
+    flag = np.zeros(n,dtype=bool)
+    for pattern in patterns:
+        flag[index.match(pattern)] = True
+    return flag
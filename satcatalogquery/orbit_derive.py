@@ -0,0 +1,72 @@
+import numpy as np
+
+from . import Const
+
+# Mean motion of the Sun along the ecliptic, [deg/day]
+SUN_RATE = 360/365.2422
+# Tolerance of the RAAN drift rate around SUN_RATE for a sun-synchronous orbit, [deg/day]
+SSO_TOL = 0.05
+# Nominal altitude of the geostationary orbit and the half width of the GEO band, [km]
+GEO_ALT,GEO_BAND = 35786,200
+# Apogee altitude below which an orbit is LEO, [km]
+LEO_APOGEE = 2000
+# Eccentricity above which an orbit is HEO
+HEO_ECC = 0.25
+
+# Columns added by derive_orbit_columns
+DERIVED_COLUMNS = ['SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT','SSO','ORBIT_REGIME']
+
+def derive_orbit_columns(data):
+    """
+    Derive the orbital columns of a catalog in one vectorised pass, with the WGS84 constants of the Const module.
+
+    Usage:
+        data = derive_orbit_columns(data)
+
+    Inputs:
+        data -> [pandas dataframe] Catalog with the columns 'APOGEE' and 'PERIGEE' in [km], 'PERIOD' in [min], and 'INCLINATION' in [deg]
+
+    Outputs:
+        data -> [pandas dataframe] The same data frame with the columns
+            MEAN_ALT -> [float] Mean altitude in [km]
+            SMA -> [float] Semi-major axis in [km]
+            ECC -> [float] Eccentricity
+            MEAN_MOTION -> [float] Mean motion in [rev/day], from the catalogued period
+            RAAN_DOT -> [float] Drift rate of the right ascension of the ascending node due to J2 in [deg/day]
+            ARGP_DOT -> [float] Drift rate of the argument of perigee due to J2 in [deg/day]
+            SSO -> [bool] Whether the RAAN drift rate matches the mean motion of the Sun within SSO_TOL
+            ORBIT_REGIME -> [str] 'LEO', 'MEO', 'GEO', or 'HEO'(highly eccentric or beyond GEO); missing if the orbit is unknown
+
+    Note:
+        Altitudes of the satcat are above the equatorial radius, so the semi-major axis and the eccentricity are computed with Const.Re.
+    """
+    apogee,perigee = data['APOGEE'].to_numpy(dtype=float),data['PERIGEE'].to_numpy(dtype=float)
+    period,inc = data['PERIOD'].to_numpy(dtype=float),np.deg2rad(data['INCLINATION'].to_numpy(dtype=float))
+
+    mean_alt = (apogee + perigee)/2
+    sma = mean_alt + Const.Re
+    ecc = (apogee - perigee)/(2*sma)
+
+    # Secular J2 rates, with the mean motion of the Kepler orbit
+    with np.errstate(invalid='ignore',divide='ignore'):
+        n = np.sqrt(Const.mu/sma**3) # [rad/s]
+        k = 1.5*n*Const.J2*(Const.Re/(sma*(1 - ecc**2)))**2
+        raan_dot = np.rad2deg(-k*np.cos(inc))*86400
+        argp_dot = np.rad2deg(k*(2 - 2.5*np.sin(inc)**2))*86400
+        mean_motion = 1440/period
+
+    regime = np.select([ecc > HEO_ECC,apogee < LEO_APOGEE,(np.abs(mean_alt - GEO_ALT) < GEO_BAND) & (ecc < 0.01),mean_alt < GEO_ALT],['HEO','LEO','GEO','MEO'],'HEO').astype(object)
+    unknown = np.isnan(mean_alt) | (perigee <= 0)
+    if 'ORBIT_CENTER' in data.columns: unknown |= (data['ORBIT_CENTER'] != 'EA').to_numpy()
+    regime[unknown] = None
+
+    data['MEAN_ALT'] = mean_alt
+    data['SMA'] = sma
+    data['ECC'] = ecc
+    data['MEAN_MOTION'] = mean_motion
+    data['RAAN_DOT'] = raan_dot
+    data['ARGP_DOT'] = argp_dot
+    data['SSO'] = np.abs(raan_dot - SUN_RATE) < SSO_TOL
+    data['ORBIT_REGIME'] = regime
+
+    return data
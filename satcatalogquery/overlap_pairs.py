@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+def _range_pairs(lo,hi,chunk_size):
+    """
+    Enumerate the pairs (i,j) with lo[i] <= j < hi[i] in chunks of flat pair indices, so the memory is bounded by chunk_size rather than by the number of pairs.
+    """
+    counts = np.maximum(hi - lo,0)
+    cum = np.cumsum(counts)
+    starts = cum - counts
+    total = int(cum[-1]) if len(cum) else 0
+
+    for k0 in range(0,total,chunk_size):
+        k = np.arange(k0,min(k0 + chunk_size,total))
+        i = np.searchsorted(cum,k,side='right')
+        yield i,lo[i] + (k - starts[i])
+
+def _sweep(a,b,pad,chunk_size):
+    """
+    Pairs of the indices a and b whose intervals [perigee - pad,apogee + pad] overlap, where both are sorted by perigee; if a is b, each pair within a is given once.
+    """
+    perigee_a,apogee_a,perigee_b,apogee_b = a[0],a[1],b[0],b[1]
+    if a is b:
+        # Partners of object i are the objects i+1,...,end[i]-1
+        end = np.searchsorted(perigee_a,apogee_a + pad,side='right')
+        yield from _range_pairs(np.arange(1,len(perigee_a)+1),end,chunk_size)
+        return
+    # Pairs where the perigee of a is the lower one, then those where the perigee of b is strictly lower
+    lo = np.searchsorted(perigee_b,perigee_a,side='left')
+    hi = np.searchsorted(perigee_b,apogee_a + pad,side='right')
+    yield from _range_pairs(lo,hi,chunk_size)
+    lo = np.searchsorted(perigee_a,perigee_b,side='right')
+    hi = np.searchsorted(perigee_a,apogee_b + pad,side='right')
+    for j,i in _range_pairs(lo,hi,chunk_size):
+        yield i,j
+
+def _overlap_pairs(df,pad=0,inc_tol=None,chunk_size=1000000):
+    """
+    Find all pairs of objects whose perigee-apogee altitude shells overlap, with a sort-and-sweep over the intervals.
+
+    The intervals are sorted by perigee, so that the partners of an object are the contiguous run of objects whose perigee lies between its perigee and its apogee plus pad,
+    which is found by a binary search. The pairs are enumerated in chunks of flat pair indices, so the memory is bounded by chunk_size rather than by the number of pairs.
+    If inc_tol is set, the objects are first bucketed by inclination in bins of width inc_tol, and only the pairs within a bucket or between neighbouring buckets are swept,
+    so that pairs far apart in inclination are never enumerated.
+
+    Inputs:
+        df -> [pandas dataframe] Catalog with the columns 'NORAD_ID', 'PERIGEE', and 'APOGEE', and 'INCLINATION' if inc_tol is set
+        pad -> [float,optional,default=0] Margin in [km] by which the shells are allowed to miss each other
+        inc_tol -> [float,optional,default=None] Maximum difference of inclination in [deg] of a pair; if None, this option is ignored
+        chunk_size -> [int,optional,default=1000000] Maximum number of candidate pairs examined per chunk
+
+    Outputs:
+        pairs -> [generator of pandas dataframe] Chunks with the columns 'NORAD_ID_1' and 'NORAD_ID_2', where the first has the lower perigee, 'OVERLAP_MIN' and 'OVERLAP_MAX', the altitude range[km] shared by the pair,
+        and 'GAP', the distance[km] by which the shells miss each other. For the pairs admitted by pad with a GAP > 0, the range collapses to the apogee of the lower shell.
+    """
+    columns = ['NORAD_ID','PERIGEE','APOGEE'] + (['INCLINATION'] if inc_tol is not None else [])
+    data = df[columns].dropna()
+
+    perigee = data['PERIGEE'].to_numpy(dtype=float)
+    order = np.argsort(perigee,kind='stable')
+    perigee = perigee[order]
+    apogee = data['APOGEE'].to_numpy(dtype=float)[order]
+    noradids = data['NORAD_ID'].to_numpy(dtype=np.int64)[order]
+
+    if inc_tol is None:
+        buckets = {0:np.arange(len(perigee))}
+    else:
+        inc = data['INCLINATION'].to_numpy(dtype=float)[order]
+        keys = np.floor(inc/inc_tol).astype(np.int64) if inc_tol > 0 else np.unique(inc,return_inverse=True)[1]
+        # A stable sort keeps each bucket sorted by perigee
+        by_key = np.argsort(keys,kind='stable')
+        bounds = np.flatnonzero(np.diff(keys[by_key])) + 1
+        buckets = {int(keys[members[0]]):members for members in np.split(by_key,bounds) if len(members)}
+
+    for key,members in buckets.items():
+        # Pairs within inc_tol lie in the same bucket or in the next one
+        a = (perigee[members],apogee[members])
+        neighbours = [(members,a)]
+        if inc_tol is not None and inc_tol > 0 and key + 1 in buckets:
+            others = buckets[key + 1]
+            neighbours.append((others,(perigee[others],apogee[others])))
+        for others,b in neighbours:
+            for i,j in _sweep(a,a if others is members else b,pad,chunk_size):
+                i,j = members[i],others[j]
+                if inc_tol is not None:
+                    keep = np.abs(inc[i] - inc[j]) <= inc_tol
+                    i,j = i[keep],j[keep]
+                if not len(i): continue
+                # Indices follow the perigee order, so the smaller one has the lower perigee
+                i,j = np.minimum(i,j),np.maximum(i,j)
+                overlap_max = np.minimum(apogee[i],apogee[j])
+                gap = np.maximum(perigee[j] - overlap_max,0)
+                yield pd.DataFrame({'NORAD_ID_1':noradids[i],'NORAD_ID_2':noradids[j],
+                                    'OVERLAP_MIN':perigee[j] - gap,'OVERLAP_MAX':overlap_max,'GAP':gap})
@@ -0,0 +1,318 @@
+import numpy as np
+import pandas as pd
+
+from . import Const
+from .instrumentation import instrument
+
+# Default cell sizes of the grid: inclination[deg], RAAN[deg], and mean motion[rev/day]
+PLANE_CELL = (0.5,1.0,0.1)
+
+def parse_tle(tle_file):
+    """
+    Parse the orbital elements of a TLE/3LE file, such as the output of download_tle.
+    If an object has several element sets, the one of the latest epoch is kept.
+
+    Usage:
+        elements = parse_tle(tle_file)
+
+    Inputs:
+        tle_file -> [str] Path of the TLE/3LE file
+
+    Outputs:
+        elements -> [pandas dataframe] Data frame with the columns 'NORAD_ID', 'EPOCH', 'INCLINATION'[deg], 'RAAN'[deg], 'ECC', 'ARGP'[deg], 'MEAN_ANOMALY'[deg], and 'MEAN_MOTION'[rev/day]
+    """
+    with instrument.span('tle_parse'):
+        with open(tle_file) as f:
+            lines = [line.rstrip() for line in f]
+        # Pair each line 2 with the line 1 before it; the title lines of 3LE are skipped
+        pairs = [(lines[k-1],lines[k]) for k in range(1,len(lines)) if lines[k].startswith('2 ') and lines[k-1].startswith('1 ')]
+        line1 = [l1 for l1,l2 in pairs]
+        line2 = [l2 for l1,l2 in pairs]
+
+        yy = np.array([int(l1[18:20]) for l1 in line1],dtype=np.int64)
+        year = np.where(yy < 57,2000 + yy,1900 + yy) # two-digit years of TLE run from 1957 to 2056
+        day = np.array([float(l1[20:32]) for l1 in line1])
+        epoch = pd.to_datetime(pd.Series(year).astype(str),format='%Y') + pd.to_timedelta(day - 1,unit='D')
+
+        elements = pd.DataFrame({'NORAD_ID':np.array([int(l2[2:7]) for l2 in line2],dtype=np.int64),'EPOCH':epoch.to_numpy(),
+                                 'INCLINATION':[float(l2[8:16]) for l2 in line2],'RAAN':[float(l2[17:25]) for l2 in line2],
+                                 'ECC':[float('.' + l2[26:33].strip()) for l2 in line2],'ARGP':[float(l2[34:42]) for l2 in line2],
+                                 'MEAN_ANOMALY':[float(l2[43:51]) for l2 in line2],'MEAN_MOTION':[float(l2[52:63]) for l2 in line2]})
+        elements = elements.sort_values(['NORAD_ID','EPOCH']).drop_duplicates('NORAD_ID',keep='last').reset_index(drop=True)
+    return elements
+
+def raan_rate(inc,ecc,mean_motion):
+    """
+    Drift rate of the RAAN due to J2 in [deg/day], from the inclination[deg], the eccentricity, and the mean motion[rev/day].
+    """
+    n = np.asarray(mean_motion,dtype=float)*2*np.pi/86400 # [rad/s]
+    with np.errstate(divide='ignore',invalid='ignore'):
+        sma = (Const.mu/n**2)**(1/3)
+        k = 1.5*n*Const.J2*(Const.Re/(sma*(1 - np.asarray(ecc,dtype=float)**2)))**2
+    return np.rad2deg(-k*np.cos(np.deg2rad(inc)))*86400
+
+def _raan_dist(raan1,raan2):
+    """
+    Angular distance[deg] between RAAN, accounting for the wrap-around at 360 deg.
+    """
+    d = np.abs(raan1 - raan2) % 360
+    return np.minimum(d,360 - d)
+
+def _plane_angle(inc1,raan1,inc2,raan2):
+    """
+    Angle[deg] between the normals of two orbital planes.
+    """
+    inc1,inc2,draan = np.deg2rad(inc1),np.deg2rad(inc2),np.deg2rad(raan1 - raan2)
+    cos = np.cos(inc1)*np.cos(inc2) + np.sin(inc1)*np.sin(inc2)*np.cos(draan)
+    return np.rad2deg(np.arccos(np.clip(cos,-1,1)))
+
+def _ranges(lo,hi):
+    """
+    Concatenate the integer ranges [lo,hi).
+    """
+    counts = np.maximum(hi - lo,0)
+    total = int(counts.sum())
+    starts = np.cumsum(counts) - counts
+    return np.repeat(lo - starts,counts) + np.arange(total)
+
+def _union(labels,i,j):
+    """
+    Merge the components of the pairs (i,j) in place, by hooking the larger root onto the smaller one and compressing the paths until all pairs share a root.
+    """
+    while True:
+        li,lj = labels[i],labels[j]
+        differ = li != lj
+        if not differ.any(): return labels
+        li,lj = li[differ],lj[differ]
+        m = np.minimum(li,lj)
+        np.minimum.at(labels,li,m)
+        np.minimum.at(labels,lj,m)
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all(): break
+            labels[:] = jumped
+
+def _cell_keys(cell,shape,inc,raan,n):
+    """
+    Flat grid cells of the elements, with the mean motion varying fastest.
+    """
+    d_inc,d_raan,d_n = cell
+    n_inc,n_raan,n_n = shape
+    ii = np.clip(np.floor(inc/d_inc).astype(np.int64),0,n_inc - 1)
+    rr = np.floor((raan % 360)/d_raan).astype(np.int64) % n_raan
+    nn = np.clip(np.floor(n/d_n).astype(np.int64),0,n_n - 1)
+    return (ii*n_raan + rr)*n_n + nn
+
+class PlaneIndex(object):
+    """
+    class of PlaneIndex, a grid index of orbital elements over inclination, RAAN, and mean motion.
+
+    The elements are sorted by grid cell, with the mean motion varying fastest, so that the objects of a cell of inclination and RAAN, over any range of mean motion, are contiguous in the sorted order and are located by binary search.
+    A query only visits the cells within its tolerances, and the RAAN cells are taken modulo 360 deg, so that planes on either side of 0 deg are found together.
+
+    Inputs:
+        elements -> [pandas dataframe] Orbital elements as from parse_tle, sorted by keys
+        keys -> [array of int] Grid cells of the elements in sorted order
+        cell -> [tuple of float] Cell sizes of inclination[deg], RAAN[deg], and mean motion[rev/day]
+        shape -> [tuple of int] Numbers of cells of inclination, RAAN, and mean motion
+
+    Methods:
+        build -> Build the index of a data frame of orbital elements.
+        from_tle -> Build the index of a TLE/3LE file.
+        neighbours -> Objects near a given inclination, RAAN, and mean motion.
+        coplanar -> Objects sharing the orbital plane of a given object.
+        clusters -> Group the objects into orbital planes.
+    """
+
+    def __init__(self,elements,keys,cell,shape):
+        self.elements = elements
+        self.keys = keys
+        self.cell = cell
+        self.shape = shape
+        self.inc = elements['INCLINATION'].to_numpy(dtype=float)
+        self.raan = elements['RAAN'].to_numpy(dtype=float)
+        self.n = elements['MEAN_MOTION'].to_numpy(dtype=float)
+        noradids = elements['NORAD_ID'].to_numpy(dtype=np.int64)
+        self._norad_rows = np.argsort(noradids,kind='stable')
+        self._noradids = noradids[self._norad_rows]
+
+    def __repr__(self):
+
+        return 'instance of class PlaneIndex'
+
+    @staticmethod
+    def build(elements,cell=PLANE_CELL):
+        """
+        Build the index of a data frame of orbital elements.
+
+        Usage:
+            index = PlaneIndex.build(elements)
+
+        Inputs:
+            elements -> [pandas dataframe] Data frame with the columns 'NORAD_ID', 'INCLINATION'[deg], 'RAAN'[deg], and 'MEAN_MOTION'[rev/day]
+            cell -> [tuple of float,optional,default=(0.5,1.0,0.1)] Cell sizes of inclination[deg], RAAN[deg], and mean motion[rev/day].
+            The RAAN cell is rounded so that the cells divide 360 deg evenly. Queries are fastest with tolerances close to the cell sizes.
+        """
+        with instrument.span('plane_index_build'):
+            elements = elements.dropna(subset=['NORAD_ID','INCLINATION','RAAN','MEAN_MOTION'])
+            d_inc,d_raan,d_n = cell
+            n_raan = max(int(round(360/d_raan)),1)
+            cell = (d_inc,360/n_raan,d_n)
+            n_max = elements['MEAN_MOTION'].max() if len(elements) else 0
+            shape = (int(180//d_inc) + 1,n_raan,int(n_max//d_n) + 1)
+
+            keys = _cell_keys(cell,shape,elements['INCLINATION'].to_numpy(dtype=float),elements['RAAN'].to_numpy(dtype=float),elements['MEAN_MOTION'].to_numpy(dtype=float))
+            order = np.argsort(keys,kind='stable')
+            elements = elements.iloc[order].reset_index(drop=True)
+        return PlaneIndex(elements,keys[order],cell,shape)
+
+    @staticmethod
+    def from_tle(tle_file,epoch='latest',cell=PLANE_CELL):
+        """
+        Build the index of a TLE/3LE file, such as the output of download_tle.
+        The RAAN drift due to J2, about several degrees per day in LEO, is propagated to a common epoch, so that element sets of different epochs are compared in the same frame.
+
+        Usage:
+            index = PlaneIndex.from_tle(tle_file)
+
+        Inputs:
+            tle_file -> [str] Path of the TLE/3LE file
+            epoch -> [str or datetime,optional,default='latest'] Epoch to propagate the RAAN to; 'latest' for the latest epoch of the file, or None to keep the RAAN of the element sets
+            cell -> [tuple of float,optional,default=(0.5,1.0,0.1)] Cell sizes of inclination[deg], RAAN[deg], and mean motion[rev/day]
+        """
+        elements = parse_tle(tle_file)
+        if epoch is not None and len(elements):
+            epoch = elements['EPOCH'].max() if epoch == 'latest' else pd.Timestamp(epoch)
+            days = (epoch - elements['EPOCH']).dt.total_seconds().to_numpy()/86400
+            rate = raan_rate(elements['INCLINATION'],elements['ECC'],elements['MEAN_MOTION'])
+            elements['RAAN'] = (elements['RAAN'].to_numpy() + rate*days) % 360
+        return PlaneIndex.build(elements,cell)
+
+    def _cells(self,value,tol,size,count):
+        lo = np.floor((value - tol)/size).astype(np.int64)
+        hi = np.floor((value + tol)/size).astype(np.int64)
+        return np.clip(lo,0,count - 1),np.clip(hi,0,count - 1)
+
+    def _candidates(self,inc,raan,n,inc_tol,raan_tol,n_tol):
+        """
+        Sorted positions of the objects in the cells within the tolerances of each of the query points.
+        """
+        d_inc,d_raan,d_n = self.cell
+        n_inc,n_raan,n_n = self.shape
+        i_lo,i_hi = self._cells(inc,inc_tol,d_inc,n_inc)
+        if n_tol is None:
+            n_lo,n_hi = np.zeros_like(i_lo),np.full_like(i_hi,n_n - 1)
+        else:
+            n_lo,n_hi = self._cells(n,n_tol,d_n,n_n)
+        r_lo = np.floor((raan - raan_tol)/d_raan).astype(np.int64)
+        span = np.minimum(np.floor((raan + raan_tol)/d_raan).astype(np.int64) - r_lo,n_raan - 1)
+
+        # Cells of every query point, offset by di in inclination and by dr in RAAN
+        di = np.arange(int((i_hi - i_lo).max()) + 1 if len(i_lo) else 0)[None,:,None]
+        dr = np.arange(int(span.max()) + 1 if len(span) else 0)[None,None,:]
+        ii = i_lo[:,None,None] + di
+        ok = (ii <= i_hi[:,None,None]) & (dr <= span[:,None,None])
+        base = (ii*n_raan + (r_lo[:,None,None] + dr) % n_raan)*n_n
+        point = np.broadcast_to(np.arange(len(inc))[:,None,None],ok.shape)[ok]
+        lo = np.searchsorted(self.keys,(base + n_lo[:,None,None])[ok],side='left')
+        hi = np.searchsorted(self.keys,(base + n_hi[:,None,None])[ok],side='right')
+        return np.repeat(point,np.maximum(hi - lo,0)),_ranges(lo,hi)
+
+    def _within(self,inc,raan,n,rows,inc_tol,raan_tol,n_tol):
+        keep = (np.abs(self.inc[rows] - inc) <= inc_tol) & (_raan_dist(self.raan[rows],raan) <= raan_tol)
+        if n_tol is not None: keep &= np.abs(self.n[rows] - n) <= n_tol
+        return keep
+
+    def _result(self,rows,inc,raan):
+        result = self.elements.iloc[rows].copy()
+        result['PLANE_ANGLE'] = _plane_angle(self.inc[rows],self.raan[rows],inc,raan)
+        return result.sort_values('PLANE_ANGLE',kind='stable').reset_index(drop=True)
+
+    def neighbours(self,inc,raan,mean_motion=None,inc_tol=0.5,raan_tol=1.0,n_tol=None):
+        """
+        Objects near a given inclination, RAAN, and mean motion.
+
+        Usage:
+            near = index.neighbours(53,120,inc_tol=0.2,raan_tol=2)
+            near = index.neighbours(97.6,30,15.2,n_tol=0.1)
+
+        Inputs:
+            inc -> [float] Inclination[deg]
+            raan -> [float] RAAN[deg]
+            mean_motion -> [float,optional,default=None] Mean motion[rev/day]; required if n_tol is set
+            inc_tol -> [float,optional,default=0.5] Maximum difference of inclination[deg]
+            raan_tol -> [float,optional,default=1.0] Maximum difference of RAAN[deg] across the wrap-around at 360 deg
+            n_tol -> [float,optional,default=None] Maximum difference of mean motion[rev/day]; if None, this option is ignored
+
+        Outputs:
+            near -> [pandas dataframe] Orbital elements of the objects found, with the column 'PLANE_ANGLE', the angle[deg] between their orbital planes and the given one, in ascending order.
+            Note that near-equatorial planes are close whatever their RAAN, which the tolerance of RAAN does not account for.
+        """
+        if n_tol is not None and mean_motion is None: raise Exception('mean_motion is required if n_tol is set.')
+        inc,raan,n = np.array([inc],dtype=float),np.array([raan],dtype=float) % 360,np.array([mean_motion if mean_motion is not None else np.nan],dtype=float)
+        with instrument.span('plane_neighbours'):
+            _,rows = self._candidates(inc,raan,n,inc_tol,raan_tol,n_tol)
+            rows = rows[self._within(inc[0],raan[0],n[0],rows,inc_tol,raan_tol,n_tol)]
+        return self._result(rows,inc[0],raan[0])
+
+    def coplanar(self,noradid,inc_tol=0.5,raan_tol=1.0,n_tol=None):
+        """
+        Objects sharing the orbital plane of a given object.
+
+        Usage:
+            near = index.coplanar(44713,inc_tol=0.1,raan_tol=0.5)
+
+        Inputs:
+            noradid -> [int] NORAD_ID of the object
+            inc_tol -> [float,optional,default=0.5] Maximum difference of inclination[deg]
+            raan_tol -> [float,optional,default=1.0] Maximum difference of RAAN[deg]
+            n_tol -> [float,optional,default=None] Maximum difference of mean motion[rev/day]; if None, this option is ignored
+
+        Outputs:
+            near -> [pandas dataframe] Orbital elements of the other objects found, with the column 'PLANE_ANGLE' in ascending order
+        """
+        k = np.searchsorted(self._noradids,int(noradid))
+        if k == len(self._noradids) or self._noradids[k] != int(noradid): raise Exception('NORAD_ID {:d} is not in the index.'.format(int(noradid)))
+        row = self._norad_rows[k]
+        near = self.neighbours(self.inc[row],self.raan[row],self.n[row],inc_tol,raan_tol,n_tol)
+        return near[near['NORAD_ID'] != int(noradid)].reset_index(drop=True)
+
+    def clusters(self,inc_tol=0.5,raan_tol=1.0,n_tol=None,min_size=2,chunk_size=20000):
+        """
+        Group the objects into orbital planes, such as the planes of a constellation or a debris cloud.
+        Two objects within the tolerances of each other are in the same plane, and so are the objects linked by a chain of such pairs.
+
+        Usage:
+            planes = index.clusters(inc_tol=0.1,raan_tol=0.5,n_tol=0.05)
+            planes.groupby('PLANE').size()
+
+        Inputs:
+            inc_tol -> [float,optional,default=0.5] Maximum difference of inclination[deg] of a pair
+            raan_tol -> [float,optional,default=1.0] Maximum difference of RAAN[deg] of a pair
+            n_tol -> [float,optional,default=None] Maximum difference of mean motion[rev/day] of a pair; if None, this option is ignored
+            min_size -> [int,optional,default=2] Minimum number of objects of a plane
+            chunk_size -> [int,optional,default=20000] Number of objects whose candidate pairs are examined per chunk, which bounds the memory
+
+        Outputs:
+            planes -> [pandas dataframe] Orbital elements of the objects in the planes, with the column 'PLANE' numbering the planes from the largest
+        """
+        count = len(self.keys)
+        labels = np.arange(count)
+        with instrument.span('plane_clusters'):
+            for k0 in range(0,count,chunk_size):
+                points = np.arange(k0,min(k0 + chunk_size,count))
+                point,rows = self._candidates(self.inc[points],self.raan[points],self.n[points],inc_tol,raan_tol,n_tol)
+                i,j = points[point],rows
+                keep = j > i
+                i,j = i[keep],j[keep]
+                keep = (np.abs(self.inc[i] - self.inc[j]) <= inc_tol) & (_raan_dist(self.raan[i],self.raan[j]) <= raan_tol)
+                if n_tol is not None: keep &= np.abs(self.n[i] - self.n[j]) <= n_tol
+                _union(labels,i[keep],j[keep])
+
+        roots,inverse,sizes = np.unique(labels,return_inverse=True,return_counts=True)
+        rank = np.empty(len(roots),dtype=np.int64)
+        rank[np.argsort(-sizes,kind='stable')] = np.arange(len(roots))
+        rows = np.flatnonzero(sizes[inverse] >= min_size)
+        planes = self.elements.iloc[rows].copy()
+        planes.insert(1,'PLANE',rank[inverse[rows]])
+        return planes.sort_values(['PLANE','RAAN'],kind='stable').reset_index(drop=True)
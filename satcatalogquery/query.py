@@ -2,14 +2,63 @@ import numpy as np
 import pandas as pd
 from os import path,mkdir,makedirs
 from pathlib import Path
-import requests
-from datetime import datetime
-from time import sleep
-from colorama import Fore
+from datetime import datetime,timezone
+from email.utils import parsedate_to_datetime
+from time import time
+from threading import Lock
+from collections import OrderedDict
 
-from . import Const
 from . import data_prepare
+from . import satcat_history
+from .orbit_derive import derive_orbit_columns
+from .name_index import NameIndex,name_flag
+from .launch_index import LaunchIndex,launch_flag,discos_launch_filter
+from .where_expr import where_flag,where_columns
+from fnmatch import fnmatchcase
+from .instrumentation import instrument
+from .data_download import _prompt
 
+# Base URL of the DISCOSweb API
+DISCOS_URL = 'https://discosweb.esoc.esa.int'
+
+# Seconds for which the records of a DISCOS query are reused by identical queries; 0 disables the reuse
+DISCOS_CACHE_TTL = 0
+
+# Maximum number of DISCOS queries whose records are kept, beyond which the least recently used are dropped
+DISCOS_CACHE_SIZE = 256
+
+# Maximum number of satcat snapshots of as_of queries kept in memory, beyond which the least recently used are dropped
+SNAPSHOT_CACHE_SIZE = 4
+
+# Number of consecutive responses exceeding the rate limit(429) of DISCOSweb after which a query gives up
+DISCOS_MAX_RETRIES = 8
+
+# Maximum number of NORAD IDs sent to DISCOS in the filter of a single query
+DISCOS_ID_LIMIT = 1000
+
+# Whether each query checks the source files for updates and downloads them when outdated; a QueryServer sets it to False and refreshes them in its background loop
+SOURCE_REFRESH = True
+
+# Lock serialising the checks and downloads of the source files, so that concurrent queries never download or replace a file at the same time
+_source_lock = Lock()
+
+# Records of DISCOS queries keyed by the base URL and the query parameters, with the time they are fetched, in order of use
+_discos_cache = OrderedDict()
+
+# Lock guarding the updates of _discos_cache and _source_cache by concurrent queries
+_cache_lock = Lock()
+
+# Path of the manifest of a catalogue published in shared memory by shared_catalog.CatalogPublisher;
+# if set, the satcat, qs.mag, and their indexes are attached from shared memory while it is published, instead of loaded from the files
+SHARED_MANIFEST = None
+
+# Related resources of DISCOS objects fetched with JSON:API include, with the attributes decoded into columns of the result
+# To-many relationships, such as operators, are joined into a single value separated by ', '
+DISCOS_INCLUDES = {
+    'launch':{'epoch':'LAUNCH_EPOCH','flightNo':'LAUNCH_FLIGHT_NO','failure':'LAUNCH_FAILURE'},
+    'reentry':{'epoch':'REENTRY_EPOCH'},
+    'operators':{'name':'OPERATOR','countryCode':'OPERATOR_COUNTRY'},
+    }
 
 def _discos_buildin_filter(params,expr):
     """
@@ -30,7 +79,131 @@ def _discos_buildin_filter(params,expr):
         params['filter'] = expr 
     return params  
 
-def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None):
+def _discos_related(element,included,include):
+    """
+    Decode the related resources of a DISCOS object into columns.
+
+    Inputs:
+        element -> [dict] Resource of the object
+        included -> [dict] Attributes of the included resources of the page, keyed by type and id
+        include -> [list of str] Relationships to decode, which are keys of DISCOS_INCLUDES
+
+    Outputs:
+        columns -> [dict] Decoded attributes keyed by column name; None if the object has no such related resource
+    """
+    columns = {}
+    relationships = element.get('relationships',{})
+    for relation in include:
+        linkage = relationships.get(relation,{}).get('data')
+        if linkage is None: linkage = []
+        if type(linkage) is dict: linkage = [linkage]
+        resources = [included.get((link['type'],link['id']),{}) for link in linkage]
+        for attribute,column in DISCOS_INCLUDES[relation].items():
+            values = [resource.get(attribute) for resource in resources]
+            if all(value is None for value in values):
+                columns[column] = None
+            elif len(values) == 1:
+                columns[column] = values[0]
+            else: # keep the positions of the joined values aligned across columns
+                columns[column] = ', '.join('' if value is None else str(value) for value in values)
+    return columns
+
+def _discos_pages(URL,token,params,include=None):
+    """
+    Fetch all pages of a query from the DISCOS database, backing off if the rate limit is exceeded.
+
+    Inputs:
+        URL -> [str] Base URL of DISCOSweb
+        token -> [str] DISCOS token
+        params -> [dict] Filter and sort parameters of the query
+        include -> [list of str, optional, default = None] Related resources fetched in the same requests, which are keys of DISCOS_INCLUDES
+
+    Outputs:
+        extract -> [list of dict] Attributes of the matched objects, with the decoded related resources; if the query fails, the errors returned by DISCOSweb are passed through instead
+    """
+    import requests
+
+    params = dict(params)
+    # Initialize the page parameter 
+    params['page[number]'] = 1
+    if include: params['include'] = ','.join(include)
+    extract,retries = [],0
+    
+    with instrument.span('discos_paging'):
+        while True:
+            params['page[size]'] = 100 # Number of entries on each page   
+            response = requests.get(f'{URL}/api/objects',headers=_discos_headers(token),params=params)
+            instrument.count('requests',source='discos')
+            instrument.count('bytes',len(response.content),source='discos')
+
+            # Back off and retry the same page if the rate limit is exceeded
+            if response.status_code == 429:
+                retries += 1
+                instrument.sleep(_discos_backoff(response.headers,retries),'backoff',source='discos')
+                continue
+            retries = 0
+
+            doc = response.json()
+
+            if response.ok:
+                currentPage,totalPages = _discos_page(doc,include,extract)
+                
+                if currentPage < totalPages: 
+                    params['page[number]'] += 1
+                else:
+                    break
+
+                if currentPage%20 == 0: instrument.sleep(30,'rate_limit',source='discos') # Pause for 30 seconds to avoid excessive API access frequency    
+            else:
+                return doc['errors']
+
+    return extract
+
+def _discos_backoff(headers,retries):
+    """
+    Seconds to wait before retrying a request rejected for exceeding the rate limit, from its Retry-After header.
+
+    Inputs:
+        headers -> [dict-like] Headers of the response
+        retries -> [int] Number of consecutive rejections of the request, including this one
+
+    Outputs:
+        delay -> [float] Seconds to wait, 60 if the header is missing or invalid
+    """
+    if retries > DISCOS_MAX_RETRIES:
+        raise Exception('DISCOSweb rejected the request {:d} times in a row for exceeding the rate limit.'.format(retries))
+    value = headers.get('Retry-After')
+    if value is None: return 60
+    try:
+        return max(float(value),0)
+    except ValueError: # An HTTP date, such as 'Wed, 21 Oct 2015 07:28:00 GMT'
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(),0)
+        except (TypeError,ValueError):
+            return 60
+
+def _discos_headers(token):
+    return {'Authorization': f'Bearer {token}','DiscosWeb-Api-Version': '1'}
+
+def _discos_page(doc,include,extract):
+    """
+    Append the records of a page returned by DISCOSweb to extract, and return the current page and the total number of pages.
+    """
+    if not doc['data']: raise Exception('No entries found, please reset the filter parameters.')
+    data = doc['data']
+    if include:
+        included = {(resource['type'],resource['id']):resource.get('attributes',{}) for resource in doc.get('included',[])}
+        for element in data:
+            extract.append(dict(element['attributes'],**_discos_related(element,included,include)))
+    else:
+        for element in data:
+            extract.append(element['attributes'])
+    currentPage = doc['meta']['pagination']['currentPage']
+    totalPages = doc['meta']['pagination']['totalPages']
+    instrument.progress('discos_page',currentPage,totalPages)
+    return currentPage,totalPages
+
+def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None,*,LAUNCH_YEAR=None,include=None):
     """
     Given the geometric constraints of a spatial object, query the qualified spatial objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database.
 
@@ -38,7 +211,7 @@ def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DE
         satcatalog_df = discos_query(DECAYED=False,RCSAvg=[5,15])
 
     Inputs:
-        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
         NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
         OBJECT_CLASS -> [str, list of str, optional, default = None] Classification of objects; available options are 'Payload', 'Payload Debris', 'Payload Fragmentation Debris', 
         'Payload Mission Related Object', 'Rocket Body', 'Rocket Debris', 'Rocket Fragmentation Debris', 'Rocket Mission Related Object', 'Other Mission Related Object','Other Debris', Unknown', or any combination of them, 
@@ -55,30 +228,57 @@ def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DE
         RCSMin -> [list of float, optional, default = None] Minimum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
         RCSMax -> [list of float, optional, default = None] Maximum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
         RCSAvg -> [list of float, optional, default = None] Average Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
+        LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+        include -> [str or list of str, optional, default = None] Related resources fetched in the same paged requests and joined as columns; available options are 'launch'(LAUNCH_EPOCH, LAUNCH_FLIGHT_NO, LAUNCH_FAILURE), 'reentry'(REENTRY_EPOCH), and 'operators'(OPERATOR, OPERATOR_COUNTRY); if None, this option is ignored.
         sort -> [str, optional, default = None] Sort according to attributes of spatial objects, such as mass; available options include 'COSPARID', NORADID', 'ObjectClass', 'DecayDate', 'Mass', 'Shape', 'Length', 'Height', 'Depth', 'RCSMin', 'RSCMax', and 'RCSAvg'.
         If the attribute is prefixed with a '-', such as '-Mass', it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
     Outputs:
         satcatalog_df -> Data frame containing the selected spatial objects
     """
-    # DISCOS tokens
+    request = _discos_request(COSPAR_ID,NORAD_ID,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,sort,LAUNCH_YEAR=LAUNCH_YEAR,include=include)
+    extract = _discos_cached(request)
+    if extract is None:
+        extract = _discos_pages(request['URL'],request['token'],request['params'],request['include'])
+        if type(extract) is not list: return extract
+        _discos_store(request,extract)
+    return _discos_frame(extract,request,COSPAR_ID)
+
+def _discos_token(prompt=True):
+    """
+    Read the DISCOS token from ~/src/discos-data/discos-token, and ask for it if the file does not exist; if prompt is False, raise an error instead of asking.
+    """
     home = str(Path.home())
     direc = home + '/src/discos-data/'
     tokenfile = direc + 'discos-token'
 
     if not path.exists(direc): makedirs(direc)
     if not path.exists(tokenfile):
-        token = input('Please input the DISCOS tokens(which can be achieved from https://discosweb.esoc.esa.int/tokens): ')
+        token = _prompt('Please input the DISCOS tokens(which can be achieved from https://discosweb.esoc.esa.int/tokens): ',tokenfile,prompt)
         outfile_token = open(tokenfile,'w')
         outfile_token.write(token)
         outfile_token.close()
     else:
         infile = open(tokenfile,'r')
         token = infile.readline().strip()
-        infile.close()   
-    
-    URL = 'https://discosweb.esoc.esa.int'
+        infile.close()
+    return token
+
+def _discos_request(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None,*,LAUNCH_YEAR=None,include=None):
+    """
+    Translate the arguments of a DISCOS query into a request, a dict with the keys 'URL', 'token', 'params', 'include', and 'cospar_exact'.
+    """
+    token = _discos_token()
+
+    URL = DISCOS_URL
     params = {}
+
+    if include is not None:
+        if type(include) is str: include = [include]
+        for relation in include:
+            if relation not in DISCOS_INCLUDES:
+                raise Exception("Avaliable options of include are 'launch', 'reentry', and 'operators'.")
+        include = sorted(set(include))
     
     # Filter parameters for 'ObjectClass' 
     if OBJECT_CLASS is not None:
@@ -122,15 +322,12 @@ def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DE
         temp = "ge(reentry.epoch,epoch:'{:s}')&le(reentry.epoch,epoch:'{:s}')".format(DECAY_DATE[0],DECAY_DATE[1])
         params = _discos_buildin_filter(params,temp)
     
-    # Filter parameters for 'COSPAR_ID'
-    if COSPAR_ID is not None:
-        if type(COSPAR_ID) is str:
-            temp = "eq(cosparId,'{:s}')".format(COSPAR_ID)
-        elif type(COSPAR_ID) is list:    
-            temp = 'in(cosparId,{:s})'.format(str(tuple(COSPAR_ID))).replace(' ', '')
-        else:
-            raise Exception('Type of COSPAR_ID should be in str or list of str.')
-        params = _discos_buildin_filter(params,temp)    
+    # Filter parameters for 'COSPAR_ID' and 'LAUNCH_YEAR'
+    if COSPAR_ID is not None and type(COSPAR_ID) not in [str,list]:
+        raise Exception('Type of COSPAR_ID should be in str or list of str.')
+    cospar_expr,cospar_exact = discos_launch_filter(COSPAR_ID,LAUNCH_YEAR)
+    if cospar_expr is not None:
+        params = _discos_buildin_filter(params,cospar_expr)
             
     # Filter parameters for 'NORAD_ID'        
     if NORAD_ID is not None:
@@ -236,39 +433,45 @@ def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DE
         # Sort in descending order
         if sort[0] == '-': params['sort'] = '-' + params['sort']
 
-    # Initialize the page parameter 
-    params['page[number]'] = 1
-    extract = []
-    
-    while True:
-        params['page[size]'] = 100 # Number of entries on each page   
-        response = requests.get(f'{URL}/api/objects',
-            headers = {
-            'Authorization': f'Bearer {token}',
-            'DiscosWeb-Api-Version': '1',
-            },
-            params = params)
-
-        doc = response.json()
-
-        if response.ok:
-            if not doc['data']: raise Exception('No entries found, please reset the filter parameters.')
-            data = doc['data']
-            for element in data:
-                extract.append(element['attributes'])
-            currentPage = doc['meta']['pagination']['currentPage']
-            totalPages = doc['meta']['pagination']['totalPages']
-            desc = 'CurrentPage {:s}{:3d}{:s} in TotalPages {:3d}'.format(Fore.GREEN,currentPage,Fore.RESET,totalPages)
-            print(desc,end='\r')
-            
-            if currentPage < totalPages: 
-                params['page[number]'] += 1
-            else:
-                break
+    return {'URL':URL,'token':token,'params':params,'include':include,'cospar_exact':cospar_exact}
 
-            if currentPage%20 == 0: sleep(30) # Pause for 30 seconds to avoid excessive API access frequency    
-        else:
-            return doc['errors']
+def _discos_cache_key(request):
+    return (request['URL'],tuple(sorted(request['params'].items())),tuple(request['include'] or []))
+
+def _discos_cached(request):
+    """
+    Reuse the records of an identical request fetched within DISCOS_CACHE_TTL seconds, or return None.
+    """
+    key = _discos_cache_key(request)
+    with _cache_lock:
+        cached = _discos_cache.get(key)
+        if cached is None: return None
+        if time() - cached[0] >= DISCOS_CACHE_TTL:
+            del _discos_cache[key]
+            return None
+        _discos_cache.move_to_end(key)
+    instrument.count('cache_hits',source='discos')
+    return cached[1]
+
+def _discos_store(request,extract):
+    """
+    Keep the records of a DISCOS query, drop the expired records, and drop the least recently used records beyond DISCOS_CACHE_SIZE queries.
+    """
+    if DISCOS_CACHE_TTL <= 0: return
+    key,now = _discos_cache_key(request),time()
+    with _cache_lock:
+        for expired in [cached_key for cached_key,(fetched,_) in _discos_cache.items() if now - fetched >= DISCOS_CACHE_TTL]:
+            del _discos_cache[expired]
+        _discos_cache[key] = (now,extract)
+        _discos_cache.move_to_end(key)
+        while len(_discos_cache) > DISCOS_CACHE_SIZE:
+            _discos_cache.popitem(last=False)
+
+def _discos_frame(extract,request,COSPAR_ID=None):
+    """
+    Build the data frame of a DISCOS query from the fetched records.
+    """
+    include = request['include']
     
     # Rename the columns and readjust the order of the columns  
     old_column = ['height', 'xSectMax', 'name', 'satno', 'objectClass','mass', 'xSectMin', 'depth', 'xSectAvg', 'length', 'shape', 'cosparId']
@@ -276,12 +479,201 @@ def _discos_query(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DE
     # units: MASS in [kg]; RCS in [m2]; DEPTH, LENGTH, and HEIGHT in [m]
     new_column_reorder = ['OBJECT_NAME','COSPAR_ID', 'NORAD_ID','OBJECT_CLASS','MASS','SHAPE','HEIGHT','LENGTH','DEPTH','RCSMin','RCSMax','RCSAvg']
     df = pd.DataFrame.from_dict(extract,dtype=object).rename(columns=dict(zip(old_column, new_column)), errors='raise')
+    if include:
+        new_column_reorder += [column for relation in include for column in DISCOS_INCLUDES[relation].values()]
     df = df.reindex(columns=new_column_reorder) 
+
+    # Refine the glob patterns of COSPAR_ID that the API cannot express
+    if not request['cospar_exact']:
+        patterns = [COSPAR_ID.upper()] if type(COSPAR_ID) is str else [pattern.upper() for pattern in COSPAR_ID]
+        df = df[[any(fnmatchcase(str(cospar),pattern) for pattern in patterns) for cospar in df['COSPAR_ID']]]
     df = df.reset_index(drop=True)
     
     return df 
 
-def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None):
+# Columns of the results of CELESTRAK queries, in order
+CELESTRAK_COLUMNS = ['OBJECT_NAME','COSPAR_ID', 'NORAD_ID','OBJECT_TYPE','OPS_STATUS_CODE','DECAY_DATE',\
+                     'PERIOD', 'INCLINATION','APOGEE','PERIGEE','MEAN_ALT','ECC',\
+                     'SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT','SSO','ORBIT_REGIME',\
+                     'LAUNCH_DATE','LAUNCH_SITE','RCS','OWNER','DATA_STATUS_CODE','ORBIT_CENTER','ORBIT_TYPE']
+
+# Columns available to sort by, matched against the sort option in this order
+SORT_COLUMNS = ['COSPAR_ID','NORAD_ID','DECAY_DATE','PERIOD','INCLINATION','APOGEE','PERIGEE','MEAN_ALT','ECC',
+                'SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT','LAUNCH_DATE','LAUNCH_SITE','RCS','OWNER']
+
+# Parsed data sources kept in memory, keyed by source name, and tagged with the path and the modification time of the source file, in order of use
+_source_cache = OrderedDict()
+
+def _load_source(name,filename,parser):
+    """
+    Load a data source through the in-memory cache, and parse the source file again only if it is modified.
+    Sources of satcat snapshots, named as 'satcat@<date>', are dropped when they are the least recently used beyond SNAPSHOT_CACHE_SIZE dates.
+
+    Inputs:
+        name -> [str] Name of the data source, such as 'satcat' and 'qsmag'
+        filename -> [str] Path of the source file
+        parser -> [function] Function parsing the source file into a data frame
+
+    Outputs:
+        df -> [pandas dataframe] Parsed data source, which is shared by all callers and must not be modified in place
+    """
+    version = (filename,path.getmtime(filename))
+    with _cache_lock:
+        cached = _source_cache.get(name)
+        if cached is not None: _source_cache.move_to_end(name)
+    if cached is not None and cached[0] == version:
+        instrument.count('cache_hits',source=name)
+        return cached[1]
+
+    with instrument.span(name+'_parse'):
+        df = parser(filename)
+    with _cache_lock:
+        _source_cache[name] = (version,df)
+        _source_cache.move_to_end(name)
+        if '@' in name: _evict_snapshots()
+    return df
+
+def _evict_snapshots():
+    """
+    Drop the sources of the least recently used satcat snapshots beyond SNAPSHOT_CACHE_SIZE dates, together with their name and launch indexes.
+    """
+    dates = []
+    for name in reversed(_source_cache):
+        if '@' in name:
+            date = name.split('@',1)[1]
+            if date not in dates: dates.append(date)
+    for name in [name for name in _source_cache if '@' in name and name.split('@',1)[1] in dates[SNAPSHOT_CACHE_SIZE:]]:
+        del _source_cache[name]
+
+def source_versions():
+    """
+    Get the versions of the data sources loaded in memory.
+
+    Usage:
+        versions = source_versions()
+
+    Outputs:
+        versions -> [dict] Path and modification time of the source file keyed by source name, such as {'satcat':('/home/user/src/satcat-data/satcat.csv',1700000000.0)}
+    """
+    with _cache_lock:
+        return {name:cached[0] for name,cached in _source_cache.items()}
+
+def clear_source_cache():
+    """
+    Clear the data sources loaded in memory, so that they are parsed again on next use.
+    """
+    with _cache_lock:
+        _source_cache.clear()
+
+def _refresh_source(name,load):
+    """
+    Check a source file for updates, and download it if it is missing or outdated, one thread at a time.
+    If SOURCE_REFRESH is False, the file is only downloaded if it has not been located yet.
+
+    Inputs:
+        name -> [str] Name of the path of the source file in data_prepare, 'sc_file' or 'qs_file'
+        load -> [function] Function of data_prepare locating and updating the source file
+    """
+    with _source_lock:
+        if SOURCE_REFRESH or getattr(data_prepare,name,None) is None: load()
+
+def refresh_sources():
+    """
+    Check the satcat and qs.mag files for updates, and download them if they are outdated.
+    """
+    with _source_lock:
+        data_prepare.satcat_load()
+        data_prepare.qsmag_load()
+
+def _parse_satcat(satcat_file):
+    """
+    Parse the satcat file from the [CELESTRAK](https://celestrak.com) database, and derive the orbital columns.
+    """
+    return _prepare_satcat(pd.read_csv(satcat_file))
+
+def _prepare_satcat(data):
+    """
+    Rename the columns of the satcat read from the [CELESTRAK](https://celestrak.com) database, and derive the orbital columns.
+    """
+    columns_dict = {'OBJECT_ID': 'COSPAR_ID', 'NORAD_CAT_ID': 'NORAD_ID'}
+    data.rename(columns=columns_dict, inplace=True)
+    # unit description : 'PERIOD' in [min],'INCLINATION' in [deg], 'APOGEE' in [km],'PERIGEE' in [km],'RCS' in [m2]
+
+    '''
+    # For .txt file
+    # Set the field width according to the SATCAT Format Documentation[https://celestrak.com/satcat/satcat-format.php]
+    set_colspecs = [(0,11),(13,18),(20,21),(21,22),(23,47),(49,54),(56,66),(68,73),\
+                    (75,85),(87,94),(96,101),(103,109),(111,117),(119,127),(129,132)]
+    data = pd.read_fwf(satcat_file, colspecs = set_colspecs, header = None) 
+
+    data.columns = ['COSPAR_ID', 'NORAD_ID','OBJECT_TYPE','OPS_STATUS_CODE','OBJECT_NAME',\
+                    'OWNER','LAUNCH_DATE','LAUNCH_SITE','DECAY_DATE','PERIOD','INCLINATION',\
+                    'APOGEE','PERIGEE','RCS','DATA_STATUS_CODE']
+    '''  
+    # Add the derived orbital columns, such as the mean altitude, the eccentricity, and the J2 drift rates
+    data = derive_orbit_columns(data)
+
+    return data
+
+def _shared():
+    """
+    Attach to the catalogue published in shared memory, or return None if SHARED_MANIFEST is not set or nothing is published.
+    """
+    if SHARED_MANIFEST is None: return None
+    from .shared_catalog import attach
+    return attach(SHARED_MANIFEST)
+
+def _load_satcat(as_of=None):
+    """
+    Load and update the satcat file from the [CELESTRAK](https://celestrak.com) database, and parse it through the in-memory cache.
+    If as_of is given, the satcat of the latest snapshot on or before that date is rebuilt from the history instead.
+    If SHARED_MANIFEST is set, the latest satcat is attached from shared memory, and refreshed by the publishing process.
+    """
+    shared = _shared() if as_of is None else None
+    if shared is not None: return shared['satcat']
+
+    _refresh_source('sc_file',data_prepare.satcat_load)
+    if as_of is None:
+        return _load_source('satcat',data_prepare.sc_file,_parse_satcat)
+
+    # Snapshot files never change once written, so the file of the snapshot versions the rebuilt state
+    entry = satcat_history.snapshot_entry(as_of)
+    return _load_source('satcat@' + entry['date'],satcat_history.history_dir() + entry['file'],lambda filename: _prepare_satcat(satcat_history.rebuild_snapshot(entry)))
+
+def _load_name_index(data,as_of=None):
+    """
+    Load the name index of the satcat through the in-memory cache. The index of the latest satcat is persisted next to the satcat file, and rebuilt only when the file is modified.
+    """
+    shared = _shared() if as_of is None else None
+    if shared is not None and shared['satcat'] is data: return shared['names']
+
+    if as_of is not None:
+        entry = satcat_history.snapshot_entry(as_of)
+        return _load_source('satcat_names@' + entry['date'],satcat_history.history_dir() + entry['file'],lambda filename: NameIndex.build(data['OBJECT_NAME']))
+
+    def load_or_build(satcat_file):
+        version = (path.getmtime(satcat_file),path.getsize(satcat_file))
+        index_file = path.splitext(satcat_file)[0] + '-names.npz'
+        index = NameIndex.load(index_file,version)
+        if index is None:
+            index = NameIndex.build(data['OBJECT_NAME'])
+            index.save(index_file,version)
+        return index
+    return _load_source('satcat_names',data_prepare.sc_file,load_or_build)
+
+def _load_launch_index(data,as_of=None):
+    """
+    Load the launch index of the satcat through the in-memory cache, rebuilt only when the satcat file is modified.
+    """
+    shared = _shared() if as_of is None else None
+    if shared is not None and shared['satcat'] is data: return shared['launches']
+
+    if as_of is not None:
+        entry = satcat_history.snapshot_entry(as_of)
+        return _load_source('satcat_launches@' + entry['date'],satcat_history.history_dir() + entry['file'],lambda filename: LaunchIndex.build(data['COSPAR_ID']))
+    return _load_source('satcat_launches',data_prepare.sc_file,lambda filename: LaunchIndex.build(data['COSPAR_ID']))
+
+def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,as_of=None):
     """
     Given the orbital constraints of a space object, query the qualified space objects from the [CELESTRAK](https://celestrak.com) database.
 
@@ -289,7 +681,7 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
         satcatalog_df = celestrak_query(DECAYED=False,MEAN_ALT=[400,900])
 
     Inputs:
-        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
         NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
         PAYLOAD -> [bool, optional, default = None] Whether an object is payload or not. If True, the object is a payload; if False, not a payload; if None, this option is ignored.
         DECAYED -> [bool, optional, default = None] Whether an object is  decayed(re-entry) or not; If False, the object is still in orbit by now; if True, then decayed; if None, this option is ignored.
@@ -302,7 +694,18 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
         ECC -> [list of float, optional, default = None] Range of Eccentricity; it must be in form of [ecc1,ecc2], such as [0.01,0.2]; if None, then option is ignored.   
         OWNER -> [str or list of str, optional, default = None] Ownership of a space object; and country codes/names can be found at http://www.fao.org/countryprofiles/iso3list/en/; if None, this option is ignored.
         TLE_STATUS -> [bool, optional, default = None] Whether a TLE is valid. If False, it means No Current Elements, No Initial Elements, or No Elements Available; if None, this option is ignored.
-        sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as MEAN_ALT; available options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC',and 'OWNER'.
+        SMA -> [list of float, optional, default = None] Range of semi-major axis[km]; it must be in form of [sma1,sma2], such as [6800.0,7300.0]; if None, this option is ignored.
+        MEAN_MOTION -> [list of float, optional, default = None] Range of mean motion[rev/day]; it must be in form of [n1,n2], such as [14.0,16.0]; if None, this option is ignored.
+        RAAN_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the right ascension of the ascending node[deg/day]; it must be in form of [rate1,rate2], such as [0.9,1.1]; if None, this option is ignored.
+        ARGP_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the argument of perigee[deg/day]; it must be in form of [rate1,rate2], such as [-0.1,0.1]; if None, this option is ignored.
+        SSO -> [bool, optional, default = None] Whether an orbit is sun-synchronous. If True, the J2 drift rate of RAAN matches the mean motion of the Sun; if False, not sun-synchronous; if None, this option is ignored.
+        ORBIT_REGIME -> [str or list of str, optional, default = None] Orbit regime among 'LEO', 'MEO', 'GEO', and 'HEO'(highly eccentric or beyond GEO), such as ['MEO','GEO']; if None, this option is ignored.
+        OBJECT_NAME -> [str or list of str, optional, default = None] Names of objects, matched case-insensitively; an exact name such as 'COSMOS 2251 DEB', or a glob pattern such as 'STARLINK-*' for a prefix and '*DEB*' for a substring; if None, this option is ignored.
+        LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years given by COSPAR_ID; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+        where -> [str, optional, default = None] Boolean expression over the columns, such as "300 < MEAN_ALT < 2000 and (ECC < 0.01 or OWNER in ('US','PRC'))", combined with the other options by 'and'; 
+        it supports 'and', 'or', 'not', comparisons, 'in', 'is None', and arithmetic, and is parsed once and evaluated in a single chunked pass; if None, this option is ignored.
+        as_of -> [str, optional, default = None] Date such as '2024-03-01'; if given, the query runs against the catalog as it was on that date, rebuilt from the stored snapshots; if None, the latest catalog is used.
+        sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as MEAN_ALT; available options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', and 'OWNER'.
         If the attribute is prefixed with a '-', such as '-DecayDate', it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
     Outputs:
@@ -310,37 +713,35 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
     """  
 
     # Load and update the satcat files from the [CELESTRAK](https://celestrak.com) database.
-    data_prepare.satcat_load()
-    satcat_file = data_prepare.sc_file
+    data = _load_satcat(as_of)
+    names = _load_name_index(data,as_of) if OBJECT_NAME is not None else None
+    launches = _load_launch_index(data,as_of) if COSPAR_ID is not None or LAUNCH_YEAR is not None else None
+    return _celestrak_select(data,COSPAR_ID,NORAD_ID,PAYLOAD,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,OWNER,TLE_STATUS,sort,
+                             SMA=SMA,MEAN_MOTION=MEAN_MOTION,RAAN_DOT=RAAN_DOT,ARGP_DOT=ARGP_DOT,SSO=SSO,ORBIT_REGIME=ORBIT_REGIME,OBJECT_NAME=OBJECT_NAME,LAUNCH_YEAR=LAUNCH_YEAR,where=where,names=names,launches=launches)
 
-    data = pd.read_csv(satcat_file) 
-    columns_dict = {'OBJECT_ID': 'COSPAR_ID', 'NORAD_CAT_ID': 'NORAD_ID'}
-    data.rename(columns=columns_dict, inplace=True)
-    # unit description : 'PERIOD' in [min],'INCLINATION' in [deg], 'APOGEE' in [km],'PERIGEE' in [km],'RCS' in [m2]
-
-    '''
-    # For .txt file
-    # Set the field width according to the SATCAT Format Documentation[https://celestrak.com/satcat/satcat-format.php]
-    set_colspecs = [(0,11),(13,18),(20,21),(21,22),(23,47),(49,54),(56,66),(68,73),\
-                    (75,85),(87,94),(96,101),(103,109),(111,117),(119,127),(129,132)]
-    data = pd.read_fwf(satcat_file, colspecs = set_colspecs, header = None) 
-
-    data.columns = ['COSPAR_ID', 'NORAD_ID','OBJECT_TYPE','OPS_STATUS_CODE','OBJECT_NAME',\
-                    'OWNER','LAUNCH_DATE','LAUNCH_SITE','DECAY_DATE','PERIOD','INCLINATION',\
-                    'APOGEE','PERIGEE','RCS','DATA_STATUS_CODE']
-    '''  
-    Mean_Alltitude = (data['APOGEE'] + data['PERIGEE'])/2 # Compute the mean altitude
-    Eccentricity = (data['APOGEE'] - data['PERIGEE'])/(Mean_Alltitude + Const.Re_V)/2 
+def _sort_key(sort):
+    """
+    Resolve the sort option of _celestrak_query into the column to sort by and whether in ascending order.
+    """
+    if sort is None: return 'NORAD_ID',True
+    ascending_flag = sort[0] != '-'
+    for column in SORT_COLUMNS:
+        if column in sort: return column,ascending_flag
+    raise Exception("Avaliable options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', 'LAUNCH_DATE', 'LAUNCH_SITE', 'RCS', and 'OWNER'. Also, a negative sign '-' can be added ahead to the option to sort in descending order.")
 
-    # Add column to dataframe
-    data['MEAN_ALT'] = Mean_Alltitude
-    data['ECC'] = Eccentricity
-    full_of_true = np.ones_like(Mean_Alltitude,dtype=bool)
+def _celestrak_select(data,COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,OWNER=None,TLE_STATUS=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,names=None,launches=None):
+    """
+    Select the space objects satisfying the orbital constraints from a satcat data frame loaded by _load_satcat, or from a subset of its rows.
+    The constraints are those of _celestrak_query; names and launches are the NameIndex and the LaunchIndex of data, which are built on the fly if None and needed.
+    """
+    Mean_Alltitude,Eccentricity = data['MEAN_ALT'],data['ECC']
+    full_of_true = np.ones(len(data),dtype=bool)
     
-    # Set filter for 'COSPAR_ID' 
-    if COSPAR_ID is not None:
-        if type(COSPAR_ID) in [str,list]:
-            COSPARID_flag = np.in1d(data['COSPAR_ID'],COSPAR_ID,assume_unique=True)
+    # Set filter for 'COSPAR_ID' and 'LAUNCH_YEAR'
+    if COSPAR_ID is not None or LAUNCH_YEAR is not None:
+        if COSPAR_ID is None or type(COSPAR_ID) in [str,list]:
+            if launches is None: launches = LaunchIndex.build(data['COSPAR_ID'])
+            COSPARID_flag = launch_flag(launches,COSPAR_ID,LAUNCH_YEAR,len(data))
         else:
             raise Exception('Type of COSPAR_ID should be in str or list of str.')             
     else:
@@ -349,16 +750,16 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
     # Set filter for 'NORADID' 
     if NORAD_ID is not None:
         if type(NORAD_ID) is int:
-            NORADID_flag = np.in1d(data['NORAD_ID'],NORAD_ID,assume_unique=True)
+            NORADID_flag = np.isin(data['NORAD_ID'],NORAD_ID,assume_unique=True)
         elif type(NORAD_ID) is str: 
             if '.' in NORAD_ID: 
                 NORAD_ID = np.loadtxt(NORAD_ID,dtype = int)  
             else:
                 NORAD_ID = int(NORAD_ID)
-            NORADID_flag = np.in1d(data['NORAD_ID'],NORAD_ID,assume_unique=True)
+            NORADID_flag = np.isin(data['NORAD_ID'],NORAD_ID,assume_unique=True)
         elif type(NORAD_ID) is list:
             NORADID_list = np.array(NORAD_ID).astype(int)       
-            NORADID_flag = np.in1d(data['NORAD_ID'],NORADID_list,assume_unique=True)        
+            NORADID_flag = np.isin(data['NORAD_ID'],NORADID_list,assume_unique=True)        
         else:
             raise Exception('Type of NORAD_ID should be in int, str, list of int, or list of str.')             
     else:
@@ -422,10 +823,41 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
     else:
         Ecc_flag = full_of_true       
 
+    # Set filters for the ranges of the derived orbital columns
+    Derived_flag = full_of_true
+    for column,limits in zip(['SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT'],[SMA,MEAN_MOTION,RAAN_DOT,ARGP_DOT]):
+        if limits is not None:
+            Derived_flag = Derived_flag & (data[column] > limits[0]) & (data[column] < limits[1])
+
+    # Set filter for 'SSO'
+    if SSO is None:
+        SSO_flag = full_of_true
+    else:
+        SSO_flag = data['SSO'] if SSO else ~data['SSO']
+
+    # Set filter for 'ORBIT_REGIME'
+    if ORBIT_REGIME is not None:
+        if type(ORBIT_REGIME) in [str,list]:
+            Regime_flag = np.isin(data['ORBIT_REGIME'],ORBIT_REGIME)
+        else:
+            raise Exception('Type of ORBIT_REGIME should be in str or list of str.')
+    else:
+        Regime_flag = full_of_true
+
+    # Set filter for 'OBJECT_NAME'
+    if OBJECT_NAME is not None:
+        if type(OBJECT_NAME) in [str,list]:
+            if names is None: names = NameIndex.build(data['OBJECT_NAME'])
+            Name_flag = name_flag(names,OBJECT_NAME,len(data))
+        else:
+            raise Exception('Type of OBJECT_NAME should be in str or list of str.')
+    else:
+        Name_flag = full_of_true
+
     # Set filter for 'Country'
     if OWNER is not None:
         if type(OWNER) in [str,list]:
-            Owner_flag = np.in1d(data['OWNER'],OWNER)
+            Owner_flag = np.isin(data['OWNER'],OWNER)
         else:
             raise Exception('Type of OWNER should be in str or list of str.') 
     else:
@@ -440,71 +872,45 @@ def _celestrak_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,DECAYED=None,DECA
         if not TLE_STATUS: OrbitalStatus_flag = ~OrbitalStatus_flag
 
     # Combine filters
-    combined_flag = COSPARID_flag & NORADID_flag & Payload_flag & Decayed_flag & DecayDate_flag & OrbitalPeriod_flag & Inclination_flag & ApoAlt_flag & PerAlt_flag & MeanAlt_flag & Ecc_flag & Owner_flag & OrbitalStatus_flag
+    combined_flag = COSPARID_flag & NORADID_flag & Payload_flag & Decayed_flag & DecayDate_flag & OrbitalPeriod_flag & Inclination_flag & ApoAlt_flag & PerAlt_flag & MeanAlt_flag & Ecc_flag & Owner_flag & OrbitalStatus_flag & Derived_flag & SSO_flag & Regime_flag & Name_flag
+    # Evaluate the where expression on the rows selected by the other filters only
+    if where is not None: combined_flag = where_flag(data,where,combined_flag)
     df = data[combined_flag]
 
     # Eeadjust the order of the columns 
-    column_reorder = ['OBJECT_NAME','COSPAR_ID', 'NORAD_ID','OBJECT_TYPE','OPS_STATUS_CODE','DECAY_DATE',\
-                      'PERIOD', 'INCLINATION','APOGEE','PERIGEE','MEAN_ALT','ECC',\
-                      'LAUNCH_DATE','LAUNCH_SITE','RCS','OWNER','DATA_STATUS_CODE','ORBIT_CENTER','ORBIT_TYPE']
-    df = df.reindex(columns=column_reorder)
+    df = df.reindex(columns=CELESTRAK_COLUMNS)
     if TLE_STATUS: df = df.drop(columns=['DATA_STATUS_CODE'])
       
     # Sort     
-    if sort is None:    
-        df = df.sort_values(by=['NORAD_ID'])
-    else:
-        if sort[0] == '-': 
-            ascending_flag = False
-        else:
-            ascending_flag = True
-    
-        if sort.__contains__('COSPAR_ID'):
-            df = df.sort_values(by=['COSPAR_ID'],ascending=ascending_flag)
-        elif sort.__contains__('NORAD_ID'):
-            df = df.sort_values(by=['NORAD_ID'],ascending=ascending_flag)   
-        elif sort.__contains__('DECAY_DATE'):
-            df = df.sort_values(by=['DECAY_DATE'],ascending=ascending_flag)   
-        elif sort.__contains__('PERIOD'):
-            df = df.sort_values(by=['PERIOD'],ascending=ascending_flag)    
-        elif sort.__contains__('INCLINATION'):
-            df = df.sort_values(by=['INCLINATION'],ascending=ascending_flag) 
-        elif sort.__contains__('APOGEE'):
-            df = df.sort_values(by=['APOGEE'],ascending=ascending_flag)   
-        elif sort.__contains__('PERIGEE'):
-            df = df.sort_values(by=['PERIGEE'],ascending=ascending_flag) 
-        elif sort.__contains__('MEAN_ALT'):
-            df = df.sort_values(by=['MEAN_ALT'],ascending=ascending_flag) 
-        elif sort.__contains__('ECC'):
-            df = df.sort_values(by=['ECC'],ascending=ascending_flag)     
-        elif sort.__contains__('LAUNCH_DATE'):
-            df = df.sort_values(by=['LAUNCH_DATE'],ascending=ascending_flag) 
-        elif sort.__contains__('LAUNCH_SITE'):
-            df = df.sort_values(by=['LAUNCH_SITE'],ascending=ascending_flag)     
-        elif sort.__contains__('RCS'):
-            df = df.sort_values(by=['RCS'],ascending=ascending_flag)    
-        elif sort.__contains__('OWNER'):
-            df = df.sort_values(by=['OWNER'],ascending=ascending_flag)
-        else:
-            raise Exception("Avaliable options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'LAUNCH_DATE', 'LAUNCH_SITE', 'RCS', and 'OWNER'. Also, a negative sign '-' can be added ahead to the option to sort in descending order.")
+    column,ascending_flag = _sort_key(sort)
+    df = df.sort_values(by=[column],ascending=ascending_flag)
     df = df.reset_index(drop=True)
 
     return df
 
+def _parse_qsmag(qsfile):
+    """
+    Parse the qs.mag file into NORAD IDs and standard(intrinsic) magnitudes.
+    """
+    qsmag = np.genfromtxt(qsfile,skip_header=1,skip_footer=1,delimiter=[5,28,5],dtype=(int,str,float)) 
+    df_qsmag = pd.DataFrame(qsmag).drop(columns=['f1']).rename(columns={"f0": "NORAD_ID", "f2": "StdMag"})
+    return df_qsmag
+
 def parseQSMagFile():
     """
     Get the noradid and standard(intrinsic) magnitude for space objects by reading and parsing the qs.mag file.
     """
 
+    shared = _shared()
+    if shared is not None: return shared['qsmag']
+
     # Load and update the QSMag files from https://www.prismnet.com/~mmccants/programs/qsmag.zip
-    data_prepare.qsmag_load()
+    _refresh_source('qs_file',data_prepare.qsmag_load)
     qsfile = data_prepare.qs_file
 
-    qsmag = np.genfromtxt(qsfile,skip_header=1,skip_footer=1,delimiter=[5,28,5],dtype=(int,str,float)) 
-    df_qsmag = pd.DataFrame(qsmag).drop(columns=['f1']).rename(columns={"f0": "NORAD_ID", "f2": "StdMag"})
-    return df_qsmag         
+    return _load_source('qsmag',qsfile,_parse_qsmag)         
 
-def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None):
+def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,include=None):
     """
     Given the geometric and orbital constraints of a space object, query the qualified space objects from the [DISCOS](https://discosweb.esoc.esa.int)(Database and Information System Characterising Objects in Space) database and the [CELESTRAK](https://celestrak.com) database.
 
@@ -512,7 +918,7 @@ def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,D
         satcatalog_df = objects_query(PAYLOAD=False,DECAYED=False,MEAN_ALT=[400,900],RCSAvg=[5,15])
 
     Inputs:
-        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; if None, this option is ignored. 
+        COSPAR_ID -> [str or list of str, optional, default = None] object IDs defined by the Committee On SPAce Research; an exact ID such as '1999-025A', or a glob pattern such as '1999-025*' for all pieces of a launch and '2022-*' for all launches of a year; if None, this option is ignored. 
         NORAD_ID -> [int, str, list, or filename(such as 'noradids.txt'), optional, default = None] object IDs defined by the North American Aerospace Defense Command; if None, this option is ignored.
         OBJECT_CLASS -> [str, list of str, optional, default = None] Classification of objects; available options are 'Payload', 'Payload Debris', 'Payload Fragmentation Debris', 
         'Payload Mission Related Object', 'Rocket Body', 'Rocket Debris', 'Rocket Fragmentation Debris', 'Rocket Mission Related Object', 'Other Mission Related Object','Other Debris', Unknown', or any combination of them, 
@@ -536,36 +942,74 @@ def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,D
         RCSMax -> [list of float, optional, default = None] Maximum Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
         RCSAvg -> [list of float, optional, default = None] Average Radar Cross Section(RCS)[m2] of an object; if None, this option is ignored.
         OWNER -> [str or list of str, optional, default = None] Ownership of a space object; and country codes/names can be found at http://www.fao.org/countryprofiles/iso3list/en/; if None, this option is ignored.
+        SMA -> [list of float, optional, default = None] Range of semi-major axis[km]; it must be in form of [sma1,sma2], such as [6800.0,7300.0]; if None, this option is ignored.
+        MEAN_MOTION -> [list of float, optional, default = None] Range of mean motion[rev/day]; it must be in form of [n1,n2], such as [14.0,16.0]; if None, this option is ignored.
+        RAAN_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the right ascension of the ascending node[deg/day]; it must be in form of [rate1,rate2], such as [0.9,1.1]; if None, this option is ignored.
+        ARGP_DOT -> [list of float, optional, default = None] Range of the J2 drift rate of the argument of perigee[deg/day]; it must be in form of [rate1,rate2], such as [-0.1,0.1]; if None, this option is ignored.
+        SSO -> [bool, optional, default = None] Whether an orbit is sun-synchronous. If True, the J2 drift rate of RAAN matches the mean motion of the Sun; if False, not sun-synchronous; if None, this option is ignored.
+        ORBIT_REGIME -> [str or list of str, optional, default = None] Orbit regime among 'LEO', 'MEO', 'GEO', and 'HEO'(highly eccentric or beyond GEO), such as ['MEO','GEO']; if None, this option is ignored.
+        OBJECT_NAME -> [str or list of str, optional, default = None] Names of objects in the CELESTRAK database, matched case-insensitively; an exact name such as 'COSMOS 2251 DEB', or a glob pattern such as 'STARLINK-*' for a prefix and '*DEB*' for a substring; if None, this option is ignored.
+        LAUNCH_YEAR -> [list of int, optional, default = None] Range of launch years given by COSPAR_ID; it must be in form of [year1,year2], both inclusive, such as [2020,2023]; if None, this option is ignored.
+        where -> [str, optional, default = None] Boolean expression over the columns of the result, such as "MASS > 1000 or RCSAvg > 10", combined with the other options by 'and'; 
+        an expression over CELESTRAK columns only is evaluated before DISCOS is queried; if None, this option is ignored.
+        include -> [str or list of str, optional, default = None] Related resources from the DISCOS database joined as columns; available options are 'launch'(LAUNCH_EPOCH, LAUNCH_FLIGHT_NO, LAUNCH_FAILURE), 'reentry'(REENTRY_EPOCH), and 'operators'(OPERATOR, OPERATOR_COUNTRY); if None, this option is ignored.
         sort -> [str, optional, default = None] Sort according to attributes of a spatial object, such as by mass; available options include 'COSPAR_ID', NORAD_ID', 'OBJECT_CLASS', 'MASS', 'DECAY_DATE', 'SHAPE', 
-        'LENGTH', 'HEIGHT', 'DEPTH', 'RCSMin', 'RSCMax', 'RCSAvg', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', and 'OWNER'.
+        'LENGTH', 'HEIGHT', 'DEPTH', 'RCSMin', 'RSCMax', 'RCSAvg', 'PERIOD', 'INCLINATION', 'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', and 'OWNER'.
         If the attribute is prefixed with a '-', such as "-RCSAvg", it will be sorted in descending order. If None, the spatial objects are sorted by NORADID by default.
     
     Outputs:
         satcatalog_df -> Data frame containing the selected spatial objects
     """ 
     # Query space targets from the CELESTRAK database
-    df_celestrak = _celestrak_query(COSPAR_ID,NORAD_ID,PAYLOAD,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,OWNER,TLE_STATUS).drop('OBJECT_NAME',axis=1)
+    with instrument.span('celestrak_query'):
+        df_celestrak = _celestrak_query(COSPAR_ID,NORAD_ID,PAYLOAD,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,OWNER,TLE_STATUS,
+            SMA=SMA,MEAN_MOTION=MEAN_MOTION,RAAN_DOT=RAAN_DOT,ARGP_DOT=ARGP_DOT,SSO=SSO,ORBIT_REGIME=ORBIT_REGIME,OBJECT_NAME=OBJECT_NAME,LAUNCH_YEAR=LAUNCH_YEAR,where=_celestrak_where(where)).drop('OBJECT_NAME',axis=1)
     # Query space targets from the DISCOS database
-    noradids = list(df_celestrak['NORAD_ID'])
-    if len(noradids) > 1000: noradids = NORAD_ID
-    print('Go through the DISCOS database ... ')    
-    df_discos = _discos_query(COSPAR_ID,noradids,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg).dropna(subset=['NORAD_ID'])
+    noradids = _discos_noradids(df_celestrak,NORAD_ID)
+    with instrument.span('discos_query'):
+        df_discos = _discos_query(COSPAR_ID,noradids,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,LAUNCH_YEAR=LAUNCH_YEAR,include=include).dropna(subset=['NORAD_ID'])
 
+    return _objects_merge(df_celestrak,df_discos,TLE_STATUS,sort,where)
+
+def _celestrak_where(where):
+    """
+    The where expression of a combined query if it refers to CELESTRAK columns only, so that it is evaluated before DISCOS is queried; otherwise None.
+    """
+    if where is not None and where_columns(where) <= set(CELESTRAK_COLUMNS): return where
+    return None
+
+def _discos_noradids(df_celestrak,NORAD_ID):
+    """
+    NORAD IDs sent to DISCOS for a combined query: the objects selected from CELESTRAK, or the given NORAD_ID if there are more than DISCOS_ID_LIMIT of them.
+    """
+    noradids = [int(noradid) for noradid in df_celestrak['NORAD_ID']]
+    if len(noradids) > DISCOS_ID_LIMIT: noradids = NORAD_ID
+    return noradids
+
+def _objects_merge(df_celestrak,df_discos,TLE_STATUS=None,sort=None,where=None):
+    """
+    Merge the objects selected from CELESTRAK and DISCOS with the qs.mag data, filter them by the where expression unless it is evaluated by the CELESTRAK query, and sort them.
+    """
     # Merge the CELESTRAK database and the DISCOS database
-    df = pd.merge(df_celestrak, df_discos, on=['COSPAR_ID','NORAD_ID'],validate="one_to_one")
+    with instrument.span('merge'):
+        df = pd.merge(df_celestrak, df_discos, on=['COSPAR_ID','NORAD_ID'],validate="one_to_one")
 
     # Merge the QSMAG database
     df_qsmag = parseQSMagFile()
-    df = pd.merge(df, df_qsmag, on=['NORAD_ID'],how='left',validate="one_to_one")
+    with instrument.span('merge'):
+        df = pd.merge(df, df_qsmag, on=['NORAD_ID'],how='left',validate="one_to_one")
 
     # Remove unwanted columns and readjust the order of the columns 
     df = df.drop(['RCS'],axis=1)
     column_reorder = ['OBJECT_NAME','COSPAR_ID','NORAD_ID','OBJECT_CLASS','OPS_STATUS_CODE','DECAY_DATE',\
-                      'PERIOD', 'INCLINATION','APOGEE', 'PERIGEE','MEAN_ALT','ECC','DATA_STATUS_CODE','ORBIT_CENTER','ORBIT_TYPE',\
+                      'PERIOD', 'INCLINATION','APOGEE', 'PERIGEE','MEAN_ALT','ECC','SMA','MEAN_MOTION','RAAN_DOT','ARGP_DOT','SSO','ORBIT_REGIME',\
+                      'DATA_STATUS_CODE','ORBIT_CENTER','ORBIT_TYPE',\
                       'MASS','SHAPE','LENGTH', 'HEIGHT','DEPTH','RCSMin', 'RCSMax', 'RCSAvg','StdMag',\
                       'LAUNCH_DATE','LAUNCH_SITE','OWNER']                                 
+    column_reorder += [column for column in df_discos.columns if column not in column_reorder] # related resources of DISCOS
     df = df.reindex(columns=column_reorder)  
     if TLE_STATUS: df = df.drop(columns=['DATA_STATUS_CODE'])
+    if where is not None and _celestrak_where(where) is None: df = df[where_flag(df,where)]
          
     # Sort
     if sort is None:    
@@ -594,6 +1038,14 @@ def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,D
             df = df.sort_values(by=['MEAN_ALT'],ascending=ascending_flag) 
         elif sort.__contains__('ECC'):
             df = df.sort_values(by=['ECC'],ascending=ascending_flag)              
+        elif sort.__contains__('SMA'):
+            df = df.sort_values(by=['SMA'],ascending=ascending_flag)
+        elif sort.__contains__('MEAN_MOTION'):
+            df = df.sort_values(by=['MEAN_MOTION'],ascending=ascending_flag)
+        elif sort.__contains__('RAAN_DOT'):
+            df = df.sort_values(by=['RAAN_DOT'],ascending=ascending_flag)
+        elif sort.__contains__('ARGP_DOT'):
+            df = df.sort_values(by=['ARGP_DOT'],ascending=ascending_flag)
         elif sort.__contains__('MASS'):
             df = df.sort_values(by=['MASS'],ascending=ascending_flag)    
         elif sort.__contains__('LENGTH'):
@@ -616,7 +1068,7 @@ def _objects_query(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,D
             df = df.sort_values(by=['OWNER'],ascending=ascending_flag)
         else:
             raise Exception("Avaliable options include 'COSPAR_ID', NORAD_ID', 'DECAY_DATE', 'PERIOD', 'INCLINATION', \
-                'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'MASS','LENGTH','DEPTH','HEIGHT', 'RCSMin','RCSMax', 'RCSAvg',\
+                'APOGEE', 'PERIGEE', 'MEAN_ALT', 'ECC', 'SMA', 'MEAN_MOTION', 'RAAN_DOT', 'ARGP_DOT', 'MASS','LENGTH','DEPTH','HEIGHT', 'RCSMin','RCSMax', 'RCSAvg',\
                 'StdMag','LAUNCH_DATE',and 'OWNER'. Also, a negative sign '-' can be added to the option to sort in descending order.")
     df = df.reset_index(drop=True)
     return df              
\ No newline at end of file
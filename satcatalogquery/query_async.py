@@ -0,0 +1,177 @@
+import asyncio
+from os import path,replace
+
+from . import data_download
+from .query import _discos_token,_discos_request,_discos_cached,_discos_store,_discos_frame,_discos_headers,_discos_backoff,_discos_page,_discos_noradids,_celestrak_query,_celestrak_where,_objects_merge
+from .data_download import _login_failed,_noradid_list,_spacetrack_login,_tle_file,_bulk_file,_bulk_finish,_filter_bulk,_record_missed,TLE_BULK_THRESHOLD
+from .instrumentation import instrument
+
+# Timeout[seconds] of each HTTP request of the asyncio API
+HTTP_TIMEOUT = 60
+
+async def _discos_pages_async(URL,token,params,include=None):
+    """
+    Fetch all pages of a query from the DISCOS database with non-blocking HTTP, backing off if the rate limit is exceeded.
+    Same as _discos_pages, but the requests and the pauses are awaited, so that they do not block the event loop and are cancelled with the awaiting task.
+    """
+    import httpx # Imported here to keep the package import light
+
+    params = dict(params)
+    params['page[number]'] = 1
+    if include: params['include'] = ','.join(include)
+    extract,retries = [],0
+
+    with instrument.span('discos_paging'):
+        async with httpx.AsyncClient(headers=_discos_headers(token),timeout=HTTP_TIMEOUT) as client:
+            while True:
+                params['page[size]'] = 100 # Number of entries on each page
+                response = await client.get(f'{URL}/api/objects',params=params)
+                instrument.count('requests',source='discos')
+                instrument.count('bytes',len(response.content),source='discos')
+
+                # Back off and retry the same page if the rate limit is exceeded
+                if response.status_code == 429:
+                    retries += 1
+                    await instrument.sleep_async(_discos_backoff(response.headers,retries),'backoff',source='discos')
+                    continue
+                retries = 0
+
+                doc = response.json()
+
+                if response.is_success:
+                    currentPage,totalPages = _discos_page(doc,include,extract)
+
+                    if currentPage < totalPages:
+                        params['page[number]'] += 1
+                    else:
+                        break
+
+                    if currentPage%20 == 0: await instrument.sleep_async(30,'rate_limit',source='discos') # Pause for 30 seconds to avoid excessive API access frequency
+                else:
+                    return doc['errors']
+
+    return extract
+
+async def _discos_query_async(COSPAR_ID=None,NORAD_ID=None,OBJECT_CLASS=None,PAYLOAD=None,DECAYED=None,DECAY_DATE=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,sort=None,*,LAUNCH_YEAR=None,include=None):
+    """
+    Awaitable counterpart of _discos_query; the arguments and the output are the same.
+    A missing DISCOS token raises an error instead of being asked for, and the token file is read in a worker thread.
+    """
+    await asyncio.to_thread(_discos_token,False)
+    request = await asyncio.to_thread(_discos_request,COSPAR_ID,NORAD_ID,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,sort,LAUNCH_YEAR=LAUNCH_YEAR,include=include)
+    extract = _discos_cached(request)
+    if extract is None:
+        extract = await _discos_pages_async(request['URL'],request['token'],request['params'],request['include'])
+        if type(extract) is not list: return extract
+        _discos_store(request,extract)
+    return _discos_frame(extract,request,COSPAR_ID)
+
+async def _celestrak_query_async(*args,**kwargs):
+    """
+    Awaitable counterpart of _celestrak_query, which downloads and parses the satcat in a worker thread.
+    """
+    return await asyncio.to_thread(_celestrak_query,*args,**kwargs)
+
+async def _objects_query_async(COSPAR_ID=None,NORAD_ID=None,PAYLOAD=None,OBJECT_CLASS=None,DECAYED=None,DECAY_DATE=None,PERIOD=None,INCLINATION=None,APOGEE=None,PERIGEE=None,MEAN_ALT=None,ECC=None,TLE_STATUS=None,MASS=None,SHAPE=None,LENGTH=None,HEIGHT=None,DEPTH=None,RCSMin=None,RCSMax=None,RCSAvg=None,OWNER=None,sort=None,*,SMA=None,MEAN_MOTION=None,RAAN_DOT=None,ARGP_DOT=None,SSO=None,ORBIT_REGIME=None,OBJECT_NAME=None,LAUNCH_YEAR=None,where=None,include=None):
+    """
+    Awaitable counterpart of _objects_query; the arguments and the output are the same.
+    The local sources are loaded and merged in worker threads, and the DISCOS pages are fetched with non-blocking HTTP.
+    """
+    # Query space targets from the CELESTRAK database
+    with instrument.span('celestrak_query'):
+        df_celestrak = (await _celestrak_query_async(COSPAR_ID,NORAD_ID,PAYLOAD,DECAYED,DECAY_DATE,PERIOD,INCLINATION,APOGEE,PERIGEE,MEAN_ALT,ECC,OWNER,TLE_STATUS,
+            SMA=SMA,MEAN_MOTION=MEAN_MOTION,RAAN_DOT=RAAN_DOT,ARGP_DOT=ARGP_DOT,SSO=SSO,ORBIT_REGIME=ORBIT_REGIME,OBJECT_NAME=OBJECT_NAME,LAUNCH_YEAR=LAUNCH_YEAR,where=_celestrak_where(where))).drop('OBJECT_NAME',axis=1)
+    # Query space targets from the DISCOS database
+    noradids = _discos_noradids(df_celestrak,NORAD_ID)
+    with instrument.span('discos_query'):
+        df_discos = (await _discos_query_async(COSPAR_ID,noradids,OBJECT_CLASS,PAYLOAD,DECAYED,DECAY_DATE,MASS,SHAPE,LENGTH,HEIGHT,DEPTH,RCSMin,RCSMax,RCSAvg,LAUNCH_YEAR=LAUNCH_YEAR,include=include)).dropna(subset=['NORAD_ID'])
+
+    return await asyncio.to_thread(_objects_merge,df_celestrak,df_discos,TLE_STATUS,sort,where)
+
+async def _bulk_tle_async(st,direc):
+    """
+    Awaitable counterpart of _bulk_tle.
+    """
+    bulk_file = _bulk_file(direc)
+    if path.exists(bulk_file):
+        instrument.count('cache_hits',source='spacetrack')
+        return bulk_file
+
+    lines_tle = await st.gp(orderby='norad_cat_id',iter_lines=True,format='tle')
+    instrument.count('requests',source='spacetrack')
+
+    # Write to a temporary file first, so that an interrupted or cancelled download is never taken for the file of the day
+    nbytes = 0
+    with open(bulk_file + '.part','w') as f:
+        async for line in lines_tle:
+            f.write(line+'\n')
+            nbytes += len(line)+1
+    instrument.count('bytes',nbytes,source='spacetrack')
+    _bulk_finish(bulk_file,direc)
+    return bulk_file
+
+async def download_tle_async(noradids,mode='keep',dir_TLE='TLE/',bulk=None):
+    """
+    Download the TLE/3LE data from [SPACETRACK](https://www.space-track.org) without blocking the event loop.
+    Same as download_tle, but the requests and the pauses for rate limiting are awaited, and are cancelled with the awaiting task;
+    a missing Space-Track login raises an error instead of being asked for, and the local files are read and written in worker threads.
+
+    Usage:
+        tle_file = await download_tle_async(noradids)
+
+    Inputs:
+        noradids -> [str, int, list of str/int] NORADID of space targets, or a file containing a set of NORADID
+        mode -> [str,optional,default='keep'] Either 'keep' the files stored in TLE directory or 'clear' the TLE directory
+        dir_TLE -> [str,optional,default='TLE/'] Path to save TLE
+        bulk -> [bool,optional,default=None] If True, the whole current catalog is downloaded once a day and filtered locally; if False, the TLE are requested in parts of 500 IDs;
+        if None, the bulk download is used for more than TLE_BULK_THRESHOLD IDs.
+
+    Outputs:
+        tle_file -> [str] Path of TLE/3LE file.
+    """
+    from spacetrack import AsyncSpaceTrackClient # Imported here to keep the package import light
+
+    noradids = _noradid_list(noradids)
+    n = 500
+    noradids_parts = [noradids[i:i + n] for i in range(0, len(noradids), n)]
+    part_num = len(noradids_parts)
+
+    direc,loginfile,username,password = await asyncio.to_thread(_spacetrack_login,False)
+    filename_tle = await asyncio.to_thread(_tle_file,dir_TLE,mode)
+    valid_ids,j = [],1
+
+    if bulk is None: bulk = len(noradids) > TLE_BULK_THRESHOLD
+
+    async with AsyncSpaceTrackClient(username,password,base_url=data_download.SPACETRACK_URL) as st:
+        try:
+            await st.authenticate()
+        except Exception as e:
+            _login_failed(e,loginfile)
+        # Write to a temporary file first, so that a failed or cancelled download never leaves a truncated TLE file in place
+        with open(filename_tle + '.part','w') as file_tle:
+            if bulk:
+                with instrument.span('tle_download'):
+                    bulk_file = await _bulk_tle_async(st,direc)
+                valid_ids = await asyncio.to_thread(_filter_bulk,bulk_file,noradids,file_tle)
+                noradids_parts = []
+
+            with instrument.span('tle_download'):
+                for part in noradids_parts:
+                    instrument.progress('tle_part',j,part_num)
+
+                    lines_tle = await st.gp(norad_cat_id=part,iter_lines=True,format='tle')
+                    instrument.count('requests',source='spacetrack')
+
+                    nbytes = 0
+                    async for line in lines_tle:
+                        words = line.split()
+                        if words[0] == '2': valid_ids.append(words[1].lstrip('0'))
+                        file_tle.write(line+'\n')
+                        nbytes += len(line)+1
+                    instrument.count('bytes',nbytes,source='spacetrack')
+                    await instrument.sleep_async(j+5,'rate_limit',source='spacetrack')
+                    j += 1
+    replace(filename_tle + '.part',filename_tle)
+
+    await asyncio.to_thread(_record_missed,noradids,valid_ids,dir_TLE)
+    return filename_tle
@@ -0,0 +1,140 @@
+from .query import _load_satcat,_celestrak_select,_objects_query,DISCOS_ID_LIMIT
+from .catalog_diff import _catalog_diff
+
+class QueryWatcher(object):
+    """
+    class of QueryWatcher, which keeps standing queries up to date as the satcat is refreshed.
+
+    On each refresh, the rows added, changed, or removed since the previous catalog are found once, and each standing query is evaluated on those rows only.
+    Each query then emits the events
+        'enter' -> an object starts to satisfy the query
+        'leave' -> an object no longer satisfies the query, or is removed from the catalog
+        'update' -> an object satisfying the query before and after the refresh has changed attributes
+    Each event is a dict with the keys 'query', 'event', 'NORAD_ID', and 'row', where 'row' is the latest record of the object as a dict, or None if it is removed from the catalog.
+    Only refreshes of the satcat trigger events; changes made on the DISCOS side alone, such as a revised mass or RCS, never do.
+
+    Usage:
+        watcher = QueryWatcher()
+        watcher.subscribe('new_debris',PAYLOAD=False,MEAN_ALT=[500,900],callback=print)
+        watcher.subscribe('large_debris','objects_query',PAYLOAD=False,MEAN_ALT=[500,900],RCSAvg=[1,100])
+        events = watcher.refresh()
+
+    Methods:
+        subscribe -> Register a standing query.
+        unsubscribe -> Remove a standing query.
+        members -> NORAD IDs currently satisfying a standing query.
+        refresh -> Reload the satcat and emit the events of all standing queries.
+    """
+
+    def __init__(self):
+        self.catalog = _load_satcat()
+        self.subscriptions = {}
+
+    def __repr__(self):
+
+        return 'instance of class QueryWatcher'
+
+    def subscribe(self,name,query='celestrak_query',callback=None,**params):
+        """
+        Register a standing query, and evaluate it once on the whole catalog.
+
+        Usage:
+            df = watcher.subscribe('new_debris',PAYLOAD=False,MEAN_ALT=[500,900])
+
+        Inputs:
+            name -> [str] Name of the standing query
+            query -> [str,optional,default='celestrak_query'] Either 'celestrak_query' or 'objects_query'
+            callback -> [callable,optional,default=None] Function called with each event of the query
+            params -> Keyword arguments of the query, such as DECAYED=False and MEAN_ALT=[500,900]
+
+        Outputs:
+            df -> [pandas dataframe] Objects currently satisfying the query
+        """
+        if query not in ['celestrak_query','objects_query']:
+            raise Exception("The query should be either 'celestrak_query' or 'objects_query'.")
+        params.pop('sort',None)
+        subscription = {'query':query,'params':params,'callback':callback,'members':set()}
+        df = self._evaluate(subscription,self.catalog)
+        subscription['members'] = set(int(noradid) for noradid in df['NORAD_ID'])
+        self.subscriptions[name] = subscription
+        return df
+
+    def unsubscribe(self,name):
+        """
+        Remove a standing query.
+        """
+        self.subscriptions.pop(name,None)
+
+    def members(self,name):
+        """
+        NORAD IDs currently satisfying a standing query.
+        """
+        return set(self.subscriptions[name]['members'])
+
+    def _evaluate(self,subscription,rows):
+        """
+        Evaluate a standing query on some rows of the catalog.
+        """
+        params = subscription['params']
+        if subscription['query'] == 'celestrak_query':
+            return _celestrak_select(rows,**params)
+
+        # The DISCOS part of a combined query is restricted to the given rows, unless they are too many for a single filter of DISCOS
+        noradids = [int(noradid) for noradid in rows['NORAD_ID']]
+        if params.get('NORAD_ID') is not None:
+            noradids = sorted(set(noradids) & set(int(noradid) for noradid in _celestrak_select(self.catalog,NORAD_ID=params['NORAD_ID'])['NORAD_ID']))
+        if not noradids: return rows.iloc[:0]
+        restricted = len(noradids) <= DISCOS_ID_LIMIT
+        try:
+            df = _objects_query(**(dict(params,NORAD_ID=noradids) if restricted else params))
+        except Exception as e:
+            if 'No entries found' in str(e): return rows.iloc[:0]
+            raise
+        if not restricted: df = df[df['NORAD_ID'].isin(noradids)].reset_index(drop=True)
+        return df
+
+    def refresh(self):
+        """
+        Reload the satcat, find the rows changed since the previous catalog, and emit the events of all standing queries.
+
+        Usage:
+            events = watcher.refresh()
+
+        Outputs:
+            events -> [list of dict] Events of all standing queries
+        """
+        catalog = _load_satcat()
+        if catalog is self.catalog: return [] # the satcat file has not been modified
+
+        diff = _catalog_diff(self.catalog,catalog)
+        self.catalog = catalog
+        touched = catalog[catalog['NORAD_ID'].isin(list(diff['added']['NORAD_ID']) + list(diff['changed']['NORAD_ID']))]
+        changed_ids = set(int(noradid) for noradid in diff['changed']['NORAD_ID'])
+        removed_ids = set(int(noradid) for noradid in diff['removed']['NORAD_ID'])
+        touched_ids = set(int(noradid) for noradid in touched['NORAD_ID'])
+
+        events = []
+        for name,subscription in self.subscriptions.items():
+            members = subscription['members']
+            matched = self._evaluate(subscription,touched) if len(touched) else touched
+            records = {int(row['NORAD_ID']):row for row in matched.to_dict('records')}
+
+            query_events = []
+            for noradid,row in records.items():
+                if noradid not in members:
+                    query_events.append({'query':name,'event':'enter','NORAD_ID':noradid,'row':row})
+                elif noradid in changed_ids:
+                    query_events.append({'query':name,'event':'update','NORAD_ID':noradid,'row':row})
+            leaving = sorted(members & touched_ids - set(records))
+            leaving_rows = {int(row['NORAD_ID']):row for row in touched[touched['NORAD_ID'].isin(leaving)].to_dict('records')}
+            for noradid in leaving:
+                query_events.append({'query':name,'event':'leave','NORAD_ID':noradid,'row':leaving_rows[noradid]})
+            for noradid in sorted(members & removed_ids):
+                query_events.append({'query':name,'event':'leave','NORAD_ID':noradid,'row':None})
+
+            subscription['members'] = (members - touched_ids - removed_ids) | set(records)
+            if subscription['callback'] is not None:
+                for event in query_events: subscription['callback'](event)
+            events.extend(query_events)
+
+        return events
@@ -0,0 +1,187 @@
+import numpy as np
+from os import path
+from datetime import datetime
+from time import time
+from collections import OrderedDict
+from threading import Lock
+
+from .data_download import SATCAT_MAX_AGE,QSMAG_MAX_AGE,satcat_path,qsmag_path
+from .satcat_history import snapshot_entry
+from .where_expr import compile_where
+from .instrumentation import instrument
+
+# Upper bound of the memory[bytes] held by the cached query results
+RESULT_CACHE_BYTES = 256*1024**2
+
+# Seconds for which the results of queries involving DISCOS are reused, since DISCOSweb has no version to key them on; 0 disables their caching
+DISCOS_RESULT_TTL = 3600
+
+# Parameters given as a str or a list of str, where the order of the list does not matter
+SET_PARAMS = ['COSPAR_ID','OBJECT_CLASS','OWNER','ORBIT_REGIME','OBJECT_NAME','include']
+# Parameters matched case-insensitively
+UPPER_PARAMS = ['COSPAR_ID','OBJECT_NAME']
+
+def _canonical(name,value):
+    """
+    Normalise the value of a query parameter, so that equivalent forms of the parameter compare equal.
+    """
+    if value is None: return None
+    if name == 'NORAD_ID':
+        if type(value) is str:
+            value = np.loadtxt(value,dtype=int,ndmin=1).tolist() if '.' in value else [value]
+        elif type(value) is not list:
+            value = [value]
+        return tuple(sorted(set(int(noradid) for noradid in value)))
+    if name in SET_PARAMS:
+        if type(value) is str: value = [value]
+        if name in UPPER_PARAMS: value = [element.upper() for element in value]
+        return tuple(sorted(set(value)))
+    if name == 'where':
+        # Expressions differing only in spacing or parentheses have the same tree
+        return compile_where(value)
+    if name == 'SHAPE':
+        # A trailing '+' means that all shapes are required, otherwise any of them
+        if type(value) is str: value = [value]
+        if value and value[-1] == '+': return ('+',) + tuple(sorted(set(value[:-1])))
+        return ('|',) + tuple(sorted(set(value)))
+    if type(value) in [list,tuple]:
+        return tuple(value)
+    return value
+
+def query_fingerprint(query_name,params):
+    """
+    Normalise the arguments of a query into a canonical fingerprint.
+    NORAD IDs given as int, str, list in any order, or a file of IDs, lists of names in any order, and ranges given as lists or tuples are mapped to the same fingerprint.
+
+    Usage:
+        key = query_fingerprint('celestrak_query',{'NORAD_ID':['25544',20580]})
+
+    Inputs:
+        query_name -> [str] Name of the query, such as 'celestrak_query', 'discos_query', and 'objects_query'
+        params -> [dict] Arguments of the query
+
+    Outputs:
+        key -> [tuple] Hashable fingerprint of the query
+    """
+    return (query_name,) + tuple((name,_canonical(name,value)) for name,value in sorted(params.items()) if value is not None)
+
+def _file_version(filename,max_age):
+    """
+    Version of a local source file, or None if the file is missing or due for a refresh by the next query.
+    """
+    if not path.exists(filename): return None
+    modified_time = path.getmtime(filename)
+    if datetime.now() > datetime.fromtimestamp(modified_time) + max_age: return None
+    return (filename,modified_time,path.getsize(filename))
+
+def source_fingerprint(query_name,params):
+    """
+    Versions of the sources a query reads, such as the satcat file, the satcat snapshot of as_of, and the qs.mag file.
+
+    Outputs:
+        versions -> [tuple] Versions of the sources, or None if any source is about to be refreshed
+    """
+    versions = []
+    if query_name in ['celestrak_query','objects_query']:
+        if params.get('as_of') is not None:
+            versions.append(('satcat@',snapshot_entry(params['as_of'])['date']))
+        else:
+            versions.append(_file_version(satcat_path(),SATCAT_MAX_AGE))
+    if query_name == 'objects_query':
+        versions.append(_file_version(qsmag_path(),QSMAG_MAX_AGE))
+    if None in versions: return None
+    return tuple(versions)
+
+class ResultCache(object):
+    """
+    class of ResultCache, a least-recently-used cache of query results bounded by memory.
+
+    Results are keyed by the fingerprint of the query and the versions of the local sources, so a refreshed satcat or qs.mag file invalidates them.
+    Results involving DISCOS expire after discos_ttl seconds, and are not cached if it is 0.
+    The cache is shared by concurrent threads, such as the workers of a QueryServer, and guarded by a lock.
+
+    Usage:
+        cache = ResultCache(max_bytes=256*1024**2,discos_ttl=3600)
+        df = cache.get('celestrak_query',params)
+        cache.put('celestrak_query',params,df)
+
+    Methods:
+        get -> Get the result of a query, or None if it is not cached.
+        put -> Cache the result of a query.
+        clear -> Remove all results.
+    """
+
+    def __init__(self,max_bytes=RESULT_CACHE_BYTES,discos_ttl=DISCOS_RESULT_TTL):
+        self.max_bytes = max_bytes
+        self.discos_ttl = discos_ttl
+        self.nbytes = 0
+        self.entries = OrderedDict()
+        self._lock = Lock()
+
+    def __repr__(self):
+
+        return 'instance of class ResultCache'
+
+    def _key(self,query_name,params):
+        versions = source_fingerprint(query_name,params)
+        if versions is None: return None
+        return (query_fingerprint(query_name,params),versions)
+
+    def get(self,query_name,params):
+        """
+        Get the result of a query, or None if it is not cached.
+
+        Inputs:
+            query_name -> [str] Name of the query, such as 'celestrak_query'
+            params -> [dict] Arguments of the query
+
+        Outputs:
+            df -> [pandas dataframe] Cached result, which is shared and must not be modified in place
+        """
+        key = self._key(query_name,params)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None: return None
+            df,nbytes,expires = entry
+            if expires is not None and time() >= expires:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+        instrument.count('cache_hits',source='results')
+        return df
+
+    def put(self,query_name,params,df):
+        """
+        Cache the result of a query, and evict the least recently used results beyond max_bytes.
+        """
+        expires = None
+        if query_name in ['discos_query','objects_query']:
+            if self.discos_ttl <= 0: return
+            expires = time() + self.discos_ttl
+
+        key = self._key(query_name,params)
+        if key is None: return
+        nbytes = int(df.memory_usage(index=True,deep=True).sum())
+        if nbytes > self.max_bytes: return
+
+        with self._lock:
+            if key in self.entries: self._remove(key)
+            self.entries[key] = (df,nbytes,expires)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self,key):
+        df,nbytes,expires = self.entries.pop(key)
+        self.nbytes -= nbytes
+
+    def clear(self):
+        """
+        Remove all results.
+        """
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+# Results of the query methods of SatCatalog
+result_cache = ResultCache()
@@ -0,0 +1,146 @@
+import json
+import pandas as pd
+from io import StringIO
+from os import path,makedirs
+from pathlib import Path
+from datetime import datetime
+
+# Number of snapshots stored as deltas between two full checkpoints
+CHECKPOINT_EVERY = 12
+# Column of the satcat file keying the rows
+KEY = 'NORAD_CAT_ID'
+# Column of a delta file marking the removed rows
+DELETED = '_DELETED'
+
+def history_dir():
+    """
+    Directory of the satcat snapshots, ~/src/satcat-data/history/
+    """
+    return str(Path.home()) + '/src/satcat-data/history/'
+
+def manifest_file():
+    """
+    Path of the manifest listing the satcat snapshots in order of date.
+    """
+    return history_dir() + 'manifest.json'
+
+def snapshots():
+    """
+    List the satcat snapshots.
+
+    Usage:
+        entries = snapshots()
+
+    Outputs:
+        entries -> [list of dict] Snapshots in order of date, each with the keys 'date'(ISO format), 'kind'('checkpoint' or 'delta'), and 'file'
+    """
+    if not path.exists(manifest_file()): return []
+    with open(manifest_file()) as f:
+        return json.load(f)
+
+def _read(filename):
+    """
+    Read a snapshot file, keeping all fields as text so that the rows compare exactly.
+    """
+    return pd.read_csv(filename,dtype=str,keep_default_na=False)
+
+def _replay(entries):
+    """
+    Rebuild the satcat state after the last entry from the nearest checkpoint at or before it.
+    """
+    i0 = max(i for i,entry in enumerate(entries) if entry['kind'] == 'checkpoint')
+    state = _read(history_dir() + entries[i0]['file']).set_index(KEY,drop=False)
+    for entry in entries[i0+1:]:
+        delta = _read(history_dir() + entry['file']).set_index(KEY,drop=False)
+        upserts = delta[delta[DELETED] != '1'].drop(columns=DELETED)
+        state = state[~state.index.isin(delta.index)]
+        state = pd.concat([state,upserts])
+    return state.fillna('') # fields of columns missing from earlier snapshots
+
+def record_snapshot(scfile,date=None):
+    """
+    Store the state of the satcat file as a compressed delta against the previous snapshot, keyed by NORAD_CAT_ID, or as a full checkpoint every CHECKPOINT_EVERY snapshots.
+    A snapshot not newer than the last one is skipped.
+
+    Usage:
+        record_snapshot('~/src/satcat-data/satcat.csv')
+
+    Inputs:
+        scfile -> [str] Path of the satcat file
+        date -> [datetime,optional,default=None] Date of the snapshot; if None, the modification time of the file is used
+
+    Outputs:
+        entry -> [dict] Manifest entry of the snapshot, or None if it is skipped
+    """
+    if date is None: date = datetime.fromtimestamp(path.getmtime(scfile))
+    date_iso = date.strftime('%Y-%m-%dT%H:%M:%S')
+    entries = snapshots()
+    if entries and entries[-1]['date'] >= date_iso: return None
+
+    makedirs(history_dir(),exist_ok=True)
+    new = _read(scfile)
+    date_str = date.strftime('%Y%m%dT%H%M%S')
+
+    since_checkpoint = len(entries) - max([i for i,entry in enumerate(entries) if entry['kind'] == 'checkpoint'],default=-CHECKPOINT_EVERY-1)
+    if since_checkpoint > CHECKPOINT_EVERY:
+        entry = {'date':date_iso,'kind':'checkpoint','file':'checkpoint_{:s}.csv.gz'.format(date_str)}
+        new.to_csv(history_dir() + entry['file'],index=False)
+    else:
+        old = _replay(entries)
+        new = new.set_index(KEY,drop=False)
+        columns = list(new.columns)
+        old = old.reindex(columns=columns,fill_value='')
+
+        # Rows added or changed since the previous snapshot, and rows removed from it
+        common = new.index.intersection(old.index)
+        changed = (old.loc[common].to_numpy(dtype=object) != new.loc[common].to_numpy(dtype=object)).any(axis=1)
+        upsert_ids = new.index.difference(old.index).append(common[changed])
+        removed_ids = old.index.difference(new.index)
+
+        upserts = new.loc[upsert_ids].assign(**{DELETED:''})
+        removed = pd.DataFrame({KEY:removed_ids,DELETED:'1'}).reindex(columns=columns + [DELETED],fill_value='')
+        entry = {'date':date_iso,'kind':'delta','file':'delta_{:s}.csv.gz'.format(date_str)}
+        pd.concat([upserts,removed]).to_csv(history_dir() + entry['file'],index=False)
+
+    entries.append(entry)
+    with open(manifest_file(),'w') as f:
+        json.dump(entries,f,indent=1)
+    return entry
+
+def snapshot_entry(as_of):
+    """
+    Find the latest snapshot taken on or before a date.
+
+    Inputs:
+        as_of -> [str or datetime] Date such as '2024-03-01' or '2024-03-01T12:00:00'; a date without time means the end of that day
+
+    Outputs:
+        entry -> [dict] Manifest entry of the snapshot
+    """
+    ts = pd.Timestamp(as_of)
+    if isinstance(as_of,str) and len(as_of) == 10: ts = ts + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
+    as_of_iso = ts.strftime('%Y-%m-%dT%H:%M:%S')
+
+    entries = [entry for entry in snapshots() if entry['date'] <= as_of_iso]
+    if not entries: raise Exception('No snapshot of the satellite catalog is stored on or before {:s}.'.format(as_of_iso))
+    return entries[-1]
+
+def rebuild_snapshot(entry):
+    """
+    Rebuild the satcat of a snapshot by replaying the deltas since the nearest checkpoint.
+
+    Usage:
+        data = rebuild_snapshot(snapshot_entry('2024-03-01'))
+
+    Inputs:
+        entry -> [dict] Manifest entry of the snapshot
+
+    Outputs:
+        data -> [pandas dataframe] Satcat as read from satcat.csv, in order of NORAD_CAT_ID
+    """
+    entries = snapshots()
+    i = [e['date'] for e in entries].index(entry['date'])
+    state = _replay(entries[:i+1])
+    state = state.reset_index(drop=True).sort_values(KEY,key=lambda ids: pd.to_numeric(ids,errors='coerce'))
+    # Parse the text fields into the dtypes of a freshly read satcat file
+    return pd.read_csv(StringIO(state.to_csv(index=False)))
@@ -0,0 +1,426 @@
+import asyncio
+import argparse
+import http.client
+import json
+import logging
+import socket
+import inspect
+import importlib.util
+from io import StringIO,BytesIO
+from os import path,remove
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import query
+from . import data_download
+from .instrumentation import instrument
+
+# Queries answered by the server, with the mode of the catalog they return
+QUERIES = {
+    'celestrak_query':(query._celestrak_query,'celestrak_catalog'),
+    'discos_query':(query._discos_query,'discos_catalog'),
+    'objects_query':(query._objects_query,'objects_catalog'),
+    }
+
+# Kinds of the keyword arguments accepted by the server; any other keyword is rejected
+PARAM_KINDS = {
+    'COSPAR_ID':'names','OBJECT_CLASS':'names','OWNER':'names','ORBIT_REGIME':'names','OBJECT_NAME':'names','SHAPE':'names','include':'names',
+    'NORAD_ID':'ids','PAYLOAD':'bool','DECAYED':'bool','TLE_STATUS':'bool','SSO':'bool','DECAY_DATE':'dates',
+    'PERIOD':'range','INCLINATION':'range','APOGEE':'range','PERIGEE':'range','MEAN_ALT':'range','ECC':'range','SMA':'range','MEAN_MOTION':'range',
+    'RAAN_DOT':'range','ARGP_DOT':'range','MASS':'range','LENGTH':'range','HEIGHT':'range','DEPTH':'range','RCSMin':'range','RCSMax':'range','RCSAvg':'range',
+    'LAUNCH_YEAR':'range','where':'str','as_of':'str','sort':'str',
+    }
+
+# Upper bound of the size[bytes] of a request body
+MAX_BODY_BYTES = 4*1024**2
+
+# Media types of the query results, Arrow IPC streams for clients with pyarrow and JSON tables with their schema otherwise
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+JSON_TYPE = 'application/json'
+
+logger = logging.getLogger('satcatalogquery')
+
+def _is_number(value):
+    return type(value) in [int,float]
+
+def _is_id(value):
+    # NORAD IDs are numbers; a str such as 'noradids.txt' would be read as a file on the server
+    return type(value) is int or (type(value) is str and value.isdigit())
+
+_KIND_CHECKS = {
+    'names':lambda value: type(value) is str or (type(value) is list and all(type(element) is str for element in value)),
+    'ids':lambda value: _is_id(value) or (type(value) is list and len(value) > 0 and all(_is_id(element) for element in value)),
+    'bool':lambda value: type(value) is bool,
+    'dates':lambda value: type(value) is list and len(value) == 2 and all(type(element) is str for element in value),
+    'range':lambda value: type(value) is list and len(value) == 2 and all(_is_number(element) for element in value),
+    'str':lambda value: type(value) is str,
+    }
+
+def _check_kwargs(name,kwargs):
+    """
+    Check the keyword arguments of a request against the parameters of the query, and raise a TypeError for any unknown keyword or invalid value.
+    """
+    if type(kwargs) is not dict: raise TypeError('The body should be a JSON object of keyword arguments.')
+    params = inspect.signature(QUERIES[name][0]).parameters
+    for key,value in kwargs.items():
+        if key not in params or key not in PARAM_KINDS:
+            raise TypeError("{:s} got an unexpected keyword argument '{:s}'".format(name,key))
+        if value is not None and not _KIND_CHECKS[PARAM_KINDS[key]](value):
+            raise TypeError('Invalid value of {:s}: {:s}'.format(key,json.dumps(value)))
+
+def _encode(df,content_type):
+    """
+    Serialise the result of a query in the media type requested by the client, keeping the dtypes of the columns.
+    """
+    if content_type == ARROW_TYPE:
+        from .arrow_interop import to_arrow,write_ipc
+
+        sink = BytesIO()
+        write_ipc(to_arrow(df),sink,format='stream')
+        return sink.getvalue()
+    return df.to_json(orient='table',index=False,date_format='iso',double_precision=15).encode()
+
+def _warm():
+    """
+    Update the satcat and qs.mag files if they are outdated, and load them into the in-memory cache of the query module.
+    """
+    query.refresh_sources()
+    query._load_satcat()
+    query.parseQSMagFile()
+
+def _stale_sources():
+    """
+    Find the data sources in memory whose source files are modified since they were loaded.
+
+    Outputs:
+        names -> [list of str] Names of the stale data sources
+    """
+    names = []
+    for name,(filename,mtime) in query.source_versions().items():
+        if not path.exists(filename) or path.getmtime(filename) != mtime: names.append(name)
+    return names
+
+class QueryServer(object):
+    """
+    class of QueryServer, a long-lived local service answering catalogue queries from a warm in-memory catalogue.
+
+    The satcat and qs.mag files are parsed once and kept in memory, and reloaded in the background when they are modified.
+    Requests never download the source files; outdated files are downloaded in the background, checked every refresh_interval seconds.
+    Requests never ask for a missing DISCOS token or Space-Track login on the terminal, but fail with an error.
+    The records of DISCOS queries are reused by identical queries within discos_ttl seconds.
+    Requests are served over HTTP/1.1 with keep-alive, on a TCP port or a Unix socket:
+        POST /celestrak_query, /discos_query, or /objects_query with the keyword arguments of the query as a JSON object in the body;
+        the response is the resulting data frame as an Arrow IPC stream if the Accept header asks for it, and otherwise in the 'table' orientation of pandas.DataFrame.to_json, both keeping the dtypes.
+        Unknown keyword arguments, invalid values, and NORAD_ID given as a file path are rejected with 400, and bodies over MAX_BODY_BYTES with 413.
+        GET /health returns the versions of the data sources in memory.
+
+    Usage:
+        server = QueryServer(port=8765)
+        server.run()
+
+    Inputs:
+        host -> [str,optional,default='127.0.0.1'] Host to listen on
+        port -> [int,optional,default=8765] TCP port to listen on
+        unix_socket -> [str,optional,default=None] Path of a Unix socket to listen on instead of the TCP port
+        workers -> [int,optional,default=None] Number of threads answering queries concurrently; if None, it is decided by ThreadPoolExecutor
+        discos_ttl -> [float,optional,default=3600] Seconds for which the records of a DISCOS query are reused
+        reload_interval -> [float,optional,default=5] Seconds between checks of the modification time of the source files
+        refresh_interval -> [float,optional,default=3600] Seconds between checks of the source files for updates to download
+
+    Methods:
+        start -> Warm the catalogue and start listening.
+        serve_forever -> Start and serve until cancelled.
+        run -> Serve in a new event loop until interrupted.
+        close -> Stop listening.
+    """
+
+    def __init__(self,host='127.0.0.1',port=8765,unix_socket=None,workers=None,discos_ttl=3600,reload_interval=5,refresh_interval=3600):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.discos_ttl = discos_ttl
+        self.reload_interval = reload_interval
+        self.refresh_interval = refresh_interval
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._server = None
+        self._reloader = None
+
+    def __repr__(self):
+
+        return 'instance of class QueryServer'
+
+    async def start(self):
+        """
+        Warm the catalogue and start listening.
+        """
+        query.DISCOS_CACHE_TTL = self.discos_ttl
+        query.SOURCE_REFRESH = False
+        data_download.PROMPT_CREDENTIALS = False
+        loop = asyncio.get_running_loop()
+        with instrument.span('server_warm'):
+            await loop.run_in_executor(self.executor,_warm)
+
+        if self.unix_socket is not None:
+            if path.exists(self.unix_socket): remove(self.unix_socket)
+            self._server = await asyncio.start_unix_server(self._handle,path=self.unix_socket)
+            logger.info('Serving queries on %s',self.unix_socket)
+        else:
+            self._server = await asyncio.start_server(self._handle,self.host,self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            logger.info('Serving queries on http://%s:%d',self.host,self.port)
+
+        self._reloader = asyncio.create_task(self._reload_loop())
+        return self
+
+    async def serve_forever(self):
+        """
+        Start and serve until cancelled.
+        """
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            self.close()
+
+    def run(self):
+        """
+        Serve in a new event loop until interrupted.
+        """
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+
+    def close(self):
+        """
+        Stop listening.
+        """
+        if self._reloader is not None: self._reloader.cancel()
+        query.SOURCE_REFRESH = True
+        data_download.PROMPT_CREDENTIALS = True
+        if self._server is not None: self._server.close()
+        if self.unix_socket is not None and path.exists(self.unix_socket): remove(self.unix_socket)
+        self.executor.shutdown(wait=False)
+
+    async def _reload_loop(self):
+        """
+        Reload the data sources in the background when their source files are modified, so that queries do not wait for parsing,
+        and download the source files when they are outdated.
+        """
+        loop = asyncio.get_running_loop()
+        refreshed = loop.time()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if loop.time() - refreshed >= self.refresh_interval:
+                    refreshed = loop.time()
+                    with instrument.span('server_refresh'):
+                        await loop.run_in_executor(self.executor,query.refresh_sources)
+                stale = await loop.run_in_executor(self.executor,_stale_sources)
+                if stale:
+                    with instrument.span('server_reload',sources=stale):
+                        await loop.run_in_executor(self.executor,_warm)
+            except Exception:
+                logger.exception('Failed to reload the data sources')
+
+    async def _handle(self,reader,writer):
+        """
+        Serve the requests of one connection until it is closed.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line: break
+                method,target,version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n',b'\n',b''): break
+                    key,_,value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                # The body of a rejected request is not read, so the connection is closed after the response
+                try:
+                    length = int(headers.get('content-length',0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer,400,json.dumps({'error':'Invalid Content-Length'}).encode(),JSON_TYPE,False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer,413,json.dumps({'error':'Request body exceeds {:d} bytes'.format(MAX_BODY_BYTES)}).encode(),JSON_TYPE,False)
+                    break
+                body = await reader.readexactly(length)
+
+                status,payload,content_type = await self._dispatch(method,target,body,headers.get('accept',''))
+                keep_alive = headers.get('connection','').lower() != 'close' and version == 'HTTP/1.1'
+                await self._respond(writer,status,payload,content_type,keep_alive)
+                if not keep_alive: break
+        except (ValueError,asyncio.IncompleteReadError,ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self,writer,status,payload,content_type,keep_alive):
+        writer.write('HTTP/1.1 {:d} {:s}\r\nContent-Type: {:s}\r\nContent-Length: {:d}\r\nConnection: {:s}\r\n\r\n'.format(
+            status,http.client.responses.get(status,''),content_type,len(payload),'keep-alive' if keep_alive else 'close').encode('latin-1'))
+        writer.write(payload)
+        await writer.drain()
+
+    async def _dispatch(self,method,target,body,accept=''):
+        """
+        Answer one request.
+
+        Outputs:
+            status -> [int] HTTP status code
+            payload -> [bytes] Body of the response, a JSON object for errors
+            content_type -> [str] Media type of the body
+        """
+        name = target.split('?',1)[0].strip('/')
+        if method == 'GET' and name == 'health':
+            versions = {source:{'file':filename,'mtime':mtime} for source,(filename,mtime) in query.source_versions().items()}
+            return 200,json.dumps({'status':'ok','versions':versions}).encode(),JSON_TYPE
+        if method != 'POST' or name not in QUERIES:
+            return 404,json.dumps({'error':'Unknown request {:s} {:s}'.format(method,target)}).encode(),JSON_TYPE
+
+        content_type = ARROW_TYPE if ARROW_TYPE in accept else JSON_TYPE
+        try:
+            kwargs = json.loads(body or b'{}')
+            _check_kwargs(name,kwargs)
+            func = QUERIES[name][0]
+            loop = asyncio.get_running_loop()
+            with instrument.span('server_request',query=name):
+                df = await loop.run_in_executor(self.executor,lambda: func(**kwargs))
+                if not isinstance(df,pd.DataFrame):
+                    return 502,json.dumps({'error':'DISCOS query failed','details':df}).encode(),JSON_TYPE
+                payload = await loop.run_in_executor(self.executor,_encode,df,content_type)
+            return 200,payload,content_type
+        except Exception as e:
+            # Invalid arguments, such as those rejected by _check_kwargs, are errors of the client
+            return 400,json.dumps({'error':'{:s}: {:s}'.format(type(e).__name__,str(e))}).encode(),JSON_TYPE
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+
+    def __init__(self,unix_socket,timeout=None):
+        super().__init__('localhost',timeout=timeout)
+        self.unix_socket = unix_socket
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        if self.timeout is not None: self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_socket)
+
+class QueryClient(object):
+    """
+    class of QueryClient, which offloads catalogue queries to a running QueryServer over a persistent connection.
+
+    Usage:
+        client = QueryClient(port=8765)
+        satcatalog = client.objects_query(DECAYED=False,MEAN_ALT=[400,900],RCSAvg=[5,15])
+
+    Inputs:
+        host -> [str,optional,default='127.0.0.1'] Host of the server
+        port -> [int,optional,default=8765] TCP port of the server
+        unix_socket -> [str,optional,default=None] Path of the Unix socket of the server, which is used instead of the TCP port
+        timeout -> [float,optional,default=None] Timeout of the connection in seconds
+
+    Methods:
+        celestrak_query -> Query the CELESTRAK database through the server.
+        discos_query -> Query the DISCOS database through the server.
+        objects_query -> Query the combined database through the server.
+        health -> Versions of the data sources in memory of the server.
+        close -> Close the connection.
+    """
+
+    def __init__(self,host='127.0.0.1',port=8765,unix_socket=None,timeout=None):
+        if unix_socket is not None:
+            self.conn = _UnixHTTPConnection(unix_socket,timeout=timeout)
+        else:
+            self.conn = http.client.HTTPConnection(host,port,timeout=timeout)
+        # Results are received as Arrow IPC streams if pyarrow is installed, and as JSON tables otherwise
+        self.accept = ARROW_TYPE if importlib.util.find_spec('pyarrow') is not None else JSON_TYPE
+
+    def __repr__(self):
+
+        return 'instance of class QueryClient'
+
+    def _request(self,method,name,kwargs=None):
+        body = json.dumps(kwargs).encode() if kwargs is not None else None
+        headers = {'Accept':self.accept}
+        if body is not None: headers['Content-Type'] = JSON_TYPE
+        try:
+            self.conn.request(method,'/' + name,body=body,headers=headers)
+            response = self.conn.getresponse()
+        except (http.client.RemoteDisconnected,ConnectionResetError,BrokenPipeError):
+            # Reconnect once if the server closed the persistent connection
+            self.conn.close()
+            self.conn.request(method,'/' + name,body=body,headers=headers)
+            response = self.conn.getresponse()
+        payload = response.read()
+        if response.status != 200:
+            raise Exception('Query server responded with {:d}: {:s}'.format(response.status,payload.decode()))
+        return payload,response.getheader('Content-Type',JSON_TYPE)
+
+    def _query(self,name,kwargs):
+        from .classes import SatCatalog
+
+        kwargs = {key:value for key,value in kwargs.items() if value is not None}
+        payload,content_type = self._request('POST',name,kwargs)
+        if content_type == ARROW_TYPE:
+            from .arrow_interop import read_ipc,from_arrow
+
+            df,mode = from_arrow(read_ipc(payload))
+        else:
+            df = pd.read_json(StringIO(payload.decode()),orient='table',precise_float=True)
+        return SatCatalog(df,QUERIES[name][1])
+
+    def celestrak_query(self,**kwargs):
+        """
+        Query the CELESTRAK database through the server; the keyword arguments are those of SatCatalog.celestrak_query.
+        """
+        return self._query('celestrak_query',kwargs)
+
+    def discos_query(self,**kwargs):
+        """
+        Query the DISCOS database through the server; the keyword arguments are those of SatCatalog.discos_query.
+        """
+        return self._query('discos_query',kwargs)
+
+    def objects_query(self,**kwargs):
+        """
+        Query the combined database through the server; the keyword arguments are those of SatCatalog.objects_query.
+        """
+        return self._query('objects_query',kwargs)
+
+    def health(self):
+        """
+        Versions of the data sources in memory of the server.
+        """
+        return json.loads(self._request('GET','health')[0])
+
+    def close(self):
+        """
+        Close the connection.
+        """
+        self.conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local query service of satcatalogquery')
+    parser.add_argument('--host',default='127.0.0.1',help='host to listen on')
+    parser.add_argument('--port',type=int,default=8765,help='TCP port to listen on')
+    parser.add_argument('--unix-socket',default=None,help='path of a Unix socket to listen on instead of the TCP port')
+    parser.add_argument('--workers',type=int,default=None,help='number of threads answering queries concurrently')
+    parser.add_argument('--discos-ttl',type=float,default=3600,help='seconds for which the records of a DISCOS query are reused')
+    parser.add_argument('--reload-interval',type=float,default=5,help='seconds between checks of the source files')
+    parser.add_argument('--refresh-interval',type=float,default=3600,help='seconds between checks of the source files for updates to download')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,format='%(asctime)s %(message)s')
+    QueryServer(args.host,args.port,args.unix_socket,args.workers,args.discos_ttl,args.reload_interval,args.refresh_interval).run()
+
+if __name__ == '__main__':
+    main()
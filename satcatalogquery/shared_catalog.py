@@ -0,0 +1,298 @@
+import json
+import time
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from os import path,getpid,replace,remove
+from pathlib import Path
+from multiprocessing import shared_memory,resource_tracker
+
+from . import query
+from .name_index import NameIndex
+from .launch_index import LaunchIndex
+from .instrumentation import instrument
+
+# Alignment[bytes] of the arrays in the shared memory block
+ALIGN = 64
+
+logger = logging.getLogger('satcatalogquery')
+
+def manifest_file():
+    """
+    Default path of the manifest of the published catalogue, ~/src/satcat-data/shared-catalog.json
+    """
+    return str(Path.home()) + '/src/satcat-data/shared-catalog.json'
+
+def _encode_text(series):
+    """
+    Encode a text column into the buffers of an Arrow large_string array: a validity bitmap, int64 offsets, and UTF-8 data.
+    """
+    valid = series.notna().to_numpy()
+    encoded = [value.encode('utf-8') if ok else b'' for value,ok in zip(series.to_numpy(dtype=object),valid)]
+    offsets = np.zeros(len(encoded)+1,dtype=np.int64)
+    np.cumsum([len(value) for value in encoded],out=offsets[1:])
+    data = np.frombuffer(b''.join(encoded),dtype=np.uint8)
+    validity = np.packbits(valid,bitorder='little')
+    return validity,offsets,data
+
+def _decode_text(n,validity,offsets,data,dtype):
+    """
+    Rebuild a text column from its buffers, without copying them if the column is backed by pyarrow.
+    """
+    if isinstance(dtype,pd.StringDtype) and dtype.storage == 'pyarrow':
+        import pyarrow as pa
+        buffers = [pa.py_buffer(validity),pa.py_buffer(offsets),pa.py_buffer(data)]
+        array = pa.Array.from_buffers(pa.large_string(),n,buffers)
+        return pd.Series(array.to_pandas(types_mapper=lambda t: dtype),copy=False)
+
+    valid = np.unpackbits(validity,count=n,bitorder='little').astype(bool)
+    raw = data.tobytes()
+    values = np.array([raw[offsets[i]:offsets[i+1]].decode('utf-8') if valid[i] else np.nan for i in range(n)],dtype=object)
+    return pd.Series(values,dtype=dtype)
+
+class _Layout(object):
+    """
+    Offsets of the arrays to be written into a shared memory block.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.arrays = []
+
+    def add(self,array):
+        array = np.ascontiguousarray(array)
+        offset = -(-self.size//ALIGN)*ALIGN
+        self.arrays.append((offset,array))
+        self.size = offset + array.nbytes
+        return {'offset':offset,'dtype':array.dtype.str,'shape':list(array.shape)}
+
+    def write(self,buf):
+        for offset,array in self.arrays:
+            buf[offset:offset+array.nbytes] = array.view(np.uint8).reshape(-1)
+
+def _layout_frame(layout,df):
+    columns = []
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype,np.dtype) and series.dtype.kind in 'biufM':
+            columns.append({'name':name,'kind':'array','array':layout.add(series.to_numpy())})
+        else:
+            validity,offsets,data = _encode_text(series)
+            columns.append({'name':name,'kind':'text','dtype':str(series.dtype),
+                            'validity':layout.add(validity),'offsets':layout.add(offsets),'data':layout.add(data)})
+    return {'length':len(df),'columns':columns}
+
+def _view(buf,spec):
+    # np.frombuffer holds an export of the mapping, which keeps it mapped while the array is in use
+    array = np.frombuffer(buf,dtype=np.dtype(spec['dtype']),count=int(np.prod(spec['shape'])),offset=spec['offset']).reshape(spec['shape'])
+    array.flags.writeable = False
+    return array
+
+def _attach_frame(buf,spec):
+    data = {}
+    for column in spec['columns']:
+        if column['kind'] == 'array':
+            data[column['name']] = _view(buf,column['array'])
+        else:
+            dtype = pd.api.types.pandas_dtype(column['dtype'])
+            data[column['name']] = _decode_text(spec['length'],_view(buf,column['validity']),_view(buf,column['offsets']),_view(buf,column['data']),dtype)
+    return pd.DataFrame(data,copy=False)
+
+def _map_block(name):
+    """
+    Map a shared memory block without handing it to the resource tracker of this process, which would unlink it on exit.
+    The mapping is detached from the SharedMemory object, so that it stays valid while any array refers to it, and is unmapped once the last one is released.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name,track=False)
+    except TypeError: # before Python 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        if name not in _published: resource_tracker.unregister(shm._name,'shared_memory')
+    mapping = shm._mmap
+    shm._buf.release()
+    shm._buf,shm._mmap = None,None
+    shm.close() # only closes the file descriptor now
+    return mapping
+
+# Names of the blocks created by publishers in this process
+_published = set()
+
+class CatalogPublisher(object):
+    """
+    class of CatalogPublisher, which publishes the parsed satcat, qs.mag, and the name and launch indexes of the satcat into shared memory.
+
+    Each publication is written into a new shared memory block, and handed over by atomically replacing the manifest, which records the version, the name of the block, and the layout of the arrays.
+    Attached processes switch to the new block on their next query. The block of the previous version is kept until the next publication, so that processes reading the manifest meanwhile can still attach to it.
+
+    Usage:
+        publisher = CatalogPublisher()
+        publisher.run() # publish and refresh until interrupted
+
+    Inputs:
+        manifest -> [str,optional,default=None] Path of the manifest; if None, ~/src/satcat-data/shared-catalog.json is used
+        interval -> [float,optional,default=600] Seconds between checks for refreshed source files
+
+    Methods:
+        publish -> Load the sources and publish them into a new shared memory block.
+        refresh -> Publish again if any source file is refreshed.
+        run -> Publish and refresh until interrupted.
+        close -> Unlink the shared memory blocks and remove the manifest.
+    """
+
+    def __init__(self,manifest=None,interval=600):
+        self.manifest = manifest or manifest_file()
+        self.interval = interval
+        self.version = 0
+        self.blocks = []
+        self.sources = None
+
+    def __repr__(self):
+
+        return 'instance of class CatalogPublisher'
+
+    def _load(self):
+        # Clear SHARED_MANIFEST in case this process is configured to attach, so that the sources are loaded from the files
+        shared,query.SHARED_MANIFEST = query.SHARED_MANIFEST,None
+        try:
+            satcat = query._load_satcat()
+            qsmag = query.parseQSMagFile()
+            names = query._load_name_index(satcat)
+            launches = query._load_launch_index(satcat)
+        finally:
+            query.SHARED_MANIFEST = shared
+        return satcat,qsmag,names,launches
+
+    def publish(self,sources=None):
+        """
+        Load the sources and publish them into a new shared memory block.
+
+        Outputs:
+            version -> [int] Version of the publication
+        """
+        satcat,qsmag,names,launches = sources or self._load()
+        with instrument.span('shared_publish'):
+            layout = _Layout()
+            frames = {'satcat':_layout_frame(layout,satcat),'qsmag':_layout_frame(layout,qsmag)}
+            indexes = {'names':{'keys':layout.add(names.keys),'rows':layout.add(names.rows)},
+                       'launches':{'keys':layout.add(launches.keys),'rows':layout.add(launches.rows)}}
+
+            self.version = max(self.version,_read_manifest(self.manifest).get('version',0)) + 1
+            name = 'satcatalogquery_{:d}_{:d}'.format(getpid(),self.version)
+            shm = shared_memory.SharedMemory(name=name,create=True,size=max(layout.size,1))
+            _published.add(shm.name)
+            layout.write(shm.buf)
+
+            manifest = {'version':self.version,'block':shm.name,'size':layout.size,'created':time.time(),
+                        'sources':{name:list(version) for name,version in query.source_versions().items()},
+                        'frames':frames,'indexes':indexes}
+            with open(self.manifest + '.part','w') as f:
+                json.dump(manifest,f)
+            replace(self.manifest + '.part',self.manifest)
+
+        self.blocks.append(shm)
+        self.sources = (satcat,qsmag)
+        # Processes attached to older blocks keep their mappings after the blocks are unlinked
+        while len(self.blocks) > 2:
+            old = self.blocks.pop(0)
+            old.close()
+            old.unlink()
+        logger.info('Published version %d of the catalogue in shared memory %s (%d bytes)',self.version,shm.name,layout.size)
+        return self.version
+
+    def refresh(self):
+        """
+        Publish again if any source file is refreshed.
+
+        Outputs:
+            published -> [bool] Whether a new version is published
+        """
+        sources = self._load()
+        if self.sources is not None and sources[0] is self.sources[0] and sources[1] is self.sources[1]: return False
+        self.publish(sources)
+        return True
+
+    def run(self):
+        """
+        Publish and refresh every interval seconds until interrupted, then close.
+        """
+        try:
+            self.refresh()
+            while True:
+                time.sleep(self.interval)
+                self.refresh()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Unlink the shared memory blocks and remove the manifest.
+        """
+        if path.exists(self.manifest) and _read_manifest(self.manifest).get('block') in [shm.name for shm in self.blocks]:
+            remove(self.manifest)
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+def _read_manifest(manifest):
+    if not path.exists(manifest): return {}
+    with open(manifest) as f:
+        return json.load(f)
+
+# Catalogue attached by this process
+_attached = {}
+
+def attach(manifest=None):
+    """
+    Attach to the catalogue published in shared memory, and switch to a new version once it is published.
+    The numeric columns and the indexes are views of the shared memory; text columns are too if pandas stores them with pyarrow.
+
+    Usage:
+        shared = attach()
+        satcat = shared['satcat']
+
+    Inputs:
+        manifest -> [str,optional,default=None] Path of the manifest; if None, ~/src/satcat-data/shared-catalog.json is used
+
+    Outputs:
+        shared -> [dict] The data frames 'satcat' and 'qsmag', the NameIndex 'names', the LaunchIndex 'launches', and the 'version'; None if no catalogue is published
+    """
+    manifest = manifest or manifest_file()
+    if not path.exists(manifest): return None
+    stamp = (manifest,path.getmtime(manifest))
+    if _attached.get('stamp') == stamp:
+        instrument.count('cache_hits',source='shared_catalog')
+        return _attached['shared']
+
+    spec = _read_manifest(manifest)
+    try:
+        buf = _map_block(spec['block'])
+    except FileNotFoundError: # the publisher has exited without removing the manifest
+        return None
+
+    with instrument.span('shared_attach'):
+        satcat = _attach_frame(buf,spec['frames']['satcat'])
+        qsmag = _attach_frame(buf,spec['frames']['qsmag'])
+        names = NameIndex(_view(buf,spec['indexes']['names']['keys']),_view(buf,spec['indexes']['names']['rows']))
+        launches = LaunchIndex(_view(buf,spec['indexes']['launches']['keys']),_view(buf,spec['indexes']['launches']['rows']),
+                               satcat['COSPAR_ID'].fillna('').astype(str).to_numpy(dtype=object))
+
+    # The block of the previous version is unmapped once the frames still in use are released
+    shared = {'version':spec['version'],'satcat':satcat,'qsmag':qsmag,'names':names,'launches':launches}
+    _attached.update(stamp=stamp,shared=shared)
+    return shared
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Publish the catalogue of satcatalogquery into shared memory')
+    parser.add_argument('--manifest',default=None,help='path of the manifest, ~/src/satcat-data/shared-catalog.json by default')
+    parser.add_argument('--interval',type=float,default=600,help='seconds between checks for refreshed source files')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO,format='%(asctime)s %(message)s')
+    CatalogPublisher(args.manifest,args.interval).run()
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,3 @@
-import wget
-
 def wget_download(url,dir_file,desc=None):
     """
     Download files by wget command
@@ -12,6 +10,8 @@ def wget_download(url,dir_file,desc=None):
         wget_out -> [str] Path of the file downloaded
 
     """
+    import wget
+
     if desc: print(desc)
     wget_out = wget.download(url,dir_file)
     print()
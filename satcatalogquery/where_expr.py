@@ -0,0 +1,302 @@
+import ast
+import operator
+import weakref
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+
+# Number of rows evaluated at a time, so that the slices of the referenced columns stay in the CPU cache
+CHUNK_ROWS = 32768
+
+# Operators of comparisons and arithmetic allowed in expressions
+COMPARE_OPS = {ast.Lt:'<',ast.LtE:'<=',ast.Gt:'>',ast.GtE:'>=',ast.Eq:'==',ast.NotEq:'!='}
+ARITH_OPS = {ast.Add:'+',ast.Sub:'-',ast.Mult:'*',ast.Div:'/'}
+FUNCS = {'<':operator.lt,'<=':operator.le,'>':operator.gt,'>=':operator.ge,'==':operator.eq,'!=':operator.ne,
+         '+':operator.add,'-':operator.sub,'*':operator.mul,'/':operator.truediv}
+
+def _value_node(node):
+    """
+    Translate an operand of an expression into ('col',name), ('const',value), ('arith',op,left,right), or ('neg',operand).
+    """
+    if isinstance(node,ast.Name):
+        return ('col',node.id)
+    if isinstance(node,ast.Constant) and (node.value is None or type(node.value) in [int,float,str,bool]):
+        return ('const',node.value)
+    if isinstance(node,ast.UnaryOp) and isinstance(node.op,(ast.USub,ast.UAdd)):
+        operand = _value_node(node.operand)
+        if isinstance(node.op,ast.UAdd): return operand
+        if operand[0] == 'const': return ('const',-operand[1])
+        return ('neg',operand)
+    if isinstance(node,ast.BinOp) and type(node.op) in ARITH_OPS:
+        return ('arith',ARITH_OPS[type(node.op)],_value_node(node.left),_value_node(node.right))
+    raise Exception("Unsupported operand '{:s}' in the where expression.".format(ast.unparse(node)))
+
+def _constants(node):
+    """
+    Values of the tuple, list, or set on the right of 'in' and 'not in'.
+    """
+    if isinstance(node,(ast.Tuple,ast.List,ast.Set)):
+        values = [_value_node(element) for element in node.elts]
+    else:
+        values = [_value_node(node)]
+    if any(value[0] != 'const' for value in values):
+        raise Exception("The right side of 'in' should be a constant or a tuple of constants, such as ('US','PRC').")
+    return tuple(value[1] for value in values)
+
+def _test_node(node):
+    """
+    Translate a condition of an expression into a tree of tuples.
+    """
+    if isinstance(node,ast.BoolOp):
+        return ('and' if isinstance(node.op,ast.And) else 'or',tuple(_test_node(value) for value in node.values))
+    if isinstance(node,ast.UnaryOp) and isinstance(node.op,ast.Not):
+        return ('not',_test_node(node.operand))
+    if isinstance(node,ast.Compare):
+        # A chained comparison such as 300 < MEAN_ALT < 2000 is the conjunction of its pairs
+        tests,left = [],node.left
+        for op,right in zip(node.ops,node.comparators):
+            if type(op) in COMPARE_OPS:
+                tests.append(('cmp',COMPARE_OPS[type(op)],_value_node(left),_value_node(right)))
+            elif isinstance(op,(ast.In,ast.NotIn)):
+                tests.append(('in',_value_node(left),_constants(right),isinstance(op,ast.NotIn)))
+            elif isinstance(op,(ast.Is,ast.IsNot)) and isinstance(right,ast.Constant) and right.value is None:
+                tests.append(('null',_value_node(left),isinstance(op,ast.IsNot)))
+            else:
+                raise Exception("Unsupported comparison '{:s}' in the where expression.".format(ast.unparse(node)))
+            left = right
+        return tests[0] if len(tests) == 1 else ('and',tuple(tests))
+    if isinstance(node,ast.Name): # a boolean column, such as SSO
+        return ('truth',('col',node.id))
+    raise Exception("Unsupported condition '{:s}' in the where expression.".format(ast.unparse(node)))
+
+@lru_cache(maxsize=256)
+def compile_where(where):
+    """
+    Parse a where expression into a tree of conditions, which is cached by the text of the expression.
+
+    Usage:
+        tree = compile_where("300 < MEAN_ALT < 2000 and ECC < 0.01 and OWNER in ('US','PRC')")
+
+    Inputs:
+        where -> [str] Python-like boolean expression over the columns of a catalog, with 'and', 'or', 'not', the comparisons <, <=, >, >=, ==, !=, chained comparisons,
+        'in' and 'not in' with a tuple of constants, 'is None' and 'is not None' for missing values, the arithmetic +, -, *, /, and bare boolean columns such as SSO
+
+    Outputs:
+        tree -> [tuple] Tree of conditions
+    """
+    try:
+        expr = ast.parse(where.strip(),mode='eval').body
+    except SyntaxError as e:
+        raise Exception('Invalid where expression {:s}: {:s}'.format(repr(where),e.msg))
+    return _test_node(expr)
+
+def where_columns(where):
+    """
+    Names of the columns referenced by a where expression.
+    """
+    names = set()
+    def visit(node):
+        if type(node) is tuple:
+            if len(node) == 2 and node[0] == 'col' and type(node[1]) is str: names.add(node[1])
+            for child in node: visit(child)
+    visit(compile_where(where))
+    return names
+
+class _Column(object):
+    """
+    Arrays of a column prepared for vectorised evaluation: numbers and dates as they are, categoricals as codes, and text as fixed-width unicode with a mask of missing values.
+    """
+
+    def __init__(self,series):
+        self.series = series
+        dtype = series.dtype
+        self.codes = self.categories = self._nulls = None
+        if isinstance(dtype,pd.CategoricalDtype):
+            self.kind = 'cat'
+            self.codes = series.cat.codes.to_numpy()
+            self.categories = pd.Index(series.cat.categories)
+            self._values = None
+        elif pd.api.types.is_bool_dtype(dtype) and not series.hasnans:
+            self.kind,self._values = 'bool',series.to_numpy(dtype=bool)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            self.kind,self._values = 'date',series.to_numpy()
+        elif pd.api.types.is_numeric_dtype(dtype):
+            self.kind = 'num'
+            self._values = series.to_numpy(dtype=float,na_value=np.nan) if pd.api.types.is_extension_array_dtype(dtype) else series.to_numpy()
+        else:
+            numbers = pd.to_numeric(series,errors='coerce') if dtype == object else None
+            if numbers is not None and numbers.notna().sum() == series.notna().sum(): # an object column of numbers, such as from DISCOS
+                self.kind,self._values = 'num',numbers.to_numpy(dtype=float)
+            else:
+                self.kind,self._values = 'text',None
+
+    @property
+    def nulls(self):
+        if self._nulls is None: self._nulls = self.series.isna().to_numpy()
+        return self._nulls
+
+    @property
+    def values(self):
+        if self._values is None: # text, also for ordering comparisons of categoricals
+            self._values = self.series.astype(object).where(~self.nulls,'').to_numpy(dtype=str)
+        return self._values
+
+    def code(self,value):
+        """
+        Code of a category, or -2, which matches no row, if the value is not a category.
+        """
+        position = self.categories.get_indexer([value])[0]
+        return position if position >= 0 else -2
+
+class _Columns(object):
+    """
+    Prepared columns of a data frame, kept as long as the data frame exists.
+    """
+
+    def __init__(self,data):
+        self.data = weakref.ref(data) # a strong reference from the cache would keep the data frame alive
+        self.columns = {}
+
+    def __getitem__(self,name):
+        if name not in self.columns:
+            data = self.data()
+            if name not in data.columns:
+                raise Exception("Unknown column '{:s}' in the where expression; available columns are {:s}.".format(name,', '.join(data.columns)))
+            self.columns[name] = _Column(data[name])
+        return self.columns[name]
+
+# Prepared columns of the live data frames, keyed by id and removed once the data frame is released
+_prepared = {}
+
+def _prepare(data):
+    columns = _prepared.get(id(data))
+    if columns is None or columns.data() is not data:
+        columns = _prepared[id(data)] = _Columns(data)
+        weakref.finalize(data,_prepared.pop,id(data),None)
+    return columns
+
+def _value(node,columns,rows):
+    kind = node[0]
+    if kind == 'const':
+        return node[1]
+    if kind == 'col':
+        return columns[node[1]].values[rows]
+    if kind == 'neg':
+        return -_value(node[1],columns,rows)
+    return FUNCS[node[1]](_value(node[2],columns,rows),_value(node[3],columns,rows))
+
+def _as_date(value,other):
+    # Dates in text, such as '2020-01-01', are compared with datetime columns as datetime64
+    if type(value) is str and isinstance(other,np.ndarray) and other.dtype.kind == 'M': return np.datetime64(value)
+    return value
+
+def _text_nulls(node,columns,rows):
+    if node[0] == 'col':
+        column = columns[node[1]]
+        if column.kind in ['text','cat']: return column.nulls[rows]
+    return None
+
+def _size(rows):
+    return rows.stop - rows.start if type(rows) is slice else len(rows)
+
+def _test(node,columns,rows):
+    """
+    Evaluate a condition on some rows, given by a slice or an array of positions; conjunctions and disjunctions evaluate each operand only on the rows still undecided.
+    """
+    kind = node[0]
+    n = _size(rows)
+
+    if kind == 'and' or kind == 'or':
+        # An operand decides the rows where it is False for 'and', and True for 'or'
+        decided = kind == 'or'
+        result = np.full(n,not decided)
+        pending,sub = None,rows # positions of the undecided rows among rows, None for all
+        for child in node[1]:
+            flag = _test(child,columns,sub)
+            undecided = ~flag if decided else flag
+            if pending is None:
+                result[~undecided] = decided
+                pending = np.flatnonzero(undecided)
+                if len(pending) == n: # keep the slice while no row is decided
+                    pending = None
+                    continue
+            else:
+                result[pending[~undecided]] = decided
+                pending = pending[undecided]
+            if len(pending) == 0: break
+            sub = rows.start + pending if type(rows) is slice else rows[pending]
+        return result
+
+    if kind == 'not':
+        return ~_test(node[1],columns,rows)
+
+    if kind == 'truth':
+        values = _value(node[1],columns,rows)
+        return values if values.dtype == bool else np.asarray(values != 0)
+
+    if kind == 'null':
+        operand = node[1]
+        if operand[0] != 'col': raise Exception("'is None' applies to columns only.")
+        flag = columns[operand[1]].nulls[rows]
+        return ~flag if node[2] else flag
+
+    if kind == 'in':
+        operand,values,negate = node[1],node[2],node[3]
+        column = columns[operand[1]] if operand[0] == 'col' else None
+        if column is not None and column.kind == 'cat':
+            flag = np.isin(column.codes[rows],[column.code(value) for value in values])
+        else:
+            flag = np.isin(_value(operand,columns,rows),list(values))
+            nulls = _text_nulls(operand,columns,rows)
+            if nulls is not None: flag &= ~nulls
+        return ~flag if negate else flag
+
+    # Comparison
+    op,left,right = node[1],node[2],node[3]
+    if op in ['==','!='] and (left[0],right[0]) in [('col','const'),('const','col')]:
+        name,value = (left[1],right[1]) if left[0] == 'col' else (right[1],left[1])
+        column = columns[name]
+        if column.kind == 'cat':
+            flag = column.codes[rows] == column.code(value)
+            return ~flag if op == '!=' else flag
+    a,b = _value(left,columns,rows),_value(right,columns,rows)
+    a,b = _as_date(a,b),_as_date(b,a)
+    flag = np.asarray(FUNCS[op](a,b))
+    if flag.ndim == 0: flag = np.full(n,bool(flag))
+    # Missing text compares as NaN does: False, except for '!='
+    for side in [left,right]:
+        nulls = _text_nulls(side,columns,rows)
+        if nulls is not None: flag = flag | nulls if op == '!=' else flag & ~nulls
+    return flag
+
+def where_flag(data,where,flag=None):
+    """
+    Flag the rows of a data frame satisfying a where expression.
+    The expression is evaluated chunk by chunk in a single pass, and only on the rows already selected by flag.
+
+    Usage:
+        flag = where_flag(df,"300 < MEAN_ALT < 2000 and (ECC < 0.01 or OWNER in ('US','PRC'))")
+
+    Inputs:
+        data -> [pandas dataframe] Catalog data frame
+        where -> [str] Where expression; see compile_where
+        flag -> [array of bool,optional,default=None] Rows selected by other filters; if None, all rows are candidates
+
+    Outputs:
+        flag -> [array of bool] True for the rows satisfying the expression and selected by flag
+    """
+    tree = compile_where(where)
+    columns = _prepare(data)
+    if flag is not None: flag = np.asarray(flag,dtype=bool)
+    n = len(data)
+    result = np.zeros(n,dtype=bool)
+    for start in range(0,n,CHUNK_ROWS):
+        stop = min(start + CHUNK_ROWS,n)
+        if flag is None:
+            rows = slice(start,stop)
+        else:
+            rows = start + np.flatnonzero(flag[start:stop])
+            if len(rows) == 0: continue
+            if len(rows) == stop - start: rows = slice(start,stop)
+        result[rows] = _test(tree,columns,rows)
+    return result
@@ -29,6 +29,17 @@ setup(
         'matplotlib',
         'pandas',
         'wget',
-        'colorama',
         ],
+    extras_require={
+        'yaml':['pyyaml'],
+        'columnar':['pyarrow'],
+        'async':['httpx'],
+        },
+    entry_points={
+        'console_scripts':[
+            'satcatalogquery=satcatalogquery.cli:main',
+            'satcatalogquery-server=satcatalogquery.server:main',
+            'satcatalogquery-publish=satcatalogquery.shared_catalog:main',
+            ],
+        },
 )
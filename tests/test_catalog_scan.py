@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from satcatalogquery.catalog_scan import CatalogScan
+from satcatalogquery.query import _prepare_satcat,_celestrak_select
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'benchmarks'))
+import synthetic
+
+CONSTRAINTS = {'DECAYED':False,'MEAN_ALT':[400,2000],'where':'ECC < 0.05'}
+
+@pytest.fixture(scope='module')
+def sources(tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp('scan') / 'satcat.csv')
+    synthetic.write_satcat(5000,filename)
+    expected = _celestrak_select(_prepare_satcat(pd.read_csv(filename)),**CONSTRAINTS)
+    return filename,expected
+
+@pytest.mark.parametrize('processes',[1,2])
+def test_select_agrees_with_the_query(sources,processes):
+    filename,expected = sources
+    scan = CatalogScan(filename,batch_rows=700,processes=processes,**CONSTRAINTS)
+    assert len(scan.pieces) > 2
+
+    unsorted = pd.concat(scan.select(sort=False))
+    assert unsorted['NORAD_ID'].tolist() == expected['NORAD_ID'].tolist()
+
+    # The external merge sort puts the objects missing the key last
+    ordered = pd.concat(scan.select(sort='-RCS'))
+    assert sorted(ordered['NORAD_ID']) == sorted(expected['NORAD_ID'])
+    missing = ordered['RCS'].isna().to_numpy()
+    assert 0 < missing.sum() == missing[-missing.sum():].sum()
+    assert ordered['RCS'][~missing].is_monotonic_decreasing
+
+@pytest.mark.parametrize('processes',[1,2])
+def test_aggregate_agrees_with_the_query(sources,processes):
+    filename,expected = sources
+    scan = CatalogScan(filename,batch_rows=700,processes=processes,**CONSTRAINTS)
+    count,freq,(counts,edges),describe = scan.aggregate([{'kind':'count'},{'kind':'frequency','x':'OWNER'},
+                                                         {'kind':'hist1d','x':'MEAN_ALT','range':[400,2000],'num_bins':16},{'kind':'describe','x':'INCLINATION'}])
+    assert count == len(expected)
+    assert freq.to_dict() == expected['OWNER'].value_counts().to_dict()
+    assert counts.tolist() == np.histogram(expected['MEAN_ALT'].dropna(),edges)[0].tolist()
+    assert describe['count'] == expected['INCLINATION'].notna().sum()
+    assert describe['mean'] == pytest.approx(expected['INCLINATION'].mean())
+    assert describe['std'] == pytest.approx(expected['INCLINATION'].std())
+    assert describe['max'] == pytest.approx(expected['INCLINATION'].max())
+
+def test_unknown_constraints_are_rejected(sources):
+    with pytest.raises(Exception,match='Unknown constraints'):
+        CatalogScan(sources[0],as_of='2020-01-01')
@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'benchmarks'))
+from run import heavy_imports
+
+def test_import_loads_no_heavy_modules():
+    # matplotlib, the download clients, asyncio, and multiprocessing are imported on first use only
+    assert heavy_imports() == []
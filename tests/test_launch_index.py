@@ -0,0 +1,38 @@
+import re
+from fnmatch import translate
+
+import numpy as np
+import pandas as pd
+
+from satcatalogquery.launch_index import LaunchIndex,launch_flag,discos_launch_filter
+
+COSPAR = pd.Series(['1999-025A','1999-025B','1999-025AZ','1999-026A','2022-001BZ','2022-117C','1998-067A',None,'UNKNOWN'])
+
+def _brute(pattern):
+    regex = re.compile(translate(pattern.upper()))
+    return sorted(k for k,cospar in enumerate(COSPAR.fillna('')) if regex.match(cospar))
+
+def test_match_agrees_with_fnmatch():
+    index = LaunchIndex.build(COSPAR)
+    for pattern in ['1999-025A','1999-025*','1999-025?','1999-025[A-B]','1999-*','2022*','199*','*A','*','1999-025a']:
+        assert sorted(index.match(pattern)) == _brute(pattern),pattern
+
+def test_launch_and_years():
+    index = LaunchIndex.build(COSPAR)
+    assert sorted(index.launch(1999,25)) == [0,1,2]
+    assert sorted(index.years(1998,1999)) == [0,1,2,3,6]
+    assert sorted(index.years(2023,2030)) == []
+
+def test_launch_flag_intersects_the_options():
+    index = LaunchIndex.build(COSPAR)
+    flag = launch_flag(index,COSPAR_ID=['1999-025*','2022-117C'],LAUNCH_YEAR=[2000,2030],n=len(COSPAR))
+    assert np.flatnonzero(flag).tolist() == [5]
+    assert launch_flag(index,n=len(COSPAR)).all()
+
+def test_discos_launch_filter():
+    assert discos_launch_filter('1999-025A') == ("(eq(cosparId,'1999-025A'))",True)
+    expr,exact = discos_launch_filter(['1999-025*','1998-067A','1998-067B'],[2020,2023])
+    assert expr == "(startswith(cosparId,'1999-025')|in(cosparId,('1998-067A','1998-067B')))&(ge(cosparId,'2020-')&lt(cosparId,'2024-'))"
+    assert exact
+    assert discos_launch_filter('1999-02?A') == ("(startswith(cosparId,'1999-02'))",False)
+    assert discos_launch_filter('*A') == (None,False)
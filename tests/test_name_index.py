@@ -0,0 +1,31 @@
+import re
+from fnmatch import translate
+
+import numpy as np
+import pandas as pd
+
+from satcatalogquery.name_index import NameIndex,name_flag
+
+NAMES = pd.Series(['STARLINK-1007','starlink-1008','STARLINK-30123','COSMOS 2251 DEB','COSMOS 2251','COSMOS 2200 DEB','ISS (ZARYA)',None,'FENGYUN 1C DEB'])
+
+def _brute(pattern):
+    regex = re.compile(translate(pattern.upper()))
+    return sorted(k for k,name in enumerate(NAMES.fillna('')) if regex.match(name.upper()))
+
+def test_match_agrees_with_fnmatch():
+    index = NameIndex.build(NAMES)
+    for pattern in ['STARLINK-*','starlink-100?','COSMOS 2251','cosmos 2251 deb','*DEB*','*DEB','COSMOS 22?? DEB','COSMOS 22[05]* DEB','ISS (ZARYA)','NOPE*','*']:
+        assert sorted(index.match(pattern)) == _brute(pattern),pattern
+
+def test_name_flag_combines_patterns():
+    index = NameIndex.build(NAMES)
+    flag = name_flag(index,['STARLINK-*','ISS*'],len(NAMES))
+    assert np.flatnonzero(flag).tolist() == [0,1,2,6]
+
+def test_save_and_load_check_the_version(tmp_path):
+    index = NameIndex.build(NAMES)
+    filename = str(tmp_path / 'names.npz')
+    index.save(filename,(1.0,2.0))
+    assert NameIndex.load(filename,(1.0,3.0)) is None
+    loaded = NameIndex.load(filename,(1.0,2.0))
+    assert sorted(loaded.match('COSMOS*')) == sorted(index.match('COSMOS*'))
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+from satcatalogquery.plane_index import PlaneIndex,parse_tle
+
+def _elements():
+    rng = np.random.default_rng(0)
+    n = 400
+    # Planes clustered around RAAN 0 deg, so that many pairs straddle the wrap-around at 360 deg
+    raan = (rng.choice([0,0.6,120,359.5],n) + rng.normal(0,0.4,n)) % 360
+    return pd.DataFrame({'NORAD_ID':np.arange(n,dtype=np.int64) + 10000,'INCLINATION':rng.choice([53.0,53.3,97.6],n) + rng.normal(0,0.1,n),
+                         'RAAN':raan,'MEAN_MOTION':rng.choice([15.05,15.2],n) + rng.normal(0,0.01,n)})
+
+def _raan_dist(a,b):
+    d = np.abs(a - b) % 360
+    return np.minimum(d,360 - d)
+
+def test_neighbours_agree_with_brute_force():
+    elements = _elements()
+    index = PlaneIndex.build(elements,cell=(0.25,0.7,0.05))
+    for inc,raan,n,inc_tol,raan_tol,n_tol in [(53,0.1,None,0.3,1.0,None),(53,359.9,15.05,0.5,0.8,0.02),(97.6,-0.5,None,0.2,2.5,None),(53.3,120,None,1.0,0.3,None)]:
+        keep = (np.abs(elements['INCLINATION'] - inc) <= inc_tol) & (_raan_dist(elements['RAAN'],raan % 360) <= raan_tol)
+        if n_tol is not None: keep &= np.abs(elements['MEAN_MOTION'] - n) <= n_tol
+        near = index.neighbours(inc,raan,n,inc_tol,raan_tol,n_tol)
+        assert sorted(near['NORAD_ID']) == sorted(elements['NORAD_ID'][keep])
+        assert near['PLANE_ANGLE'].is_monotonic_increasing
+
+def test_coplanar_across_the_wrap_around():
+    elements = pd.DataFrame({'NORAD_ID':[1,2,3,4],'INCLINATION':[53.0,53.1,53.0,70.0],'RAAN':[359.6,0.3,180.0,0.0],'MEAN_MOTION':[15.0,15.0,15.0,15.0]})
+    index = PlaneIndex.build(elements)
+    assert index.coplanar(1,inc_tol=0.2,raan_tol=1.0)['NORAD_ID'].tolist() == [2]
+    assert index.coplanar(2,inc_tol=0.2,raan_tol=0.5)['NORAD_ID'].tolist() == []
+
+def test_clusters_agree_with_brute_force():
+    elements = _elements()
+    index = PlaneIndex.build(elements)
+    inc_tol,raan_tol = 0.2,0.5
+    inc,raan = elements['INCLINATION'].to_numpy(),elements['RAAN'].to_numpy()
+    # Connected components of the pairs within the tolerances
+    labels = np.arange(len(elements))
+    linked = (np.abs(inc[:,None] - inc[None,:]) <= inc_tol) & (_raan_dist(raan[:,None],raan[None,:]) <= raan_tol)
+    for _ in range(len(elements)):
+        merged = np.where(linked,labels[None,:],len(elements)).min(axis=1)
+        if (merged == labels).all(): break
+        labels = merged
+    expected = {frozenset(elements['NORAD_ID'][labels == label]) for label in np.unique(labels) if (labels == label).sum() >= 2}
+
+    planes = index.clusters(inc_tol,raan_tol,chunk_size=37)
+    assert {frozenset(group) for _,group in planes.groupby('PLANE')['NORAD_ID']} == expected
+    sizes = planes.groupby('PLANE').size()
+    assert sizes.is_monotonic_decreasing
+
+def test_from_tle_propagates_the_raan(tmp_path):
+    tle_file = tmp_path / 'tle.txt'
+    tle_file.write_text('ISS (ZARYA)\n'
+                        '1 25544U 98067A   08264.51782528 -.00002182  00000-0 -11606-4 0  2927\n'
+                        '2 25544  51.6416 247.4627 0006703 130.5360 325.0288 15.72125391563537\n'
+                        '1 25544U 98067A   08265.51782528 -.00002182  00000-0 -11606-4 0  2927\n'
+                        '2 25544  51.6416 242.4627 0006703 130.5360 325.0288 15.72125391563537\n'
+                        '1 00005U 58002B   08263.51782528  .00000023  00000-0  28098-4 0  4753\n'
+                        '2 00005  34.2682 348.7242 1859667 331.7664  19.3264 10.82419157413667\n')
+    elements = parse_tle(str(tle_file))
+    assert elements['NORAD_ID'].tolist() == [5,25544]
+    assert elements['RAAN'].tolist() == [348.7242,242.4627] # the latest element set of each object
+    assert elements['ECC'].tolist() == [0.1859667,0.0006703]
+
+    index = PlaneIndex.from_tle(str(tle_file))
+    raan = index.elements.set_index('NORAD_ID')['RAAN']
+    assert raan[25544] == 242.4627
+    # Two days of J2 drift of a prograde orbit move the RAAN westward by several degrees
+    assert 340 < raan[5] < 348
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+
+from satcatalogquery.name_index import NameIndex
+from satcatalogquery.launch_index import LaunchIndex
+from satcatalogquery.shared_catalog import CatalogPublisher,attach
+
+def _sources():
+    satcat = pd.DataFrame({'OBJECT_NAME':pd.Series(['ISS (ZARYA)','STARLINK-1007',None,'COSMOS 2251 DEB'],dtype='str'),
+                           'COSPAR_ID':pd.Series(['1998-067A','2019-074A','1999-025A',None],dtype='str'),
+                           'NORAD_ID':np.array([25544,44713,25730,34427],dtype=np.int64),
+                           'APOGEE':np.array([421.0,550.5,np.nan,800.0]),
+                           'LAUNCH_DATE':pd.to_datetime(['1998-11-20','2019-11-11','1999-04-15','1993-06-16'])})
+    qsmag = pd.DataFrame({'NORAD_ID':np.array([25544,44713],dtype=np.int64),'StdMag':np.array([-1.3,4.5])})
+    return satcat,qsmag,NameIndex.build(satcat['OBJECT_NAME']),LaunchIndex.build(satcat['COSPAR_ID'])
+
+def test_publish_and_attach(tmp_path):
+    manifest = str(tmp_path / 'shared-catalog.json')
+    satcat,qsmag,names,launches = sources = _sources()
+    publisher = CatalogPublisher(manifest)
+    try:
+        assert publisher.publish(sources) == 1
+        shared = attach(manifest)
+        assert shared['version'] == 1
+        pd.testing.assert_frame_equal(shared['satcat'],satcat)
+        pd.testing.assert_frame_equal(shared['qsmag'],qsmag)
+        assert not shared['satcat']['APOGEE'].to_numpy().flags.writeable
+        assert shared['names'].match('starlink-*').tolist() == [1]
+        assert shared['launches'].match('1999-*').tolist() == [2]
+
+        # Another process attaches to the same block
+        code = 'from satcatalogquery.shared_catalog import attach; print(attach({!r})["satcat"]["NORAD_ID"].sum())'.format(manifest)
+        output = subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,check=True).stdout
+        assert int(output) == satcat['NORAD_ID'].sum()
+
+        # A new publication is picked up on the next attach
+        assert publisher.publish(sources) == 2
+        assert attach(manifest)['version'] == 2
+    finally:
+        publisher.close()
+    assert attach(manifest) is None
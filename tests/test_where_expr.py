@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from satcatalogquery import where_expr
+from satcatalogquery.where_expr import compile_where,where_columns,where_flag
+
+def _catalog():
+    rng = np.random.default_rng(0)
+    n = 50
+    return pd.DataFrame({'MEAN_ALT':np.where(rng.random(n) < 0.1,np.nan,rng.uniform(200,40000,n)),
+                         'ECC':rng.uniform(0,0.1,n).astype(np.float32),
+                         'OWNER':pd.Categorical(rng.choice(['US','PRC','CIS',None],n)),
+                         'OBJECT_NAME':pd.Series(rng.choice(['STARLINK-1','ISS',None],n),dtype=object),
+                         'LAUNCH_DATE':pd.to_datetime('1990-01-01') + pd.to_timedelta(rng.integers(0,12000,n),unit='D'),
+                         'SSO':rng.random(n) < 0.3,
+                         'RCS':pd.array(np.where(rng.random(n) < 0.2,None,rng.integers(0,10,n)),dtype='Int32')})
+
+CASES = [
+    ('300 < MEAN_ALT < 2000',lambda df: (df.MEAN_ALT > 300) & (df.MEAN_ALT < 2000)),
+    ('MEAN_ALT >= 2000 or ECC < 0.01',lambda df: (df.MEAN_ALT >= 2000) | (df.ECC < np.float32(0.01))),
+    ("OWNER in ('US','PRC') and not SSO",lambda df: df.OWNER.isin(['US','PRC']) & ~df.SSO),
+    ("OWNER not in ('US',)",lambda df: ~df.OWNER.isin(['US'])),
+    ("OWNER == 'CIS'",lambda df: df.OWNER == 'CIS'),
+    ("OWNER != 'CIS'",lambda df: df.OWNER.astype(object) != 'CIS'),
+    ("OBJECT_NAME == 'ISS'",lambda df: df.OBJECT_NAME == 'ISS'),
+    ("OBJECT_NAME != 'ISS'",lambda df: df.OBJECT_NAME != 'ISS'),
+    ('OBJECT_NAME is None or MEAN_ALT is not None',lambda df: df.OBJECT_NAME.isna() | df.MEAN_ALT.notna()),
+    ("LAUNCH_DATE >= '2010-01-01'",lambda df: df.LAUNCH_DATE >= pd.Timestamp('2010-01-01')),
+    ('MEAN_ALT*2 - 100 > -(-5000)',lambda df: df.MEAN_ALT*2 - 100 > 5000),
+    ('RCS > 4',lambda df: (df.RCS > 4).fillna(False)),
+]
+
+@pytest.mark.parametrize('where,expected',CASES)
+def test_where_flag_agrees_with_pandas(monkeypatch,where,expected):
+    df = _catalog()
+    flag = expected(df).to_numpy(dtype=bool)
+    assert where_flag(df,where).tolist() == flag.tolist()
+    # Across chunk boundaries, and on rows preselected by another filter
+    monkeypatch.setattr(where_expr,'CHUNK_ROWS',7)
+    preselected = np.arange(len(df)) % 3 != 0
+    assert where_flag(df,where).tolist() == flag.tolist()
+    assert where_flag(df,where,preselected).tolist() == (flag & preselected).tolist()
+
+def test_compile_where():
+    assert compile_where('(ECC<0.01)  and OWNER==\'US\'') == compile_where("ECC < 0.01 and (OWNER == 'US')")
+    assert where_columns("300 < MEAN_ALT < 2000 and (ECC < 0.01 or OWNER in ('US','PRC'))") == {'MEAN_ALT','ECC','OWNER'}
+    for where in ['ECC <','__import__("os")','ECC in OWNER','ECC.real > 0']:
+        with pytest.raises(Exception):
+            compile_where(where)
+    with pytest.raises(Exception,match='Unknown column'):
+        where_flag(_catalog(),'APOGEE > 0')